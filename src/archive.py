@@ -0,0 +1,228 @@
+"""ECDA archive — many ECDC tracks in one file with a central directory.
+
+Batches of short clips spend more time on filesystem overhead than on the
+codes themselves. An archive stores complete ECDC files back to back and
+locates them through one central directory, so listing and opening a track
+never touches the other tracks.
+
+Layout:
+    ECDA<version:u8><n_tracks:u64><directory_offset:u64>
+    Track data: complete ECDC files, back to back
+    Directory at directory_offset:
+        n_tracks * <offset:u64><size:u64><duration:f64><model_sr:u32>
+        <names_size:u64><names: UTF-8, NUL-separated>
+
+The header is patched when a writer is closed. Appending writes new tracks
+after the old directory and a fresh directory behind them, so the archive
+stays readable with its previous contents if the process dies midway.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import shutil
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .ecdc import EcdcReader
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"ECDA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBQQ")  # magic, version, n_tracks, directory_offset
+_HEADER_PATCH = struct.Struct("<QQ")  # n_tracks, directory_offset
+_ENTRY_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("size", "<u8"),
+    ("duration", "<f8"),
+    ("model_sr", "<u4"),
+])
+_NAMES_SIZE = struct.Struct("<Q")
+
+ARCHIVE_SUFFIX = ".ecda"
+
+
+@dataclass
+class ArchiveEntry:
+    name: str
+    offset: int
+    size: int
+    duration: float
+    model_sr: int
+
+
+def _read_directory(data, path: Path) -> tuple[np.ndarray, list[str]]:
+    """Parse header and central directory from a buffer holding the archive."""
+    if len(data) < _HEADER.size or bytes(data[:4]) != _MAGIC:
+        raise ValueError(f"Not an ECDA archive: {path.name}")
+    _, version, n_tracks, directory_offset = _HEADER.unpack_from(data)
+    if version != _VERSION:
+        raise ValueError(f"Unsupported ECDA version: {version}")
+    if not n_tracks:
+        return np.zeros(0, dtype=_ENTRY_DTYPE), []
+
+    names_pos = directory_offset + n_tracks * _ENTRY_DTYPE.itemsize
+    if names_pos + _NAMES_SIZE.size > len(data):
+        raise ValueError(f"Truncated ECDA archive: {path.name}")
+    entries = np.frombuffer(data, dtype=_ENTRY_DTYPE, count=n_tracks, offset=directory_offset)
+    (names_size,) = _NAMES_SIZE.unpack_from(data, names_pos)
+    names_pos += _NAMES_SIZE.size
+    if names_pos + names_size > len(data):
+        raise ValueError(f"Truncated ECDA archive: {path.name}")
+    names = bytes(data[names_pos:names_pos + names_size]).decode("utf-8").split("\0")
+    if len(names) != n_tracks:
+        raise ValueError(f"Corrupt ECDA directory: {path.name}")
+    return entries.copy(), names
+
+
+class ArchiveWriter:
+    """Creates an archive or appends tracks to an existing one.
+
+    Track data is streamed straight to disk; only the directory is kept in
+    memory until :meth:`close` writes it and patches the header.
+    """
+
+    def __init__(self, path: Path, append: bool = True):
+        self.path = Path(path)
+        self._entries: list[tuple[int, int, float, int]] = []
+        self._names: list[str] = []
+
+        if append and self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb") as fh:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    entries, self._names = _read_directory(mm, self.path)
+            self._entries = entries.tolist()
+            self._fh = open(self.path, "r+b")
+            self._fh.seek(0, os.SEEK_END)
+        else:
+            self._fh = open(self.path, "wb")
+            self._fh.write(_HEADER.pack(_MAGIC, _VERSION, 0, 0))
+        self._known = set(self._names)
+
+    def __enter__(self) -> ArchiveWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add_file(self, name: str, ecdc_path: Path, duration: float) -> ArchiveEntry:
+        """Copy a finished ECDC file into the archive as track ``name``."""
+        if name in self._known:
+            raise ValueError(f"Track already in archive: {name}")
+        if "\0" in name:
+            raise ValueError("Track names must not contain NUL characters")
+        with EcdcReader(ecdc_path) as reader:
+            model_sr = reader.model_sr
+
+        offset = self._fh.tell()
+        with open(ecdc_path, "rb") as src:
+            shutil.copyfileobj(src, self._fh, 1 << 20)
+        size = self._fh.tell() - offset
+
+        self._entries.append((offset, size, float(duration), int(model_sr)))
+        self._names.append(name)
+        self._known.add(name)
+        return ArchiveEntry(name, offset, size, float(duration), int(model_sr))
+
+    def close(self) -> None:
+        """Write the central directory and point the header at it."""
+        if self._fh.closed:
+            return
+        directory_offset = self._fh.tell()
+        entries = np.array(self._entries, dtype=_ENTRY_DTYPE)
+        names = "\0".join(self._names).encode("utf-8")
+        self._fh.write(entries.tobytes())
+        self._fh.write(_NAMES_SIZE.pack(len(names)))
+        self._fh.write(names)
+        self._fh.flush()
+        self._fh.seek(_HEADER.size - _HEADER_PATCH.size)
+        self._fh.write(_HEADER_PATCH.pack(len(self._names), directory_offset))
+        self._fh.close()
+
+
+class ArchiveReader:
+    """Lists and extracts the tracks of an archive via its central directory."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._entries, self._names = _read_directory(self._mm, self.path)
+        except Exception:
+            self._mm.close()
+            raise
+        self._lookup = {name: i for i, name in enumerate(self._names)}
+
+    def __enter__(self) -> ArchiveReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._lookup
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    def entry(self, name: str) -> ArchiveEntry:
+        try:
+            i = self._lookup[name]
+        except KeyError:
+            raise KeyError(f"No track {name!r} in {self.path.name}") from None
+        offset, size, duration, model_sr = self._entries[i].item()
+        return ArchiveEntry(name, offset, size, duration, model_sr)
+
+    def list(self) -> list[ArchiveEntry]:
+        return [self.entry(name) for name in self._names]
+
+    @property
+    def total_duration(self) -> float:
+        return float(self._entries["duration"].sum())
+
+    def read_bytes(self, name: str) -> bytes:
+        """The complete ECDC file of track ``name``."""
+        e = self.entry(name)
+        return self._mm[e.offset:e.offset + e.size]
+
+    def open_track(self, name: str, strict: bool = True) -> EcdcReader:
+        """Reader over track ``name`` in place, without extracting it."""
+        e = self.entry(name)
+        return EcdcReader(self.path, offset=e.offset, size=e.size, strict=strict)
+
+    def extract(self, name: str, output_path: Path) -> Path:
+        """Write track ``name`` out as a standalone ``.ecdc`` file."""
+        out = Path(output_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        e = self.entry(name)
+        with open(out, "wb") as fh, memoryview(self._mm) as view:
+            fh.write(view[e.offset:e.offset + e.size])
+        return out
+
+
+def list_tracks(path: Path) -> list[ArchiveEntry]:
+    """Directory of the archive at ``path``."""
+    with ArchiveReader(path) as reader:
+        return reader.list()
+
+
+def extract_track(path: Path, name: str, output_path: Path) -> Path:
+    """Extract one track of the archive at ``path`` to ``output_path``."""
+    with ArchiveReader(path) as reader:
+        return reader.extract(name, output_path)
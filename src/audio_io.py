@@ -2,65 +2,355 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
+import struct
 import subprocess
+import threading
+import time
+import wave
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
+import numpy as np
 import torch
 import torchaudio
 
 from .models import AudioInfo
+from .resample import StreamingResampler, resample
 
 logger = logging.getLogger(__name__)
 
+# Samples per read from an ffmpeg pipe.
+_FFMPEG_BLOCK_SAMPLES = 1 << 16
+# ffmpeg decode timeout: a fixed allowance plus this many seconds per second of audio.
+_FFMPEG_TIMEOUT_S = 120.0
+_FFMPEG_TIMEOUT_PER_S = 0.5
+_WATCHDOG_POLL_S = 0.5
 
-def load_audio(path: str | Path) -> tuple[torch.Tensor, int]:
+
+def load_audio(
+    path: str | Path,
+    sample_rate: int | None = None,
+    channels: int | None = None,
+) -> tuple[torch.Tensor, int]:
     """Load audio file and return (waveform, sample_rate).
 
     Tries torchaudio first, falls back to ffmpeg for formats
     that torchcodec cannot handle (e.g. MP3).
     Waveform shape: (channels, samples).
+
+    ``sample_rate`` and ``channels`` ask for the audio in that form (see
+    :func:`match_channels`), e.g. exactly what a model consumes. ffmpeg
+    converts while decoding, with soxr if available; torchaudio input is
+    mixed down first and then resampled with a cached kernel.
     """
     path = Path(path)
     try:
         waveform, sr = torchaudio.load(str(path))
-        return waveform, sr
     except Exception:
         logger.debug("torchaudio.load failed, using ffmpeg fallback", exc_info=True)
-        return _load_audio_ffmpeg(path)
+        return _load_audio_ffmpeg(path, sample_rate, channels)
+    waveform = match_channels(waveform, channels)
+    if sample_rate is not None and sr != sample_rate:
+        waveform, sr = resample(waveform, sr, sample_rate), sample_rate
+    return waveform, sr
+
+
+def match_channels(waveform: torch.Tensor, channels: int | None) -> torch.Tensor:
+    """Average down to mono, duplicate mono, or keep the first ``channels`` channels."""
+    n = waveform.shape[0]
+    if channels is None or n == channels:
+        return waveform
+    if channels == 1:
+        return waveform.mean(dim=0, keepdim=True)
+    if n == 1:
+        return waveform.repeat(channels, 1)
+    if n > channels:
+        return waveform[:channels]
+    raise ValueError(f"Cannot map {n} channels to {channels}")
 
 
-def _load_audio_ffmpeg(path: Path, target_sr: int = 48000) -> tuple[torch.Tensor, int]:
-    """Load audio via ffmpeg, decoding to raw PCM float32."""
-    import numpy as np
+def _load_audio_ffmpeg(
+    path: Path,
+    target_sr: int | None = None,
+    channels: int | None = None,
+) -> tuple[torch.Tensor, int]:
+    """Load audio via ffmpeg, decoding to raw PCM float32 at ``target_sr`` (default: source rate).
 
-    # Probe channel count
+    Blocks from the pipe are copied straight into a channel-major array
+    sized from the probed duration, so the decoded audio exists only once.
+    """
     info = _get_info_ffprobe(path)
-    channels = info.channels or 2
+    channels = channels or info.channels or 2
+    target_sr = target_sr or info.sample_rate or 48000
+    # Probed durations are estimates; the array grows if they fall short.
+    audio = np.empty((channels, int(info.duration * target_sr) + _FFMPEG_BLOCK_SAMPLES), np.float32)
+    n = 0
+    for frames in _iter_ffmpeg_pcm(path, info, _FFMPEG_BLOCK_SAMPLES, target_sr, channels):
+        if n + len(frames) > audio.shape[1]:
+            grown = np.empty((channels, 2 * audio.shape[1]), np.float32)
+            grown[:, :n] = audio[:, :n]
+            audio = grown
+        audio[:, n:n + len(frames)] = frames.T
+        n += len(frames)
+    if n < audio.shape[1] // 2:
+        # A wildly high duration estimate would otherwise pin the whole buffer.
+        return torch.from_numpy(audio[:, :n].copy()), target_sr
+    return torch.from_numpy(audio[:, :n]), target_sr
 
-    result = subprocess.run(
-        [
-            "ffmpeg",
-            "-v", "quiet",
-            "-i", str(path),
-            "-f", "f32le",
-            "-acodec", "pcm_f32le",
-            "-ar", str(target_sr),
-            "-ac", str(channels),
-            "pipe:1",
-        ],
-        capture_output=True,
-        timeout=120,
-    )
-    if result.returncode != 0:
+
+def iter_audio_blocks(
+    path: str | Path,
+    block_samples: int,
+    sample_rate: int | None = None,
+    channels: int | None = None,
+) -> Iterator[torch.Tensor]:
+    """Stream an audio file as float32 blocks shaped (channels, <=block_samples).
+
+    PCM WAV files are read directly and, if needed, mixed to ``channels``
+    and resampled to ``sample_rate`` block by block; everything else goes
+    through an ffmpeg pipe. Only one block is held in memory at a time.
+    """
+    path = Path(path)
+    try:
+        wav = wave.open(str(path), "rb")
+    except (wave.Error, EOFError):
+        logger.debug("Not a plain PCM WAV, streaming through ffmpeg: %s", path.name)
+        wav = None
+
+    if wav is None:
+        yield from _iter_ffmpeg_blocks(path, block_samples, sample_rate, channels)
+        return
+    with wav:
+        blocks = (match_channels(b, channels) for b in _iter_wav_blocks(wav, block_samples))
+        if sample_rate in (None, wav.getframerate()):
+            yield from blocks
+            return
+        # Same kernel as the whole-file path, so chunked encodes match it.
+        stream = StreamingResampler(wav.getframerate(), sample_rate)
+        for block in blocks:
+            out = stream.process(block)
+            if out.shape[-1]:
+                yield out
+        out = stream.flush()
+        if out.shape[-1]:
+            yield out
+
+
+def _iter_wav_blocks(wav: wave.Wave_read, block_samples: int) -> Iterator[torch.Tensor]:
+    channels = wav.getnchannels()
+    width = wav.getsampwidth()
+    while True:
+        raw = wav.readframes(block_samples)
+        if not raw:
+            return
+        if width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif width == 2:
+            samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / (1 << 15)
+        elif width == 3:
+            padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+            padded[:, 1:] = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            samples = padded.view("<i4").reshape(-1).astype(np.float32) / (1 << 31)
+        elif width == 4:
+            samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / (1 << 31)
+        else:
+            raise ValueError(f"Unsupported WAV sample width: {width}")
+        yield torch.from_numpy(np.ascontiguousarray(samples.reshape(-1, channels).T))
+
+
+def _iter_ffmpeg_blocks(
+    path: Path, block_samples: int, sample_rate: int | None, channels: int | None
+) -> Iterator[torch.Tensor]:
+    info = _get_info_ffprobe(path)
+    channels = channels or info.channels or 2
+    for frames in _iter_ffmpeg_pcm(path, info, block_samples, sample_rate, channels):
+        # Always a copy: ``frames`` is overwritten by the next read, and for
+        # mono input its transpose is already contiguous.
+        yield torch.from_numpy(frames.T.copy())
+
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_has_soxr() -> bool:
+    """Whether the installed ffmpeg was built with the soxr resampler."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-buildconf"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return "--enable-libsoxr" in result.stdout
+
+
+def _ffmpeg_timeout(duration: float) -> float:
+    """Seconds ffmpeg may keep a reader waiting for a file of ``duration`` seconds."""
+    return _FFMPEG_TIMEOUT_S + duration * _FFMPEG_TIMEOUT_PER_S
+
+
+class _Watchdog:
+    """Kills ``proc`` once it has kept the reader waiting ``timeout`` seconds in total.
+
+    Time spent inside :meth:`paused`, while the consumer works on a block,
+    does not count, so slow consumers never trigger it.
+    """
+
+    def __init__(self, proc: subprocess.Popen, timeout: float):
+        self.expired = False
+        self._proc = proc
+        self._deadline = time.monotonic() + timeout
+        self._paused_at: float | None = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ffmpeg-watchdog", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._done.wait(_WATCHDOG_POLL_S):
+            with self._lock:
+                if self._paused_at is None and time.monotonic() > self._deadline:
+                    self.expired = True
+                    self._proc.kill()
+                    return
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        with self._lock:
+            self._paused_at = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._deadline += time.monotonic() - self._paused_at
+                self._paused_at = None
+
+    def stop(self) -> None:
+        self._done.set()
+
+
+def _iter_ffmpeg_pcm(
+    path: Path,
+    info: AudioInfo,
+    block_samples: int,
+    sample_rate: int | None,
+    channels: int,
+) -> Iterator[np.ndarray]:
+    """Decode through an ffmpeg pipe into interleaved float32 (samples, channels) blocks.
+
+    Every block is read into the same preallocated buffer and is only valid
+    until the next one is requested. The timeout scales with the probed
+    duration and only counts time spent waiting for ffmpeg.
+    """
+    cmd = ["ffmpeg", "-v", "quiet", "-i", str(path), "-f", "f32le", "-acodec", "pcm_f32le"]
+    if sample_rate is not None:
+        if sample_rate != info.sample_rate and _ffmpeg_has_soxr():
+            cmd += ["-af", "aresample=resampler=soxr"]
+        cmd += ["-ar", str(sample_rate)]
+    cmd += ["-ac", str(channels), "pipe:1"]
+
+    frame_bytes = channels * 4
+    buf = bytearray(block_samples * frame_bytes)
+    view = memoryview(buf)
+    frames = np.frombuffer(buf, dtype=np.float32).reshape(block_samples, channels)
+    timeout = _ffmpeg_timeout(info.duration)
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    watchdog = _Watchdog(proc, timeout)
+    try:
+        while True:
+            filled = 0
+            while filled < len(buf):
+                got = proc.stdout.readinto(view[filled:])
+                if not got:
+                    break
+                filled += got
+            n = filled // frame_bytes
+            if n:
+                with watchdog.paused():
+                    yield frames[:n]
+            if filled < len(buf):
+                break
+    finally:
+        watchdog.stop()
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+    if watchdog.expired:
+        raise TimeoutError(f"ffmpeg took longer than {timeout:.0f}s to decode {path}")
+    if returncode != 0:
         raise RuntimeError(f"ffmpeg decode failed for {path}")
 
-    audio_np = np.frombuffer(result.stdout, dtype=np.float32)
-    # Reshape to (channels, samples)
-    audio_np = audio_np.reshape(-1, channels).T
-    waveform = torch.from_numpy(audio_np.copy())
-    return waveform, target_sr
+
+class WavWriter:
+    """Writes a float32 WAV file incrementally; sizes are patched in on close.
+
+    The header reserves a JUNK chunk that becomes a ds64 chunk if the file
+    outgrows the 4 GiB RIFF limit, turning it into RF64 (EBU Tech 3306).
+    """
+
+    _RIFF = struct.Struct("<4sI4s")
+    _JUNK = struct.Struct("<4sI28s")  # same size as a ds64 chunk
+    _DS64 = struct.Struct("<4sIQQQI")
+    _FMT = struct.Struct("<4sIHHIIHHH")  # WAVE_FORMAT_IEEE_FLOAT, cbSize 0
+    _FACT = struct.Struct("<4sII")
+    _DATA = struct.Struct("<4sI")
+    _LIMIT = 0xFFFFFFFF
+
+    def __init__(self, path: str | Path, sample_rate: int, channels: int):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.n_samples = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "wb")
+        self._fh.write(self._header(0))
+
+    def __enter__(self) -> WavWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _header(self, n_samples: int) -> bytes:
+        block_align = 4 * self.channels
+        data_size = n_samples * block_align
+        riff_size = self._header_size() - 8 + data_size
+        rf64 = riff_size > self._LIMIT
+        if rf64:
+            head = self._RIFF.pack(b"RF64", self._LIMIT, b"WAVE")
+            ds64 = self._DS64.pack(b"ds64", 28, riff_size, data_size, n_samples, 0)
+        else:
+            head = self._RIFF.pack(b"RIFF", riff_size, b"WAVE")
+            ds64 = self._JUNK.pack(b"JUNK", 28, bytes(28))
+        fmt = self._FMT.pack(
+            b"fmt ", 18, 3, self.channels, self.sample_rate,
+            self.sample_rate * block_align, block_align, 32, 0,
+        )
+        fact = self._FACT.pack(b"fact", 4, self._LIMIT if rf64 else n_samples)
+        data = self._DATA.pack(b"data", self._LIMIT if rf64 else data_size)
+        return head + ds64 + fmt + fact + data
+
+    @classmethod
+    def _header_size(cls) -> int:
+        return (cls._RIFF.size + cls._JUNK.size + cls._FMT.size
+                + cls._FACT.size + cls._DATA.size)
+
+    def write(self, waveform: torch.Tensor) -> None:
+        """Append samples shaped (channels, samples)."""
+        block = np.ascontiguousarray(waveform.detach().cpu().numpy().T, dtype="<f4")
+        self._fh.write(block)
+        self.n_samples += block.shape[0]
+
+    def close(self) -> None:
+        if self._fh.closed:
+            return
+        self._fh.seek(0)
+        self._fh.write(self._header(self.n_samples))
+        self._fh.close()
 
 
 def save_audio(waveform: torch.Tensor, path: str | Path, sample_rate: int) -> None:
@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
 from ..models import CompressResult, DecompressResult, ParamSpec
 
+if TYPE_CHECKING:
+    import torch
+
 ProgressCallback = Callable[[str, int, int], None]
 
 
@@ -38,10 +42,49 @@ class BaseAudioCodec(ABC):
         progress_cb: ProgressCallback | None = None,
     ) -> CompressResult: ...
 
+    def compress_batch(
+        self,
+        jobs: list[tuple[Path, Path]],
+        params: dict,
+        started_cb: Callable[[int], None] | None = None,
+    ) -> Iterator[tuple[int, CompressResult | Exception]]:
+        """Compress ``(audio_path, output_path)`` jobs, yielding ``(index, result)``.
+
+        A failing job yields its exception instead of ending the batch, and
+        results may arrive out of job order. ``started_cb(index)`` is called
+        when work on a job begins. The default runs :meth:`compress` per
+        job; backends that can share inference across files override it.
+        """
+        for i, (audio_path, output_path) in enumerate(jobs):
+            if started_cb:
+                started_cb(i)
+            try:
+                yield i, self.compress(audio_path, output_path, params)
+            except Exception as exc:
+                yield i, exc
+
+    def output_paths(self, output_path: Path, params: dict) -> list[Path]:
+        """Every file that compressing to ``output_path`` with ``params`` writes."""
+        return [Path(str(output_path).removesuffix(self.file_suffix) + self.file_suffix)]
+
     @abstractmethod
     def decompress(
         self,
         compressed_path: Path,
         output_path: Path,
         progress_cb: ProgressCallback | None = None,
-    ) -> DecompressResult: ...
+        recover: bool = False,
+    ) -> DecompressResult:
+        """Decode to WAV; ``recover`` replaces damaged frames with silence instead of failing."""
+
+    def preload(self) -> None:
+        """Start loading model weights in the background ahead of first use."""
+
+    def decompress_range(
+        self,
+        compressed_path: Path,
+        start_s: float,
+        end_s: float,
+    ) -> tuple[torch.Tensor, int]:
+        """Decode only the excerpt [start_s, end_s) and return (waveform, sample_rate)."""
+        raise NotImplementedError(f"{self.name} does not support range decoding")
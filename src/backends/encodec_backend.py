@@ -2,27 +2,72 @@
 
 from __future__ import annotations
 
+import functools
+import inspect
+import io
 import logging
-import struct
+import math
 import time
+from collections import deque
+from contextlib import ExitStack
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import torch
-import torchaudio
 
 from .. import registry
-from ..audio_io import load_audio
+from ..audio_io import WavWriter, get_audio_info, iter_audio_blocks, load_audio
+from ..compile_cache import BucketedTrace
+from ..ecdc import FRAME_LM, EcdcReader, EcdcWriter
+from ..metrics import snr_db, spectral_convergence
+from ..model_manager import get_manager
 from ..models import CompressResult, DecompressResult, ParamSpec, ParamType
+from ..result_cache import get_result_cache
+from ..transcode import tier_path
 from .base import BaseAudioCodec, ProgressCallback
 
 logger = logging.getLogger(__name__)
 
-# Binary format: ECDC<version:u8><model_sr:u32><bandwidth:f32><n_frames:u16>
-# Per frame: <has_scale:u8>[<scale:f32>]<n_codebooks:u16><n_steps:u32><codes: int16[]>
-_MAGIC = b"ECDC"
-_VERSION = 1
-_HEADER = struct.Struct("<4sBIfH")  # magic, version, model_sr, bandwidth, n_frames
+# Extra code steps (in seconds) decoded around an excerpt when a frame has to
+# be cut, e.g. the single long frame of an unsegmented 24 kHz file.
+_RANGE_CONTEXT_S = 1.0
+
+# LM-coded frames are run through the language model in groups of up to this
+# many consecutive frames with equal length. Encoder and decoder must batch
+# identically so both see bit-identical probabilities.
+_LM_BATCH_FRAMES = 16
+
+# Chunked encoding reads the source in blocks of this length. Models that
+# normally encode the whole signal as one frame (24 kHz) are cut into
+# segments of _CHUNK_SEGMENT_S overlapping by _CHUNK_OVERLAP_HOPS code steps,
+# so frame starts stay on the code grid.
+_CHUNK_BLOCK_S = 10.0
+_CHUNK_SEGMENT_S = 10.0
+_CHUNK_OVERLAP_HOPS = 10
+
+# Batched compression loads files until about _BATCH_AUDIO_S seconds of audio
+# are pending, then encodes their segments together, up to _BATCH_SEGMENTS
+# segments of equal length and at most _BATCH_MAX_S seconds per forward
+# pass (a longer segment is encoded on its own).
+_BATCH_AUDIO_S = 600.0
+_BATCH_SEGMENTS = 16
+_BATCH_MAX_S = 60.0
+
+# The batch pipeline decodes and resamples up to _PREFETCH_FILES files ahead
+# on _PREFETCH_THREADS loader threads, and lets at most _WRITE_QUEUE encoded
+# files wait for the writer thread.
+_PREFETCH_THREADS = 2
+_PREFETCH_FILES = 8
+_WRITE_QUEUE = 32
+
+# Bandwidths (kbps) of the pretrained models, known without loading them.
+_TARGET_BANDWIDTHS = {24000: (1.5, 3.0, 6.0, 12.0, 24.0), 48000: (3.0, 6.0, 12.0, 24.0)}
+
+# Input lengths (seconds) the compiled decoder of an unsegmented model is
+# traced for; shorter inputs are padded up to the next one.
+_COMPILE_BUCKETS_S = (1, 2, 5, 10, 20, 30, 60)
 
 
 def _get_device() -> torch.device:
@@ -31,68 +76,184 @@ def _get_device() -> torch.device:
     return torch.device("cpu")
 
 
-def _save_ecdc(path: Path, model_sr: int, bandwidth: float, frames: list) -> None:
-    """Save encoded frames in compact binary format."""
-    parts = [_HEADER.pack(_MAGIC, _VERSION, model_sr, bandwidth, len(frames))]
+def _overlap_add(pieces: list[tuple[torch.Tensor, int, int]], frame_length: int) -> torch.Tensor:
+    """Linear overlap-add with the same triangular weights as EncodecModel.decode.
+
+    Each piece is ``(audio, start, frame_pos)``: decoded audio (B, C, T), its
+    absolute first sample and its position inside the frame it was cut from.
+    The result starts at the first piece's start sample.
+    """
+    if len(pieces) == 1:
+        return pieces[0][0]
+
+    ref = pieces[0][0]
+    first = pieces[0][1]
+    total = max(start + audio.shape[-1] for audio, start, _ in pieces) - first
+
+    t = torch.linspace(0, 1, frame_length + 2, device=ref.device, dtype=ref.dtype)[1:-1]
+    weight = 0.5 - (t - 0.5).abs()
+
+    out = torch.zeros(*ref.shape[:-1], total, device=ref.device, dtype=ref.dtype)
+    sum_weight = torch.zeros(total, device=ref.device, dtype=ref.dtype)
+    for audio, start, frame_pos in pieces:
+        n = audio.shape[-1]
+        w = weight[frame_pos:frame_pos + n]
+        pos = start - first
+        out[..., pos:pos + n] += w * audio
+        sum_weight[pos:pos + n] += w
+    return out / sum_weight
+
+
+class _OverlapAddStream:
+    """Incremental :func:`_overlap_add` for pieces arriving in start order.
+
+    Output before the start of the newest piece can no longer change; it is
+    normalized and passed to ``sink`` right away, so only about two frames
+    are ever buffered. The samples handed out equal those of
+    :func:`_overlap_add` over the same pieces.
+    """
+
+    def __init__(self, sink):
+        self._sink = sink
+        self._first = None  # held back: a lone piece is passed through unweighted
+        self._weight = None
+        self._acc = None
+        self._sum_weight = None
+        self._base = 0  # absolute sample index of self._acc[..., 0]
+
+    def add(self, audio: torch.Tensor, start: int, frame_pos: int = 0) -> None:
+        if self._first is None and self._acc is None:
+            self._first = (audio, start, frame_pos)
+            return
+        if self._first is not None:
+            first, self._first = self._first, None
+            t = torch.linspace(0, 1, first[0].shape[-1] + 2, device=audio.device, dtype=audio.dtype)
+            self._weight = 0.5 - (t[1:-1] - 0.5).abs()
+            self._acc = audio.new_zeros(*audio.shape[:-1], 0)
+            self._sum_weight = audio.new_zeros(0)
+            self._base = first[1]
+            self._accumulate(*first)
+        self._flush(start)
+        self._accumulate(audio, start, frame_pos)
+
+    def _accumulate(self, audio: torch.Tensor, start: int, frame_pos: int) -> None:
+        n = audio.shape[-1]
+        pos = start - self._base
+        grow = pos + n - self._acc.shape[-1]
+        if grow > 0:
+            self._acc = torch.cat([self._acc, self._acc.new_zeros(*self._acc.shape[:-1], grow)], -1)
+            self._sum_weight = torch.cat([self._sum_weight, self._sum_weight.new_zeros(grow)])
+        w = self._weight[frame_pos:frame_pos + n]
+        self._acc[..., pos:pos + n] += w * audio
+        self._sum_weight[pos:pos + n] += w
+
+    def _flush(self, upto: int) -> None:
+        k = min(upto - self._base, self._acc.shape[-1])
+        if k <= 0:
+            return
+        self._sink(self._acc[..., :k] / self._sum_weight[:k])
+        self._acc = self._acc[..., k:]
+        self._sum_weight = self._sum_weight[k:]
+        self._base += k
+
+    def close(self) -> None:
+        if self._first is not None:
+            self._sink(self._first[0])
+            self._first = None
+        elif self._acc is not None:
+            self._flush(self._base + self._acc.shape[-1])
+
+
+class _CompiledModel:
+    """An EncodecModel whose encoder and decoder run as bucketed traces."""
+
+    def __init__(self, model, encoder: BucketedTrace | torch.nn.Module, decoder: BucketedTrace):
+        self._model = model
+        self.encoder = encoder
+        self.decoder = decoder
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class _AtBandwidth:
+    """A shared encoder model seen at one job's target bandwidth.
+
+    Models are shared by every thread of the process, so jobs never call
+    ``set_target_bandwidth`` on them; ``_encode_frame`` reads the bandwidth
+    from this view instead.
+    """
+
+    def __init__(self, model, bandwidth: float):
+        self._model = model
+        self.bandwidth = bandwidth
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
 
-    for codes, scale in frames:
-        # codes shape: (batch, n_codebooks, n_steps) — drop batch dim
-        c = codes.squeeze(0).cpu().to(torch.int16).numpy()
-        n_codebooks, n_steps = c.shape
 
-        has_scale = scale is not None
-        parts.append(struct.pack("<B", int(has_scale)))
-        if has_scale:
-            parts.append(struct.pack("<f", scale.item()))
-        parts.append(struct.pack("<HI", n_codebooks, n_steps))
-        parts.append(c.tobytes())
+def _holding_models(method):
+    """Keep the backend's models from being evicted while ``method`` runs."""
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def gen_wrapper(self, *args, **kwargs):
+            with get_manager().hold(*self._model_keys):
+                yield from method(self, *args, **kwargs)
+        return gen_wrapper
 
-    path.write_bytes(b"".join(parts))
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with get_manager().hold(*self._model_keys):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
-def _load_ecdc(path: Path) -> tuple[int, float, list]:
-    """Load encoded frames from compact binary format or legacy torch.save."""
-    data = path.read_bytes()
+def _collect(futures: deque, keep: int) -> Iterator:
+    """Yield results of finished futures in order, blocking while more than ``keep`` remain."""
+    while futures and (len(futures) > keep or futures[0].done()):
+        yield futures.popleft().result()
 
-    # Legacy: torch.save/pickle format (starts with PK zip or \x80 pickle)
-    # Backwards compat for .ecdc files created before binary format switch.
-    # These are self-generated files, not from untrusted sources.
-    if data[:2] in (b"PK", b"\x80\x02"):
-        logger.info("Loading legacy torch.save format: %s", path.name)
-        save_data = torch.load(path, map_location="cpu", weights_only=False)
-        model_sr = save_data.get("model_sr", 48000)
-        bandwidth = save_data.get("bandwidth", 6.0)
-        return model_sr, bandwidth, save_data["frames"]
 
-    offset = 0
+def _check_frame(reader: EcdcReader, index: int) -> None:
+    if not reader.verify_frame(index):
+        raise ValueError(f"Frame {index} of {reader.path.name} is damaged")
 
-    magic, version, model_sr, bandwidth, n_frames = _HEADER.unpack_from(data, offset)
-    offset += _HEADER.size
-    if magic != _MAGIC:
-        raise ValueError(f"Not an ECDC file: {magic!r}")
-    if version != _VERSION:
-        raise ValueError(f"Unsupported ECDC version: {version}")
 
-    frames = []
-    for _ in range(n_frames):
-        has_scale = struct.unpack_from("<B", data, offset)[0]
-        offset += 1
+def _quantized_cdfs(pdf: torch.Tensor, total_range_bits: int) -> np.ndarray:
+    """Vectorized encodec build_stable_quantized_cdf over all leading dims.
 
-        scale = None
-        if has_scale:
-            scale = torch.tensor([[struct.unpack_from("<f", data, offset)[0]]])
-            offset += 4
+    ``pdf`` has the codebook entries in its last dimension; the result has
+    the same shape and holds int64 cumulative ranges.
+    """
+    roundoff = 1e-8
+    min_range = 2
+    pdf = (pdf / roundoff).floor() * roundoff
+    total_range = 2 ** total_range_bits
+    alpha = min_range * pdf.shape[-1] / total_range
+    ranges = (((1 - alpha) * total_range) * pdf).floor().long() + min_range
+    return torch.cumsum(ranges, dim=-1).cpu().numpy()
 
-        n_codebooks, n_steps = struct.unpack_from("<HI", data, offset)
-        offset += 6
 
-        nbytes = n_codebooks * n_steps * 2  # int16
-        codes_np = np.frombuffer(data, dtype=np.int16, count=n_codebooks * n_steps, offset=offset)
-        offset += nbytes
-        codes = torch.from_numpy(codes_np.reshape(1, n_codebooks, n_steps).copy()).long()
-        frames.append((codes, scale))
+def _lm_groups(frames: np.ndarray) -> np.ndarray:
+    """First frame index of the LM batch every frame belongs to.
 
-    return model_sr, bandwidth, frames
+    Consecutive LM-coded frames of equal length are grouped, at most
+    ``_LM_BATCH_FRAMES`` at a time; other frames map to themselves.
+    """
+    group_first = np.arange(len(frames))
+    first = -1
+    for i, row in enumerate(frames):
+        if not row["flags"] & FRAME_LM:
+            first = -1
+            continue
+        if (
+            first < 0
+            or i - first >= _LM_BATCH_FRAMES
+            or row["n_steps"] != frames[first]["n_steps"]
+        ):
+            first = i
+        group_first[i] = first
+    return group_first
 
 
 class EnCodecBackend(BaseAudioCodec):
@@ -100,7 +261,11 @@ class EnCodecBackend(BaseAudioCodec):
 
     def __init__(self, model_sr: int = 48000):
         self._model_sr = model_sr
-        self._model = None
+        self._model_key = ("encodec", model_sr)
+        self._lm_key = ("encodec-lm", model_sr)
+        self._int8_key = ("encodec-int8", model_sr)
+        self._compiled_key = ("encodec-compiled", model_sr)
+        self._model_keys = (self._model_key, self._lm_key, self._int8_key, self._compiled_key)
 
     @property
     def name(self) -> str:
@@ -129,83 +294,505 @@ class EnCodecBackend(BaseAudioCodec):
                 default=bw_default,
                 choices=bw_choices,
             ),
+            ParamSpec(
+                name="use_lm",
+                label="Language Model Compression",
+                type=ParamType.BOOL,
+                default=False,
+            ),
+            ParamSpec(
+                name="chunked",
+                label="Chunked Encoding (constant memory)",
+                type=ParamType.BOOL,
+                default=False,
+            ),
+            ParamSpec(
+                name="tiers",
+                label="Extra Bitrate Tiers (same pass)",
+                type=ParamType.CHOICE,
+                default="none",
+                choices=["none", "all"],
+            ),
+            ParamSpec(
+                name="entropy",
+                label="Entropy Coding (without LM)",
+                type=ParamType.CHOICE,
+                default="none",
+                choices=["none", "rans"],
+            ),
+            ParamSpec(
+                name="progressive",
+                label="Progressive Layout (bitrate layers)",
+                type=ParamType.BOOL,
+                default=False,
+            ),
+            ParamSpec(
+                name="int8",
+                label="Int8 Quantized Encoder (CPU)",
+                type=ParamType.BOOL,
+                default=False,
+            ),
+            ParamSpec(
+                name="compiled",
+                label="Compiled Encoder (TorchScript, cached)",
+                type=ParamType.BOOL,
+                default=False,
+            ),
+            ParamSpec(
+                name="result_cache",
+                label="Result Cache (reuse identical audio)",
+                type=ParamType.BOOL,
+                default=False,
+            ),
         ]
 
-    def _load_model(self) -> None:
-        if self._model is not None:
-            return
+    @property
+    def _model(self):
+        """The EnCodec model, shared through the model manager and loaded on demand."""
+        return get_manager().get(self._model_key, self._build_model)
+
+    @property
+    def _lm(self):
+        return get_manager().get(self._lm_key, self._build_lm)
+
+    def _build_model(self):
         from encodec import EncodecModel
 
         if self._model_sr == 48000:
-            self._model = EncodecModel.encodec_model_48khz()
+            model = EncodecModel.encodec_model_48khz()
         else:
-            self._model = EncodecModel.encodec_model_24khz()
-        self._model.to(_get_device())
-        self._model.eval()
+            model = EncodecModel.encodec_model_24khz()
+        model.to(_get_device())
+        model.eval()
+        return model
 
-    def compress(
-        self,
-        audio_path: Path,
-        output_path: Path,
-        params: dict,
-        progress_cb: ProgressCallback | None = None,
-    ) -> CompressResult:
-        if progress_cb:
-            progress_cb("Lade Modell...", 0, 100)
+    def _build_lm(self):
+        return self._model.get_lm_model()
+
+    def _build_int8_model(self):
+        """Separate CPU model whose encoder LSTM runs with int8 weights.
+
+        Dynamic quantization covers LSTM and Linear layers only; the
+        convolutions and the quantizer stay float32. Decoding always uses
+        the float model, so int8 only changes which codes are chosen.
+        """
+        from encodec import EncodecModel
+
+        if self._model_sr == 48000:
+            model = EncodecModel.encodec_model_48khz()
+        else:
+            model = EncodecModel.encodec_model_24khz()
+        model.eval()
+        model.encoder = torch.ao.quantization.quantize_dynamic(
+            model.encoder, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8,
+            inplace=True,  # weight-normed convs cannot be deep-copied
+        )
+        return model
+
+    def _build_compiled_model(self) -> _CompiledModel:
+        """Float model with encoder and decoder traced per shape bucket.
+
+        Segmented models only ever see their fixed segment length; ragged
+        last segments run eagerly. Unsegmented models run the encoder
+        eagerly, since padding would change its codes, and pad the decoder
+        input, which a causal decoder never looks ahead into, to
+        ``_COMPILE_BUCKETS_S``.
+        """
+        model = self._model
+        hop = self._model_sr // model.frame_rate
+        name = f"encodec{self._model_sr // 1000}k"
+        if model.segment_length is not None:
+            encoder = BucketedTrace(
+                model.encoder, f"{name}-encoder", [model.segment_length],
+                lambda n: -(-n // hop), pad=False,
+            )
+            steps, pad = [-(-model.segment_length // hop)], False
+        else:
+            encoder = model.encoder
+            steps = [int(s * self._model_sr) // hop for s in _COMPILE_BUCKETS_S]
+            pad = model.decoder.model[0].causal
+        decoder = BucketedTrace(model.decoder, f"{name}-decoder", steps, lambda n: n * hop, pad)
+        return _CompiledModel(model, encoder, decoder)
 
+    def _compiled_model(self) -> _CompiledModel:
+        return get_manager().get(self._compiled_key, self._build_compiled_model)
+
+    def _tier_bandwidths(self, params: dict) -> list[float]:
+        """Bandwidth of the main output first, then those of the extra tiers.
+
+        ``params["tiers"]`` is "none", "all" (every bandwidth the model
+        offers), a comma-separated string or a list of bandwidths.
+        """
+        main = float(params.get("bandwidth", 6.0))
+        tiers = params.get("tiers", "none")
+        if tiers in (None, "", "none"):
+            extra = []
+        elif tiers == "all":
+            extra = list(_TARGET_BANDWIDTHS[self._model_sr])
+        elif isinstance(tiers, str):
+            extra = [float(bw) for bw in tiers.split(",") if bw.strip()]
+        else:
+            extra = [float(bw) for bw in tiers]
+        bandwidths = [main] + sorted(set(extra) - {main})
+        for bw in bandwidths:
+            if bw not in _TARGET_BANDWIDTHS[self._model_sr]:
+                raise ValueError(f"{self.name} does not support {bw:g} kbps")
+        return bandwidths
+
+    def _tier_plan(self, out: Path, params: dict) -> list[tuple[float, Path]]:
+        """``(bandwidth, path)`` of every file a job writes, the main output first.
+
+        Extra tiers go next to the main output as ``<stem>_<bw>kbps.ecdc``.
+        """
+        bandwidths = self._tier_bandwidths(params)
+        plan = [(bandwidths[0], out)]
+        for bw in bandwidths[1:]:
+            plan.append((bw, tier_path(out, bw)))
+        return plan
+
+    def _open_writers(
+        self, stack: ExitStack, plan: list, params: dict, expected_frames: int
+    ) -> list[tuple[EcdcWriter, int]]:
+        """One writer per planned tier, with the number of codebooks it keeps."""
+        use_lm = bool(params.get("use_lm", False))
+        # The LM already entropy-codes its frames; rANS only applies without it.
+        entropy = "none" if use_lm else str(params.get("entropy", "none"))
+        progressive = bool(params.get("progressive", False))
+        writers = []
+        for bw, path in plan:
+            writer = EcdcWriter(
+                path, self._model_sr, bw, self._model.bits_per_codebook,
+                entropy=entropy, expected_frames=expected_frames,
+                layers=self._layer_split(bw) if progressive else None,
+            )
+            stack.enter_context(writer)
+            n_codebooks = self._model.quantizer.get_num_quantizers_for_bandwidth(
+                self._model.frame_rate, bw
+            )
+            writers.append((writer, n_codebooks))
+        return writers
+
+    def _layer_split(self, bandwidth: float) -> list[int]:
+        """Codebooks per layer of a progressive file: one layer per model bandwidth.
+
+        Reading the first k layers yields the codes of the k-th lowest
+        bandwidth the model offers.
+        """
+        model = self._model
+        counts = [
+            model.quantizer.get_num_quantizers_for_bandwidth(model.frame_rate, bw)
+            for bw in sorted(model.target_bandwidths)
+            if bw <= bandwidth
+        ]
+        return [hi - lo for lo, hi in zip([0] + counts, counts)]
+
+    def _encoder_model(self, params: dict):
+        """Model used to encode a job, viewed at the job's target bandwidth.
+
+        With extra tiers the model encodes at the highest of them; every
+        lower tier is a prefix of those codebooks (nested residual VQ).
+        """
+        if params.get("progressive", False) and params.get("use_lm", False):
+            raise ValueError("Progressive layout cannot be combined with LM compression")
+        if params.get("int8", False) and params.get("compiled", False):
+            # The traces are of the float model; there is no compiled int8 encoder.
+            raise ValueError("Int8 encoder cannot be combined with the compiled encoder")
+        if params.get("int8", False):
+            model = get_manager().get(self._int8_key, self._build_int8_model)
+        elif params.get("compiled", False):
+            model = self._compiled_model()
+        else:
+            model = self._model
+        return _AtBandwidth(model, max(self._tier_bandwidths(params)))
+
+    def _prepare_encoder(self, params: dict):
+        """Load every model a job with ``params`` needs; returns the encoder model."""
         self._load_model()
-        device = _get_device()
-        bandwidth = float(params.get("bandwidth", 6.0))
-        self._model.set_target_bandwidth(bandwidth)
+        model = self._encoder_model(params)
+        if params.get("use_lm", False):
+            self._load_lm()
+        return model
 
-        if progress_cb:
-            progress_cb("Lade Audio...", 10, 100)
+    def _load_model(self) -> None:
+        get_manager().get(self._model_key, self._build_model)
 
-        waveform, sr = load_audio(audio_path)
-        original_size = audio_path.stat().st_size
-        duration = waveform.shape[1] / sr
+    def _load_lm(self) -> None:
+        get_manager().get(self._lm_key, self._build_lm)
 
-        if sr != self._model_sr:
-            if progress_cb:
-                progress_cb(f"Resample {sr} -> {self._model_sr} Hz...", 20, 100)
-            waveform = torchaudio.functional.resample(waveform, sr, self._model_sr)
+    def preload(self) -> None:
+        get_manager().preload(self._model_key, self._build_model)
 
-        # Ensure correct channel count
-        if self._model_sr == 48000:
-            if waveform.shape[0] == 1:
-                waveform = waveform.repeat(2, 1)
-            elif waveform.shape[0] > 2:
-                waveform = waveform[:2]
+    def _frame_starts(self, n_frames: int) -> list[int]:
+        """First sample (at model rate) of each frame produced by model.encode."""
+        stride = self._model.segment_stride
+        if stride is None:
+            return [0] * n_frames
+        return [i * stride for i in range(n_frames)]
+
+    def _encode_frame(
+        self, x: torch.Tensor, model=None
+    ) -> tuple[torch.Tensor, torch.Tensor | None]:
+        """Encode one segment (B, C, T) like EncodecModel._encode_frame.
+
+        ``model`` defaults to the shared float model; the input is moved to
+        the device of whichever model is used.
+        """
+        if model is None:
+            model = self._model
+        x = x.to(next(model.quantizer.buffers()).device)
+        if model.normalize:
+            mono = x.mean(dim=1, keepdim=True)
+            volume = mono.pow(2).mean(dim=2, keepdim=True).sqrt()
+            scale = 1e-8 + volume
+            x = x / scale
+            scale = scale.view(-1, 1)
         else:
-            if waveform.shape[0] > 1:
-                waveform = waveform.mean(dim=0, keepdim=True)
+            scale = None
+        emb = model.encoder(x)
+        codes = model.quantizer.encode(emb, model.frame_rate, model.bandwidth)
+        return codes.transpose(0, 1), scale
 
-        audio = waveform.unsqueeze(0).to(device)
+    def _decode_frame(
+        self, codes: torch.Tensor, scale: torch.Tensor | None, model=None
+    ) -> torch.Tensor:
+        """Decode one frame like EncodecModel._decode_frame.
 
-        if progress_cb:
-            progress_cb("Komprimiere...", 30, 100)
+        Codes may arrive in any integer dtype; they are widened to int64 only
+        here, one frame at a time. ``model`` defaults to the shared float model.
+        """
+        if model is None:
+            model = self._model
+        emb = model.quantizer.decode(codes.long().transpose(0, 1))
+        out = model.decoder(emb)
+        if scale is not None:
+            out = out * scale.view(-1, 1, 1)
+        return out
 
-        t0 = time.perf_counter()
+    def _lm_encode(self, codes: torch.Tensor) -> list[bytes]:
+        """Arithmetic-code a batch of equal-length frames (B, K, T) with the LM.
+
+        The LM runs once per time step for all frames and codebooks of the
+        batch, and CDFs are built for the whole batch in one vectorized call,
+        mirroring :meth:`_lm_decode` step for step.
+        """
+        from encodec.quantization.ac import ArithmeticCoder
+
+        n_frames, n_codebooks, n_steps = codes.shape
+        buffers = [io.BytesIO() for _ in range(n_frames)]
+        coders = [ArithmeticCoder(buf) for buf in buffers]
+        range_bits = coders[0].total_range_bits
+        values = codes.cpu().numpy()
+
+        states = None
+        offset = 0
+        input_ = torch.zeros(n_frames, n_codebooks, 1, dtype=torch.long, device=codes.device)
+        for t in range(n_steps):
+            with torch.no_grad():
+                probas, states, offset = self._lm(input_, states, offset)
+            input_ = 1 + codes[:, :, t:t + 1]
+            cdfs = _quantized_cdfs(probas[..., 0].transpose(1, 2), range_bits)
+            for b, coder in enumerate(coders):
+                for k in range(n_codebooks):
+                    coder.push(int(values[b, k, t]), cdfs[b, k])
+
+        for coder in coders:
+            coder.flush()
+        return [buf.getvalue() for buf in buffers]
+
+    def _lm_decode(self, payloads: list, n_codebooks: int, n_steps: int) -> torch.Tensor:
+        """Inverse of :meth:`_lm_encode` — returns codes shaped (B, K, T)."""
+        from encodec.quantization.ac import ArithmeticDecoder
+
+        device = _get_device()
+        decoders = [ArithmeticDecoder(io.BytesIO(bytes(p))) for p in payloads]
+        range_bits = decoders[0].total_range_bits
+        codes = np.zeros((len(payloads), n_codebooks, n_steps), dtype=np.int64)
+
+        states = None
+        offset = 0
+        input_ = torch.zeros(len(payloads), n_codebooks, 1, dtype=torch.long, device=device)
+        for t in range(n_steps):
+            with torch.no_grad():
+                probas, states, offset = self._lm(input_, states, offset)
+            cdfs = _quantized_cdfs(probas[..., 0].transpose(1, 2), range_bits)
+            for b, decoder in enumerate(decoders):
+                for k in range(n_codebooks):
+                    value = decoder.pull(cdfs[b, k])
+                    if value is None:
+                        raise ValueError("LM-coded frame ended prematurely")
+                    codes[b, k, t] = value
+            input_ = 1 + torch.from_numpy(codes[:, :, t:t + 1]).to(device)
+
+        return torch.from_numpy(codes)
+
+    def _write_lm_group(self, writer: EcdcWriter, pending: list) -> None:
+        """LM-code a group of ``(codes, scale, start)`` frames and write them."""
+        codes = torch.cat([c for c, _, _ in pending], dim=0)
+        _, n_codebooks, n_steps = codes.shape
+        for (_, scale, start), payload in zip(pending, self._lm_encode(codes)):
+            writer.write_encoded_frame(payload, FRAME_LM, n_codebooks, n_steps, scale, start)
+
+    def _iter_frames(self, reader: EcdcReader, indices):
+        """Yield ``(index, codes, scale)`` for increasing frame indices.
+
+        Plain frames come straight from the reader; LM-coded frames are
+        decoded a whole group at a time, exactly as they were encoded. Each
+        frame's checksum is verified just before it is used, so a damaged
+        frame raises when it is reached, not before the first sample.
+        """
+        groups = None
+        cached_first, cached_codes = -1, None
+        for i in indices:
+            if not reader.frames["flags"][i] & FRAME_LM:
+                _check_frame(reader, i)
+                codes, scale = reader.read_frame(i)
+                yield i, codes, scale
+                continue
+
+            if groups is None:
+                self._load_lm()
+                groups = _lm_groups(reader.frames)
+            first = int(groups[i])
+            if first != cached_first:
+                stop = first + 1
+                while stop < reader.n_frames and groups[stop] == first:
+                    stop += 1
+                for j in range(first, stop):
+                    _check_frame(reader, j)
+                payloads = [reader.read_payload(j) for j in range(first, stop)]
+                row = reader.frames[first]
+                cached_codes = self._lm_decode(
+                    payloads, int(row["n_codebooks"]), int(row["n_steps"])
+                )
+                cached_first = first
+            yield i, cached_codes[i - first:i - first + 1], reader.read_scale(i)
+
+    @property
+    def _model_channels(self) -> int:
+        """Stereo for the 48 kHz model, mono for the 24 kHz model."""
+        return 2 if self._model_sr == 48000 else 1
+
+    def _chunk_segmentation(self) -> tuple[int, int]:
+        """Segment length and stride (samples at model rate) for chunked encoding."""
+        if self._model.segment_length is not None:
+            return self._model.segment_length, self._model.segment_stride
+        hop = self._model_sr // self._model.frame_rate
+        length = int(_CHUNK_SEGMENT_S * self._model_sr) // hop * hop
+        return length, length - _CHUNK_OVERLAP_HOPS * hop
+
+    def _iter_chunked_segments(
+        self, audio_path: Path, segment_length: int, stride: int, stats: dict
+    ):
+        """Yield ``(offset, segment)`` like slicing the full signal, block by block.
 
-        with torch.no_grad():
-            encoded_frames = self._model.encode(audio)
+        Only the current block plus the not yet consumed tail of the previous
+        one are kept. ``stats["samples"]`` holds the total length at the end.
+        """
+        device = _get_device()
+        block_samples = int(_CHUNK_BLOCK_S * self._model_sr)
+        buf = None
+        buf_start = 0  # absolute sample index of buf[:, 0]
+        offset = 0
+        for block in iter_audio_blocks(
+            audio_path, block_samples, self._model_sr, self._model_channels
+        ):
+            buf = block if buf is None else torch.cat([buf, block], dim=1)
+            while buf_start + buf.shape[1] >= offset + segment_length:
+                pos = offset - buf_start
+                yield offset, buf[:, pos:pos + segment_length].unsqueeze(0).to(device)
+                offset += stride
+            drop = min(offset - buf_start, buf.shape[1])
+            buf = buf[:, drop:]
+            buf_start += drop
+
+        total = buf_start + (buf.shape[1] if buf is not None else 0)
+        while offset < total:
+            pos = offset - buf_start
+            yield offset, buf[:, pos:pos + segment_length].unsqueeze(0).to(device)
+            offset += stride
+        stats["samples"] = total
+
+    def _write_segments(
+        self,
+        writers: list[tuple[EcdcWriter, int]],
+        segments,
+        use_lm: bool,
+        n_expected: int,
+        progress_cb: ProgressCallback | None,
+        model=None,
+    ) -> None:
+        """Encode ``(offset, segment)`` pairs and stream the frames into ``writers``."""
+
+        def frames():
+            for i, (offset, segment) in enumerate(segments):
+                with torch.no_grad():
+                    codes, scale = self._encode_frame(segment, model)
+                yield codes, scale, offset
+                if progress_cb:
+                    progress_cb(
+                        "Komprimiere...", 30 + 60 * min(i + 1, n_expected) // n_expected, 100
+                    )
+
+        self._write_frames(writers, frames(), use_lm)
+
+    def _write_frames(
+        self, writers: list[tuple[EcdcWriter, int]], frames, use_lm: bool
+    ) -> None:
+        """Write ``(codes, scale, offset)`` frames, LM-coding them in groups if asked.
+
+        Each ``(writer, n_codebooks)`` gets the first n_codebooks codebooks
+        of every frame.
+        """
+        pending = [[] for _ in writers]  # per writer, frames waiting for a full LM batch
+        for codes, scale, offset in frames:
+            for (writer, n_codebooks), group in zip(writers, pending):
+                tier_codes = codes[:, :n_codebooks]
+                if not use_lm:
+                    writer.write_frame(tier_codes, scale, offset)
+                    continue
+                if group and (
+                    len(group) == _LM_BATCH_FRAMES
+                    or group[0][0].shape[-1] != codes.shape[-1]
+                ):
+                    self._write_lm_group(writer, group)
+                    group.clear()
+                group.append((tier_codes, scale, offset))
+        for (writer, _), group in zip(writers, pending):
+            if group:
+                self._write_lm_group(writer, group)
 
+    def _load_for_model(self, audio_path: Path, progress_cb: ProgressCallback | None = None):
+        """Whole file as (channels, samples) at model rate and channel count."""
         if progress_cb:
-            progress_cb("Speichere...", 80, 100)
+            progress_cb(f"Dekodiere auf {self._model_sr} Hz...", 20, 100)
+        waveform, _ = load_audio(audio_path, self._model_sr, self._model_channels)
+        return waveform
 
+    def output_paths(self, output_path: Path, params: dict) -> list[Path]:
+        """The main output and its extra bitrate tiers."""
+        out = Path(str(output_path).removesuffix(self.file_suffix) + self.file_suffix)
+        return [path for _, path in self._tier_plan(out, params)]
+
+    def _output_path(self, output_path: Path) -> Path:
         out = Path(str(output_path).removesuffix(self.file_suffix) + self.file_suffix)
         out.parent.mkdir(parents=True, exist_ok=True)
-        _save_ecdc(out, self._model_sr, bandwidth, encoded_frames)
+        return out
 
-        encode_time = time.perf_counter() - t0
+    def _result(
+        self,
+        audio_path: Path,
+        out: Path,
+        original_size: int,
+        duration: float,
+        encode_time: float,
+        params: dict,
+        tiers: list[tuple[float, Path]] = (),
+        cache_hit: bool | None = None,
+    ) -> CompressResult:
         compressed_size = out.stat().st_size
         ratio = original_size / compressed_size if compressed_size > 0 else 0.0
         compressed_bitrate = (compressed_size * 8 / duration / 1000) if duration > 0 else 0.0
         original_bitrate = (original_size * 8 / duration / 1000) if duration > 0 else 0.0
-
-        if progress_cb:
-            progress_cb("Fertig", 100, 100)
-
         return CompressResult(
             source_path=audio_path,
             compressed_path=out,
@@ -218,49 +805,412 @@ class EnCodecBackend(BaseAudioCodec):
             encode_time=encode_time,
             backend_name=self.name,
             params=params,
+            tiers=dict(tiers),
+            cache_hit=cache_hit,
         )
 
-    def decompress(
+    def _cache_lookup(
+        self, audio_path: Path, plan: list[tuple[float, Path]], params: dict
+    ) -> tuple[str | None, CompressResult | None]:
+        """Result cache key of a job and, on a hit, its finished result.
+
+        The key is None when ``params["result_cache"]`` is off. A hit has
+        already placed every planned output.
+        """
+        if not params.get("result_cache", False):
+            return None, None
+        cache = get_result_cache()
+        # Bandwidths as planned, so "6" and 6.0 (or tier spellings) share entries.
+        key_params = {k: v for k, v in params.items() if k not in ("result_cache", "tiers")}
+        key_params["bandwidth"] = [bw for bw, _ in plan]
+        t0 = time.perf_counter()
+        key = cache.key(audio_path, self.name, key_params)
+        duration = cache.fetch(key, plan)
+        if duration is None:
+            return key, None
+        return key, self._result(
+            audio_path, plan[0][1], audio_path.stat().st_size, duration,
+            time.perf_counter() - t0, params, plan[1:], cache_hit=True,
+        )
+
+    @_holding_models
+    def compress(
         self,
-        compressed_path: Path,
+        audio_path: Path,
         output_path: Path,
+        params: dict,
         progress_cb: ProgressCallback | None = None,
-    ) -> DecompressResult:
+    ) -> CompressResult:
+        out = self._output_path(output_path)
+        plan = self._tier_plan(out, params)
+        original_size = audio_path.stat().st_size
+
+        # A cache hit needs no model, so the lookup comes before any loading.
+        cache_key, hit = self._cache_lookup(audio_path, plan, params)
+        if hit is not None:
+            if progress_cb:
+                progress_cb("Fertig (aus Cache)", 100, 100)
+            return hit
+
         if progress_cb:
             progress_cb("Lade Modell...", 0, 100)
-
         self._load_model()
         device = _get_device()
+        model = self._encoder_model(params)
+        use_lm = bool(params.get("use_lm", False))
+        if use_lm:
+            if progress_cb:
+                progress_cb("Lade Sprachmodell...", 5, 100)
+            self._load_lm()
 
         if progress_cb:
-            progress_cb("Lade komprimierte Datei...", 20, 100)
+            progress_cb("Lade Audio...", 10, 100)
+
+        if params.get("chunked", False):
+            # Constant memory: blocks are read, resampled and encoded as they come.
+            segment_length, stride = self._chunk_segmentation()
+            try:
+                duration_hint = get_audio_info(audio_path).duration
+            except Exception:
+                duration_hint = 0.0
+            n_expected = max(1, math.ceil(duration_hint * self._model_sr / stride))
+            stats = {"samples": 0}
+            segments = self._iter_chunked_segments(audio_path, segment_length, stride, stats)
+        else:
+            audio = self._load_for_model(audio_path, progress_cb).unsqueeze(0).to(device)
 
-        _model_sr, _bandwidth, encoded_frames = _load_ecdc(compressed_path)
+            # Same segmentation as EncodecModel.encode, but every frame is
+            # written as soon as it is encoded instead of collecting the list.
+            length = audio.shape[-1]
+            segment_length = self._model.segment_length or length
+            stride = self._model.segment_stride or max(length, 1)
+            offsets = range(0, length, stride)
+            n_expected = max(1, len(offsets))
+            stats = {"samples": length}
+            segments = ((o, audio[:, :, o:o + segment_length]) for o in offsets)
 
         if progress_cb:
-            progress_cb("Dekomprimiere...", 40, 100)
+            progress_cb("Komprimiere...", 30, 100)
 
         t0 = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                writers = self._open_writers(stack, plan, params, n_expected)
+                self._write_segments(writers, segments, use_lm, n_expected, progress_cb, model)
+        except BaseException:
+            for _, path in plan:
+                path.unlink(missing_ok=True)
+            raise
 
-        encoded_frames = [
-            (codes.to(device), scale.to(device) if scale is not None else None)
-            for codes, scale in encoded_frames
-        ]
+        encode_time = time.perf_counter() - t0
+        duration = stats["samples"] / self._model_sr
+        if cache_key is not None:
+            get_result_cache().store(cache_key, plan, duration)
 
-        with torch.no_grad():
-            audio = self._model.decode(encoded_frames)
+        if progress_cb:
+            progress_cb("Fertig", 100, 100)
 
-        decode_time = time.perf_counter() - t0
+        return self._result(
+            audio_path, out, original_size, duration, encode_time, params, plan[1:],
+            cache_hit=None if cache_key is None else False,
+        )
+
+    @_holding_models
+    def compress_batch(
+        self,
+        jobs: list[tuple[Path, Path]],
+        params: dict,
+        started_cb: Callable[[int], None] | None = None,
+    ) -> Iterator[tuple[int, CompressResult | Exception]]:
+        """Compress many files, sharing encoder batches across file boundaries.
+
+        Files are loaded in groups of about ``_BATCH_AUDIO_S`` seconds; the
+        segments of a group are encoded together and the frames are written
+        back per file. The codes equal those of :meth:`compress`. Chunked
+        mode keeps its constant-memory guarantee and runs file by file.
+
+        The stages overlap: upcoming files are decoded and resampled on
+        loader threads while the encoder runs, and finished files are
+        serialized on a writer thread. Both queues are bounded. Result
+        cache hits are answered by the loader threads without decoding.
+        """
+        if params.get("chunked", False):
+            yield from super().compress_batch(jobs, params, started_cb)
+            return
+
+        model = None  # loaded on the first cache miss
+        budget = int(_BATCH_AUDIO_S * self._model_sr)
+        loader = ThreadPoolExecutor(_PREFETCH_THREADS, thread_name_prefix="ecdc-load")
+        writer = ThreadPoolExecutor(1, thread_name_prefix="ecdc-write")
+        loads, writes = deque(), deque()
+        next_load = 0
+        group, group_samples = [], 0
+        try:
+            for i in range(len(jobs)):
+                while next_load < len(jobs) and len(loads) < _PREFETCH_FILES:
+                    loads.append(loader.submit(self._prefetch, jobs[next_load], params))
+                    next_load += 1
+                future = loads.popleft()
+                if started_cb:
+                    started_cb(i)
+                try:
+                    loaded = future.result()
+                except Exception as exc:
+                    yield i, exc
+                    continue
+                if isinstance(loaded, CompressResult):
+                    yield i, loaded
+                    continue
+                audio, cache_key = loaded
+                if model is None:
+                    try:
+                        model = self._prepare_encoder(params)
+                    except Exception as exc:
+                        yield i, exc
+                        continue
+                group.append((i, audio, cache_key))
+                group_samples += audio.shape[-1]
+                if group_samples >= budget:
+                    yield from self._encode_group(group, jobs, params, writer, writes, model)
+                    group, group_samples = [], 0
+                yield from _collect(writes, _WRITE_QUEUE)
+            if group:
+                yield from self._encode_group(group, jobs, params, writer, writes, model)
+            yield from _collect(writes, 0)
+        finally:
+            loader.shutdown(wait=True, cancel_futures=True)
+            writer.shutdown(wait=True)
+
+    def _prefetch(
+        self, job: tuple, params: dict
+    ) -> CompressResult | tuple[torch.Tensor, str | None]:
+        """Cached result of a batch job, or its audio and result cache key."""
+        audio_path = Path(job[0])
+        cache_key, hit = self._cache_lookup(
+            audio_path, self._tier_plan(self._output_path(job[1]), params), params
+        )
+        if hit is not None:
+            return hit
+        return self._load_for_model(audio_path), cache_key
+
+    def _segment_batches(self, segments: list) -> Iterator[list]:
+        """Split length-sorted ``(length, ...)`` segments into encoder batches.
 
-        waveform = audio.squeeze(0).cpu()
-        duration = waveform.shape[1] / self._model_sr
+        Only segments of equal length share a batch: zero-padding changes
+        the codes of every EnCodec model, the causal one included, since its
+        strided convolutions reflect-pad the end of their input.
+        """
+        max_samples = int(_BATCH_MAX_S * self._model_sr)
+        batch = []
+        for seg in segments:
+            length = batch[0][0] if batch else 0
+            if batch and (
+                len(batch) == _BATCH_SEGMENTS
+                or (len(batch) + 1) * length > max_samples
+                or seg[0] != length
+            ):
+                yield batch
+                batch = []
+            batch.append(seg)
+        if batch:
+            yield batch
 
+    def _encode_group(
+        self,
+        group: list,
+        jobs: list,
+        params: dict,
+        writer: ThreadPoolExecutor,
+        writes: deque,
+        model=None,
+    ) -> Iterator[tuple[int, Exception]]:
+        """Encode the loaded files in ``group`` in shared batches, queue their writes.
+
+        If encoding fails, yields the error once for every file of the group.
+        """
+        try:
+            self._encode_group_frames(group, jobs, params, writer, writes, model)
+        except Exception as exc:
+            logger.warning("Encoding a group of %d files failed: %s", len(group), exc)
+            for i, _, _ in group:
+                yield i, exc
+
+    def _encode_group_frames(
+        self,
+        group: list,
+        jobs: list,
+        params: dict,
+        writer: ThreadPoolExecutor,
+        writes: deque,
+        model=None,
+    ) -> None:
+        device = _get_device()
+        segments = []  # (length, slot, offset, segment)
+        for slot, (_, audio, _) in enumerate(group):
+            length = audio.shape[-1]
+            segment_length = self._model.segment_length or length
+            stride = self._model.segment_stride or max(length, 1)
+            for o in range(0, length, stride):
+                segment = audio[:, o:o + segment_length]
+                segments.append((segment.shape[-1], slot, o, segment))
+        segments.sort(key=lambda s: s[0], reverse=True)
+
+        frames = [[] for _ in group]
+        t0 = time.perf_counter()
+        for batch in self._segment_batches(segments):
+            x = torch.stack([seg for _, _, _, seg in batch])
+            with torch.no_grad():
+                codes, scale = self._encode_frame(x.to(device), model)
+            for b, (_, slot, offset, _) in enumerate(batch):
+                frames[slot].append((
+                    codes[b:b + 1],
+                    None if scale is None else scale[b:b + 1],
+                    offset,
+                ))
+        batch_time = time.perf_counter() - t0
+        total_samples = sum(audio.shape[-1] for _, audio, _ in group) or 1
+
+        for slot, (i, audio, cache_key) in enumerate(group):
+            n_samples = audio.shape[-1]
+            writes.append(writer.submit(
+                self._write_file, i, jobs[i], sorted(frames[slot], key=lambda f: f[2]),
+                n_samples, batch_time * n_samples / total_samples, params, cache_key,
+            ))
+
+    def _write_file(
+        self,
+        i: int,
+        job: tuple,
+        frames: list,
+        n_samples: int,
+        encode_time: float,
+        params: dict,
+        cache_key: str | None = None,
+    ) -> tuple[int, CompressResult | Exception]:
+        """Serialize the encoded frames of one batch job (runs on the writer thread)."""
+        audio_path = Path(job[0])
+        out = self._output_path(job[1])
+        plan = self._tier_plan(out, params)
+        t0 = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                writers = self._open_writers(stack, plan, params, len(frames))
+                self._write_frames(writers, frames, bool(params.get("use_lm", False)))
+            encode_time += time.perf_counter() - t0
+            duration = n_samples / self._model_sr
+            if cache_key is not None:
+                get_result_cache().store(cache_key, plan, duration)
+            return i, self._result(
+                audio_path, out, audio_path.stat().st_size, duration, encode_time, params,
+                plan[1:], cache_hit=None if cache_key is None else False,
+            )
+        except Exception as exc:
+            for _, path in plan:
+                path.unlink(missing_ok=True)
+            return i, exc
+
+    @_holding_models
+    def benchmark_int8(self, audio_path: Path, bandwidth: float = 6.0) -> dict:
+        """Compare float32 and int8 encoding of one file.
+
+        Both code streams are decoded with the float model and scored against
+        the source with :func:`~src.metrics.snr_db` and
+        :func:`~src.metrics.spectral_convergence`. Returns the encode time,
+        SNR and spectral convergence per mode, the speed-up and the share of
+        identical codes.
+        """
+        device = _get_device()
+        audio = self._load_for_model(Path(audio_path)).unsqueeze(0)
+        length = audio.shape[-1]
+        segment_length = self._model.segment_length or length
+        stride = self._model.segment_stride or max(length, 1)
+
+        report, all_codes = {}, {}
+        for mode in ("float", "int8"):
+            model = self._encoder_model({"bandwidth": bandwidth, "int8": mode == "int8"})
+            frames = []
+            t0 = time.perf_counter()
+            with torch.no_grad():
+                for o in range(0, length, stride):
+                    codes, scale = self._encode_frame(audio[..., o:o + segment_length], model)
+                    frames.append((o, codes, scale))
+            report[f"{mode}_encode_s"] = time.perf_counter() - t0
+
+            with torch.no_grad():
+                pieces = [
+                    (self._decode_frame(
+                        codes.to(device), scale.to(device) if scale is not None else None
+                    ), o, 0)
+                    for o, codes, scale in frames
+                ]
+            decoded = _overlap_add(pieces, segment_length)[0, :, :length].cpu()
+            report[f"{mode}_snr_db"] = snr_db(audio[0], decoded)
+            report[f"{mode}_spectral_convergence"] = spectral_convergence(audio[0], decoded)
+            all_codes[mode] = torch.cat([c.flatten().cpu() for _, c, _ in frames])
+
+        report["speedup"] = report["float_encode_s"] / max(report["int8_encode_s"], 1e-9)
+        report["code_agreement"] = (all_codes["float"] == all_codes["int8"]).float().mean().item()
+        return report
+
+    @_holding_models
+    def decompress(
+        self,
+        compressed_path: Path,
+        output_path: Path,
+        progress_cb: ProgressCallback | None = None,
+        recover: bool = False,
+        compiled: bool = False,
+        layers: int | None = None,
+    ) -> DecompressResult:
+        """Decode to WAV; ``compiled`` runs the decoder as cached TorchScript traces.
+
+        ``layers`` decodes a progressive file from its first layers only, at
+        reduced bandwidth.
+        """
         if progress_cb:
-            progress_cb("Speichere WAV...", 80, 100)
+            progress_cb("Lade Modell...", 0, 100)
 
-        wav_out = Path(str(output_path).removesuffix(".wav") + ".wav")
-        wav_out.parent.mkdir(parents=True, exist_ok=True)
-        torchaudio.save(str(wav_out), waveform, self._model_sr)
+        self._load_model()
+        model = self._compiled_model() if compiled else None
+
+        if progress_cb:
+            progress_cb("Lade komprimierte Datei...", 20, 100)
+
+        with EcdcReader(compressed_path, strict=not recover, layers=layers) as reader:
+            if reader.n_frames == 0:
+                raise ValueError(f"{compressed_path.name} contains no frames")
+
+            if progress_cb:
+                progress_cb("Dekomprimiere...", 40, 100)
+
+            t0 = time.perf_counter()
+
+            starts = reader.starts
+            if starts is None:
+                starts = self._frame_starts(reader.n_frames)
+
+            # Frames are verified, decoded, overlap-added and written one at a
+            # time, so memory and time to first sample do not depend on the
+            # length.
+            wav_out = Path(str(output_path).removesuffix(".wav") + ".wav")
+            try:
+                with WavWriter(wav_out, self._model_sr, self._model.channels) as wav:
+                    stream = _OverlapAddStream(lambda audio: wav.write(audio.squeeze(0)))
+                    with torch.no_grad():
+                        for i, audio in self._iter_decoded(reader, recover, model):
+                            stream.add(audio, int(starts[i]))
+                            if progress_cb:
+                                progress_cb(
+                                    "Dekomprimiere...", 40 + 55 * (i + 1) // reader.n_frames, 100
+                                )
+                    stream.close()
+                    n_samples = wav.n_samples
+            except BaseException:
+                wav_out.unlink(missing_ok=True)
+                raise
+
+        decode_time = time.perf_counter() - t0
+        duration = n_samples / self._model_sr
 
         if progress_cb:
             progress_cb("Fertig", 100, 100)
@@ -272,6 +1222,132 @@ class EnCodecBackend(BaseAudioCodec):
             duration=duration,
         )
 
+    def _iter_decoded(self, reader: EcdcReader, recover: bool, model=None):
+        """Yield ``(index, audio)`` for every frame in order.
+
+        With ``recover``, damaged or undecodable frames come out as silence
+        instead of raising.
+        """
+        device = _get_device()
+        n_frames = reader.n_frames
+        damaged = set(np.flatnonzero(reader.frames["damaged"]).tolist())  # found while parsing
+        silence = None
+        if recover:
+            good = [i for i in range(n_frames) if i not in damaged]
+            if not good:
+                raise ValueError(f"{reader.path.name}: all frames are damaged")
+            hop = self._model_sr // self._model.frame_rate
+            silence_length = reader.frame_steps(good[0]) * hop
+            silence = torch.zeros(1, self._model.channels, silence_length, device=device)
+
+        skip = set(damaged)
+        next_index = 0
+        while next_index < n_frames:
+            remaining = [i for i in range(next_index, n_frames) if i not in skip]
+            try:
+                for i, codes, scale in self._iter_frames(reader, remaining):
+                    audio = self._decode_frame(
+                        codes.to(device), scale.to(device) if scale is not None else None, model
+                    )
+                    for j in range(next_index, i):
+                        yield j, silence
+                    yield i, audio
+                    next_index = i + 1
+            except Exception as exc:
+                if not recover:
+                    raise
+                # Frames come in order, so the failing one is the first not yet yielded.
+                failed = next(i for i in remaining if i >= next_index)
+                logger.warning("%s: frame %d undecodable (%s)", reader.path.name, failed, exc)
+                if reader.frames["flags"][failed] & FRAME_LM:
+                    # An LM group is decoded as a whole; drop all of it.
+                    groups = _lm_groups(reader.frames)
+                    skip.update(np.flatnonzero(groups == groups[failed]).tolist())
+                else:
+                    skip.add(failed)
+                continue
+            for j in range(next_index, n_frames):
+                yield j, silence
+            next_index = n_frames
+        if skip:
+            if len(skip) == n_frames:
+                raise ValueError(f"{reader.path.name}: all frames are damaged")
+            logger.warning(
+                "%s: %d of %d frames damaged, replaced with silence",
+                reader.path.name, len(skip), n_frames,
+            )
+
+    @_holding_models
+    def decompress_range(
+        self,
+        compressed_path: Path,
+        start_s: float,
+        end_s: float,
+        compiled: bool = False,
+        layers: int | None = None,
+    ) -> tuple[torch.Tensor, int]:
+        """Decode only the frames overlapping [start_s, end_s).
+
+        Segmented files are overlap-added exactly like a full decode, so the
+        excerpt matches the corresponding slice of :meth:`decompress`.
+        ``layers`` limits progressive files as in :meth:`decompress`.
+        """
+        if end_s <= start_s:
+            raise ValueError(f"Empty range: {start_s}s - {end_s}s")
+
+        self._load_model()
+        model = self._compiled_model() if compiled else None
+        device = _get_device()
+        hop = self._model_sr // self._model.frame_rate
+        context = int(_RANGE_CONTEXT_S * self._model.frame_rate)
+        # Rounded first, so float noise like 2.7 * 48000 = 129600.00000000001
+        # does not add a sample.
+        start = max(0, math.floor(round(start_s * self._model_sr, 6)))
+        end = math.ceil(round(end_s * self._model_sr, 6))
+
+        pieces = []
+        with EcdcReader(compressed_path, layers=layers) as reader:
+            if reader.model_sr != self._model_sr:
+                raise ValueError(
+                    f"{compressed_path.name} was encoded at {reader.model_sr} Hz, "
+                    f"not with {self.name}"
+                )
+            if reader.n_frames == 0:
+                return torch.zeros(self._model.channels, 0), self._model_sr
+
+            starts = reader.starts
+            if starts is None:
+                starts = np.asarray(self._frame_starts(reader.n_frames), dtype=np.int64)
+            frame_length = reader.frame_steps(0) * hop
+
+            # Frames are at most frame_length long, so only this slice can overlap.
+            lo = int(np.searchsorted(starts, start - frame_length, side="right"))
+            hi = int(np.searchsorted(starts, end, side="left"))
+            selected = [
+                i for i in range(lo, hi)
+                if starts[i] + reader.frame_steps(i) * hop > start
+            ]
+            for i, codes, scale in self._iter_frames(reader, selected):
+                frame_start = int(starts[i])
+                n_steps = codes.shape[-1]
+                t0 = max(0, (start - frame_start) // hop - context)
+                t1 = min(n_steps, -(-(end - frame_start) // hop) + context)
+                with torch.no_grad():
+                    audio = self._decode_frame(
+                        codes[..., t0:t1].to(device),
+                        scale.to(device) if scale is not None else None,
+                        model,
+                    )
+                pieces.append((audio, frame_start + t0 * hop, t0 * hop))
+
+        if not pieces:
+            return torch.zeros(self._model.channels, 0), self._model_sr
+
+        audio = _overlap_add(pieces, frame_length)
+        first = pieces[0][1]
+        waveform = audio[..., start - first:end - first].squeeze(0).cpu()
+        return waveform, self._model_sr
+
 
 # Auto-register both variants
 registry.register(EnCodecBackend(48000))
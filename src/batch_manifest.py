@@ -0,0 +1,161 @@
+"""Resumable batch runs through a manifest in the output directory.
+
+:class:`BatchManifest` records every finished input of a batch in
+``<output_dir>/.cgc_batch_manifest.sqlite3``: its size, mtime and content
+hash, the backend and parameters, and the result. A later run over the same
+output directory skips every input whose entry is still valid, so a
+cancelled or crashed run resumes where it stopped and a nightly run over a
+growing library only encodes new or changed files.
+
+An entry is valid while backend and parameters are unchanged, its outputs
+exist with their recorded sizes, and the input is unchanged. Size and mtime
+decide that without reading the file; a file whose mtime changed at the
+same size is hashed and still counts as unchanged if its content is.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from .models import CompressResult
+from .result_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".cgc_batch_manifest.sqlite3"
+
+# Finished inputs per write transaction, and the longest time one stays
+# unwritten; a crash repeats at most these.
+_COMMIT_EVERY = 100
+_COMMIT_S = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    params TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    result TEXT NOT NULL
+)
+"""
+
+
+class BatchManifest:
+    """Finished inputs of batch runs into one output directory, for one thread."""
+
+    def __init__(self, output_dir: Path, backend: str, params: dict):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self._params = json.dumps(
+            {"backend": backend, "params": params}, sort_keys=True, default=str
+        )
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def __enter__(self) -> BatchManifest:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+    def _relative(self, path: Path) -> str:
+        path = Path(path)
+        try:
+            return str(path.relative_to(self.output_dir))
+        except ValueError:
+            return str(path)
+
+    def up_to_date(self, paths: list[Path]) -> dict[int, CompressResult]:
+        """Recorded results of the ``paths`` that need no new run, by index."""
+        rows = {
+            row[0]: row[1:]
+            for row in self._db.execute(
+                "SELECT path, size, mtime_ns, digest, outputs, result FROM inputs "
+                "WHERE params = ?",
+                (self._params,),
+            )
+        }
+        done = {}
+        for i, path in enumerate(paths):
+            key = str(Path(path).absolute())
+            row = rows.get(key)
+            if row is None:
+                continue
+            size, mtime_ns, digest, outputs, result = row
+            try:
+                st = Path(path).stat()
+                if st.st_size != size or not self._outputs_intact(json.loads(outputs)):
+                    continue
+                if st.st_mtime_ns != mtime_ns:
+                    if file_digest(path) != digest:
+                        continue
+                    self._db.execute(
+                        "UPDATE inputs SET mtime_ns = ? WHERE path = ?", (st.st_mtime_ns, key)
+                    )
+            except OSError:
+                continue
+            done[i] = self._restore(Path(path), json.loads(result))
+        self._db.commit()
+        return done
+
+    def _outputs_intact(self, outputs: dict[str, int]) -> bool:
+        for name, size in outputs.items():
+            try:
+                if (self.output_dir / name).stat().st_size != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _restore(self, source: Path, fields: dict) -> CompressResult:
+        fields["compressed_path"] = self.output_dir / fields["compressed_path"]
+        fields["tiers"] = {float(bw): self.output_dir / p for bw, p in fields["tiers"].items()}
+        return CompressResult(source_path=source, resumed=True, **fields)
+
+    def record(self, result: CompressResult) -> None:
+        """Remember a finished input; reads the input once to hash it."""
+        source = Path(result.source_path)
+        try:
+            st = source.stat()
+            digest = file_digest(source)
+            outputs = {
+                self._relative(p): p.stat().st_size
+                for p in [result.compressed_path, *result.tiers.values()]
+            }
+        except OSError:
+            logger.warning("Cannot record %s in the batch manifest", source, exc_info=True)
+            return
+        fields = dataclasses.asdict(result)
+        for name in ("source_path", "resumed", "cache_hit"):
+            del fields[name]
+        fields["compressed_path"] = self._relative(result.compressed_path)
+        fields["tiers"] = {str(bw): self._relative(p) for bw, p in result.tiers.items()}
+        self._db.execute(
+            "INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(source.absolute()), st.st_size, st.st_mtime_ns, digest, self._params,
+                json.dumps(outputs), json.dumps(fields, default=str),
+            ),
+        )
+        self._uncommitted += 1
+        if (
+            self._uncommitted >= _COMMIT_EVERY
+            or time.monotonic() - self._last_commit >= _COMMIT_S
+        ):
+            self._db.commit()
+            self._uncommitted = 0
+            self._last_commit = time.monotonic()
@@ -0,0 +1,125 @@
+"""TorchScript traces of model stacks, cached on disk per input shape.
+
+A trace is only valid for the exact input shape it was recorded with, so
+inputs are padded up to a small set of bucket shapes and the output is cut
+back afterwards. Traces are saved under ``CACHE_DIR``, keyed by stack name,
+a hash of the module's weights (a trace embeds them), torch version, device
+and input shape, so later processes load them instead of tracing again. Set
+``CGC_COMPILE_CACHE`` to move the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(
+    os.environ.get("CGC_COMPILE_CACHE", Path.home() / ".cache" / "cgc_audio_compress" / "torchscript")
+)
+
+# Batch sizes are padded to one of these so batched encodes reuse few traces.
+_BATCH_BUCKETS = (1, 2, 4, 8, 16)
+
+
+def _bucket(n: int, buckets: Sequence[int]) -> int | None:
+    """Smallest bucket >= n, or None if n exceeds them all."""
+    return next((b for b in sorted(buckets) if b >= n), None)
+
+
+def weights_digest(module: torch.nn.Module) -> str:
+    """BLAKE2b-64 over the names, shapes and bytes of ``module``'s state."""
+    digest = hashlib.blake2b(digest_size=8)
+    for name, tensor in module.state_dict().items():
+        tensor = tensor.detach().cpu().contiguous()
+        digest.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+        digest.update(tensor.view(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+class BucketedTrace:
+    """Runs ``module`` as TorchScript traces over bucketed (B, C, T) inputs.
+
+    ``lengths`` are the bucket sizes of the last axis. With ``pad`` False an
+    input must match a bucket exactly; set it only when zero-padding the end
+    leaves the kept output unchanged. That holds for stacks that never look
+    ahead, such as a causal EnCodec decoder, but not for a causal encoder,
+    whose strided convolutions reflect-pad the end of their input.
+    ``out_length(n)`` is the output length belonging to an input of length
+    n. Inputs that fit no bucket run through the eager module.
+    """
+
+    def __init__(
+        self,
+        module: torch.nn.Module,
+        name: str,
+        lengths: Sequence[int],
+        out_length: Callable[[int], int],
+        pad: bool,
+    ):
+        self._module = module
+        self._name = name
+        self._lengths = sorted(set(lengths))
+        self._out_length = out_length
+        self._pad = pad
+        self._graphs: dict[tuple, torch.jit.ScriptModule] = {}
+        self._digest: str | None = None  # of the weights, computed on first use
+        self._lock = threading.Lock()
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        batch, n = x.shape[0], x.shape[-1]
+        # Batch rows never interact, so extra zero rows are always safe.
+        rows = _bucket(batch, _BATCH_BUCKETS)
+        if self._pad:
+            length = _bucket(n, self._lengths)
+        else:
+            length = n if n in self._lengths else None
+        if length is None or rows is None:
+            return self._module(x)
+
+        if length != n:
+            x = F.pad(x, (0, length - n))
+        if rows != batch:
+            x = torch.cat([x, x.new_zeros(rows - batch, *x.shape[1:])])
+        return self._graph(x)(x)[:batch, ..., :self._out_length(n)]
+
+    def _graph(self, x: torch.Tensor) -> torch.jit.ScriptModule:
+        key = (x.device.type, *x.shape)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                graph = self._graphs[key] = self._load_or_trace(x, key)
+        return graph
+
+    def _load_or_trace(self, x: torch.Tensor, key: tuple) -> torch.jit.ScriptModule:
+        if self._digest is None:
+            self._digest = weights_digest(self._module)
+        shape = "x".join(str(k) for k in key[1:])
+        path = CACHE_DIR / (
+            f"{self._name}-{self._digest}-torch{torch.__version__}-{key[0]}-{shape}.pt"
+        )
+        if path.exists():
+            try:
+                return torch.jit.load(str(path), map_location=x.device)
+            except Exception:
+                logger.warning("Discarding unreadable trace %s", path.name, exc_info=True)
+
+        logger.info("Tracing %s for input %s", self._name, shape)
+        with torch.no_grad():
+            graph = torch.jit.trace(self._module, x, check_trace=False)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            torch.jit.save(graph, str(tmp))
+            os.replace(tmp, path)  # concurrent processes never see half a file
+        except OSError:
+            logger.warning("Cannot cache trace in %s", CACHE_DIR, exc_info=True)
+        return graph
@@ -0,0 +1,905 @@
+"""ECDC container format — compact storage of EnCodec frames.
+
+Version 1 stores every RVQ code as int16. Version 2 bit-packs the codes at
+the codebook's real bit width (10 bits for EnCodec's 1024-entry codebooks)
+and may end with a seek index. Version 3 is written incrementally by
+:class:`EcdcWriter` and uses 64-bit frame counts and offsets.
+
+v3 layout (current):
+    ECDC<version:u8><model_sr:u32><bandwidth:f32><bits:u8><flags:u8>
+        <n_frames:u64><index_offset:u64>
+    Per frame: <flags:u8><scale:f32><n_codebooks:u16><n_steps:u32><payload_size:u32>
+               <payload>[<crc32:u32>]
+    The payload holds n_codebooks * n_steps codes, LSB-first bit-packed, or
+    with FRAME_LM an arithmetic-coded stream that only the backend's
+    language model can turn back into codes, or with FRAME_RANS a static
+    table rANS stream (see :mod:`src.rans`).
+    With HEADER_RANS_TABLES in the header flags, the per-codebook rANS
+    frequency tables follow the header directly, before the first frame.
+    rANS frames of files with HEADER_RANS_WIDE use ``rans.lanes_for(n)``
+    lanes for n codes, those of older files ``rans.LANES``.
+    With HEADER_LAYERS the file is progressive (see below) and the layer
+    table comes first: <n_layers:u8> n_layers * <n_codebooks:u16><end:u64>.
+    With FRAME_CRC the payload is followed by the CRC32 of frame header and
+    payload, so damaged frames can be detected without decoding them.
+    Index at index_offset: n_frames * <frame_offset:u64><start_sample:u64>
+
+n_frames and index_offset are patched in when the writer is closed; a file
+whose index_offset is still 0 was never finished and is read by walking
+the frame headers up to the end of the file.
+
+Progressive files split the codebooks of every frame into layers. The
+frames above carry only layer 0; each further layer follows the index as
+one section holding, per frame, <codes><crc32:u32> of its codebooks,
+bit-packed. Layer k ends at byte ``end``, so the first ``end`` bytes of the
+file are enough to decode layers 0..k at reduced bandwidth.
+
+v2 layout (read-only):
+    ECDC<version:u8><model_sr:u32><bandwidth:f32><n_frames:u16><bits:u8>
+    Per frame: <has_scale:u8>[<scale:f32>]<n_codebooks:u16><n_steps:u32><codes>
+    Optional index: n_frames * <frame_offset:u64><start_sample:u64>
+    Optional trailer: <index_offset:u64>ECDX
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import shutil
+import struct
+import tempfile
+import zlib
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from . import rans
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"ECDC"
+FORMAT_VERSION = 3  # version written by EcdcWriter
+_HEADER_V1 = struct.Struct("<4sBIfH")  # magic, version, model_sr, bandwidth, n_frames
+_HEADER_V2 = struct.Struct("<4sBIfHB")  # ... + bits per code
+_HEADER_V3 = struct.Struct("<4sBIfBBQQ")  # ..., bits, flags, n_frames, index_offset
+_HEADER_V3_PATCH = struct.Struct("<QQ")  # n_frames, index_offset
+_HEADER_V3_FLAGS_OFFSET = struct.calcsize("<4sBIfB")
+_FRAME_V1 = struct.Struct("<HI")  # n_codebooks, n_steps
+_FRAME_V3 = struct.Struct("<BfHII")  # flags, scale, n_codebooks, n_steps, payload_size
+_FRAME_V3_DTYPE = np.dtype([
+    ("flags", "u1"),
+    ("scale", "<f4"),
+    ("n_codebooks", "<u2"),
+    ("n_steps", "<u4"),
+    ("payload_size", "<u4"),
+])
+_INDEX_ENTRY = struct.Struct("<QQ")  # frame offset, start sample at model rate
+_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("start", "<u8")])
+_TRAILER = struct.Struct("<Q4s")  # v2 only: index offset, index magic
+_INDEX_MAGIC = b"ECDX"
+
+FRAME_HAS_SCALE = 0x01
+FRAME_LM = 0x02  # payload is arithmetic-coded with the EnCodec language model
+FRAME_RANS = 0x04  # payload is rANS-coded with the file's frequency tables
+FRAME_CRC = 0x08  # payload is followed by a CRC32 of frame header and payload
+_KNOWN_FRAME_FLAGS = FRAME_HAS_SCALE | FRAME_LM | FRAME_RANS | FRAME_CRC
+_CRC = struct.Struct("<I")
+
+HEADER_RANS_TABLES = 0x01  # rANS frequency tables follow the header
+HEADER_LAYERS = 0x02  # progressive file, the layer table follows the header
+HEADER_RANS_WIDE = 0x04  # rANS lane count grows with the frame length
+_KNOWN_HEADER_FLAGS = HEADER_RANS_TABLES | HEADER_LAYERS | HEADER_RANS_WIDE
+_LAYER_COUNT = struct.Struct("<B")
+_LAYER_ENTRY = struct.Struct("<HQ")  # n_codebooks, end offset of the layer
+
+# The writer derives rANS tables from the first frames of a file and codes
+# frames in batches of equal shape; the reader decodes them the same way.
+_RANS_TRAIN_FRAMES = 64
+_RANS_BATCH_FRAMES = 64
+
+DEFAULT_CODEBOOK_BITS = 10
+
+# One row per frame, as produced by EcdcReader's vectorized header parse.
+FRAME_TABLE_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("start", np.int64),
+    ("payload", np.int64),
+    ("payload_size", np.int64),
+    ("n_codebooks", np.int64),
+    ("n_steps", np.int64),
+    ("flags", np.uint8),
+    ("has_scale", np.bool_),
+    ("scale", np.float32),
+    ("damaged", np.bool_),  # structurally broken; only set by non-strict readers
+])
+
+
+def pack_codes(codes: np.ndarray, bits: int) -> bytes:
+    """Bit-pack non-negative integer codes, LSB first, ``bits`` bits each."""
+    values = np.ascontiguousarray(codes, dtype=np.uint32).reshape(-1)
+    shifts = np.arange(bits, dtype=np.uint32)
+    bit_matrix = ((values[:, None] >> shifts) & 1).astype(np.uint8)
+    return np.packbits(bit_matrix.reshape(-1), bitorder="little").tobytes()
+
+
+def unpack_codes(data, count: int, bits: int) -> np.ndarray:
+    """Inverse of :func:`pack_codes` — returns ``count`` codes as uint16.
+
+    ``data`` may be any buffer, including a slice of a memory-mapped file.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8, count=_packed_size(count, bits))
+    bit_matrix = np.unpackbits(raw, count=count * bits, bitorder="little")
+    bit_matrix = bit_matrix.reshape(count, bits).astype(np.uint16)
+    weights = np.left_shift(np.uint16(1), np.arange(bits, dtype=np.uint16))
+    return bit_matrix @ weights
+
+
+def _packed_size(count: int, bits: int) -> int:
+    return (count * bits + 7) // 8
+
+
+class EcdcWriter:
+    """Streams frames into a v3 ECDC file as the encoder produces them.
+
+    Frames go to disk immediately; the seek index is spooled to a temporary
+    file and appended on :meth:`close`, which also patches the frame count
+    and index offset into the header. Memory use does not depend on the
+    length of the recording.
+
+    With ``entropy="rans"`` the first ``_RANS_TRAIN_FRAMES`` frames are held
+    back to build per-codebook frequency tables. The tables are only stored
+    if the projected saving over ``expected_frames`` frames outweighs their
+    size; each frame is then kept bit-packed if rANS does not shrink it.
+
+    ``layers`` (codebooks per layer, e.g. ``(2, 2, 4)``) writes a
+    progressive file. Only layer 0 goes through rANS; the other layers are
+    spooled to temporary files and appended in order on :meth:`close`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        model_sr: int,
+        bandwidth: float,
+        bits: int = DEFAULT_CODEBOOK_BITS,
+        entropy: str = "none",
+        expected_frames: int = 0,
+        layers: Sequence[int] | None = None,
+    ):
+        if entropy not in ("none", "rans"):
+            raise ValueError(f"Unknown entropy coder: {entropy}")
+        layers = list(layers or [])
+        if len(layers) > 0xFF or any(n < 1 for n in layers):
+            raise ValueError(f"Invalid layer split: {layers}")
+        self.path = Path(path)
+        self.bits = bits
+        self.n_frames = 0
+        self.layers = layers if len(layers) > 1 else []
+        self.rans_tables: rans.RansTables | None = None
+        self._use_rans = entropy == "rans" and (1 << bits) <= (1 << rans.SCALE_BITS)
+        self._expected_frames = expected_frames
+        self._pending: list[tuple[np.ndarray, torch.Tensor | None, int]] = []
+        self._flags = HEADER_LAYERS if self.layers else 0
+        # A new inode, never truncating in place: the old file may be a hard
+        # link into the result cache.
+        self.path.unlink(missing_ok=True)
+        self._fh = open(self.path, "wb")
+        self._fh.write(
+            _HEADER_V3.pack(_MAGIC, FORMAT_VERSION, model_sr, bandwidth, bits, self._flags, 0, 0)
+        )
+        self._offset = _HEADER_V3.size
+        if self.layers:
+            # Layer ends stay 0 until close() appends the layers.
+            self._fh.write(_LAYER_COUNT.pack(len(self.layers)))
+            self._fh.write(b"".join(_LAYER_ENTRY.pack(n, 0) for n in self.layers))
+            self._offset += _LAYER_COUNT.size + len(self.layers) * _LAYER_ENTRY.size
+        self._layer_files = [
+            tempfile.SpooledTemporaryFile(max_size=1 << 20) for _ in self.layers[1:]
+        ]
+        self._index = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+
+    def __enter__(self) -> EcdcWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the header unpatched: readers treat the file as unfinished.
+            for spool in self._layer_files:
+                spool.close()
+            self._index.close()
+            self._fh.close()
+
+    def write_frame(self, codes: torch.Tensor, scale: torch.Tensor | None, start: int) -> None:
+        """Append one frame; ``start`` is its first sample at model rate."""
+        # codes shape: (batch, n_codebooks, n_steps) — drop batch dim
+        c = codes.squeeze(0).cpu().numpy()
+        if c.size and int(c.max()) >= 1 << self.bits:
+            raise ValueError(f"Code value {int(c.max())} does not fit into {self.bits} bits")
+        if self.layers:
+            c = self._spool_layers(c)
+        n_codebooks, n_steps = c.shape
+
+        if not self._use_rans:
+            self.write_encoded_frame(pack_codes(c, self.bits), 0, n_codebooks, n_steps, scale, start)
+            return
+
+        if self.rans_tables is None:
+            self._pending.append((c, scale, start))
+            if len(self._pending) >= _RANS_TRAIN_FRAMES:
+                self._flush_pending()
+            return
+
+        if self._pending and (
+            len(self._pending) >= _RANS_BATCH_FRAMES
+            or self._pending[0][0].shape != c.shape
+        ):
+            self._flush_pending()
+        self._pending.append((c, scale, start))
+
+    def _spool_layers(self, c: np.ndarray) -> np.ndarray:
+        """Spool the codebooks of layers 1.. and return those of layer 0."""
+        if c.shape[0] != sum(self.layers):
+            raise ValueError(
+                f"Frame has {c.shape[0]} codebooks, the layers hold {sum(self.layers)}"
+            )
+        bounds = np.cumsum(self.layers)
+        for spool, lo, hi in zip(self._layer_files, bounds[:-1], bounds[1:]):
+            packed = pack_codes(c[lo:hi], self.bits)
+            spool.write(packed)
+            spool.write(_CRC.pack(zlib.crc32(packed)))
+        return c[:self.layers[0]]
+
+    def _init_rans_tables(self) -> None:
+        """Build tables from the held-back frames and store them if worthwhile."""
+        n_codebooks = max(c.shape[0] for c, _, _ in self._pending)
+        n_symbols = 1 << self.bits
+        counts = np.zeros((n_codebooks, n_symbols), dtype=np.int64)
+        for c, _, _ in self._pending:
+            for k in range(c.shape[0]):
+                counts[k] += np.bincount(c[k], minlength=n_symbols)
+
+        tables = rans.RansTables.from_counts(counts)
+        block = tables.to_bytes()
+        n_train = len(self._pending)
+        saved_bits = counts.sum() * self.bits - tables.cost_bits(counts)
+        state_bytes = sum(rans.lanes_for(c.size) * 4 for c, _, _ in self._pending)
+        saved_bytes = saved_bits / 8 - state_bytes
+        n_total = max(self._expected_frames, n_train)
+        if saved_bytes * n_total / n_train <= len(block):
+            logger.debug("rANS tables would not pay off, keeping bit-packed frames")
+            self._use_rans = False
+            return
+
+        self.rans_tables = tables
+        self._flags |= HEADER_RANS_TABLES | HEADER_RANS_WIDE
+        self._fh.seek(_HEADER_V3_FLAGS_OFFSET)
+        self._fh.write(bytes([self._flags]))
+        self._fh.seek(self._offset)
+        self._fh.write(block)
+        self._offset += len(block)
+
+    def _flush_pending(self) -> None:
+        """Write all held-back frames, rANS-coding runs of equal shape."""
+        if not self._pending:
+            return
+        if self._use_rans and self.rans_tables is None:
+            self._init_rans_tables()
+
+        pending, self._pending = self._pending, []
+        first = 0
+        while first < len(pending):
+            shape = pending[first][0].shape
+            stop = first + 1
+            while (
+                stop < len(pending)
+                and pending[stop][0].shape == shape
+                and stop - first < _RANS_BATCH_FRAMES
+            ):
+                stop += 1
+            group = pending[first:stop]
+            n_codebooks, n_steps = shape
+            if self._use_rans and n_codebooks <= self.rans_tables.n_codebooks:
+                payloads = rans.encode_frames(
+                    np.stack([c for c, _, _ in group]), self.rans_tables,
+                    rans.lanes_for(n_codebooks * n_steps),
+                )
+            else:
+                payloads = [None] * len(group)
+            for (c, scale, start), payload in zip(group, payloads):
+                packed_size = _packed_size(c.size, self.bits)
+                if payload is not None and len(payload) < packed_size:
+                    self.write_encoded_frame(payload, FRAME_RANS, n_codebooks, n_steps, scale, start)
+                else:
+                    self.write_encoded_frame(pack_codes(c, self.bits), 0, n_codebooks, n_steps, scale, start)
+            first = stop
+
+    def write_encoded_frame(
+        self,
+        payload: bytes,
+        flags: int,
+        n_codebooks: int,
+        n_steps: int,
+        scale: torch.Tensor | None,
+        start: int,
+    ) -> None:
+        """Append a frame whose payload was already produced by the caller."""
+        if self.layers and flags & FRAME_LM:
+            raise ValueError("LM-coded frames cannot be split into layers")
+        self._flush_pending()
+        flags |= FRAME_CRC
+        if scale is not None:
+            flags |= FRAME_HAS_SCALE
+        scale_value = scale.item() if scale is not None else 0.0
+        header = _FRAME_V3.pack(flags, scale_value, n_codebooks, n_steps, len(payload))
+        crc = _CRC.pack(zlib.crc32(payload, zlib.crc32(header)))
+
+        self._index.write(_INDEX_ENTRY.pack(self._offset, start))
+        self._fh.write(header)
+        self._fh.write(payload)
+        self._fh.write(crc)
+        self._offset += len(header) + len(payload) + len(crc)
+        self.n_frames += 1
+
+    def close(self) -> None:
+        """Write index and layers, then patch counts and offsets into the header."""
+        if self._fh.closed:
+            return
+        self._flush_pending()
+        index_offset = self._offset
+        self._index.seek(0)
+        shutil.copyfileobj(self._index, self._fh)
+        self._index.close()
+        if self.layers:
+            ends = [self._fh.tell()]
+            for spool in self._layer_files:
+                spool.seek(0)
+                shutil.copyfileobj(spool, self._fh)
+                spool.close()
+                ends.append(self._fh.tell())
+            self._fh.seek(_HEADER_V3.size + _LAYER_COUNT.size)
+            self._fh.write(
+                b"".join(_LAYER_ENTRY.pack(n, end) for n, end in zip(self.layers, ends))
+            )
+        self._fh.seek(_HEADER_V3.size - _HEADER_V3_PATCH.size)
+        self._fh.write(_HEADER_V3_PATCH.pack(self.n_frames, index_offset))
+        self._fh.close()
+
+
+def layer_ranges(path: Path) -> list[tuple[int, int]]:
+    """``(n_codebooks, end)`` of every layer of a progressive ECDC file.
+
+    Only the header is read. The first ``end`` bytes of the file suffice to
+    decode that layer and all before it, e.g. through an HTTP range request.
+    Files without layers yield an empty list.
+    """
+    with open(path, "rb") as fh:
+        head = fh.read(_HEADER_V3.size + _LAYER_COUNT.size + 0xFF * _LAYER_ENTRY.size)
+    if len(head) < _HEADER_V3.size or head[:4] != _MAGIC or head[4] != 3:
+        return []
+    flags = _HEADER_V3.unpack_from(head)[5]
+    if not flags & HEADER_LAYERS:
+        return []
+    (n_layers,) = _LAYER_COUNT.unpack_from(head, _HEADER_V3.size)
+    return [
+        _LAYER_ENTRY.unpack_from(head, _HEADER_V3.size + _LAYER_COUNT.size + k * _LAYER_ENTRY.size)
+        for k in range(n_layers)
+    ]
+
+
+def save_ecdc(
+    path: Path,
+    model_sr: int,
+    bandwidth: float,
+    frames: list,
+    frame_starts: list[int],
+    bits: int = DEFAULT_CODEBOOK_BITS,
+    entropy: str = "none",
+) -> None:
+    """Save a list of encoded frames; ``frame_starts`` holds each frame's first sample."""
+    if len(frame_starts) != len(frames):
+        raise ValueError("frame_starts must have one entry per frame")
+    with EcdcWriter(path, model_sr, bandwidth, bits, entropy, len(frames)) as writer:
+        for (codes, scale), start in zip(frames, frame_starts):
+            writer.write_frame(codes, scale, start)
+
+
+def load_ecdc(path: Path) -> tuple[int, float, list]:
+    """Load all encoded frames of a v1-v3 or legacy torch.save file."""
+    with EcdcReader(path) as reader:
+        frames = [reader.read_frame(i) for i in range(reader.n_frames)]
+        return reader.model_sr, reader.bandwidth, frames
+
+
+class EcdcReader:
+    """Random access to the frames of an ECDC file.
+
+    The file is memory-mapped: only the pages of the header, the seek index
+    and the requested frames are ever touched. Frame headers are parsed in
+    one vectorized pass into :attr:`frames`, a structured array with one row
+    per frame. Codes are handed out as int16 tensors (zero-copy for v1
+    payloads); widening to int64 is left to the caller.
+
+    ``offset`` and ``size`` select an ECDC file embedded in a larger one,
+    such as a track of an :mod:`src.archive` archive.
+
+    With ``strict=False`` structural damage in v3 files (bad index entries,
+    unknown flags, payloads past the end) no longer raises; the affected
+    frames are flagged in ``frames["damaged"]`` so callers can skip them.
+
+    ``layers`` limits a progressive file to its first layers: frames then
+    hold fewer codebooks, :attr:`bandwidth` is reduced to match and the
+    bytes of the other layers are never touched, nor need they exist.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int = 0,
+        size: int | None = None,
+        strict: bool = True,
+        layers: int | None = None,
+    ):
+        self.path = Path(path)
+        self.strict = strict
+        self.version = 0
+        self.model_sr = 48000
+        self.bandwidth = 6.0
+        self.bits = DEFAULT_CODEBOOK_BITS
+        self.n_frames = 0
+        self.has_index = False
+        self.frames = np.zeros(0, dtype=FRAME_TABLE_DTYPE)
+        self.layers: list[int] = []  # codebooks per layer of a progressive file
+        self.layer_ends: list[int] = []
+        self.n_layers = 0  # layers actually read
+        self.rans_tables: rans.RansTables | None = None
+        self._rans_wide = False  # lanes per frame from rans.lanes_for
+        self._max_layers = layers
+        self._layer_chunks: list[np.ndarray] = []  # per layer 1.., offset of each frame's chunk
+        self._rans_cache: tuple[int, np.ndarray] | None = None  # first frame, codes
+        self._legacy_frames: list | None = None
+        self._mm: mmap.mmap | None = None
+        self._data: mmap.mmap | memoryview | None = None  # this file's bytes
+        self._buf: np.ndarray | None = None
+
+        with open(self.path, "rb") as fh:
+            fh.seek(offset)
+            head = fh.read(_HEADER_V1.size)
+            # Legacy: torch.save/pickle format (starts with PK zip or \x80 pickle)
+            # Backwards compat for .ecdc files created before binary format switch.
+            # These are self-generated files, not from untrusted sources.
+            if head[:2] in (b"PK", b"\x80\x02") and not offset:
+                self._load_legacy()
+                return
+            if len(head) < _HEADER_V1.size or head[:4] != _MAGIC:
+                raise ValueError(f"Not an ECDC file: {head[:4]!r}")
+            # Copy-on-write mapping: pages are shared with the page cache but
+            # the resulting arrays are writable, which torch.from_numpy wants.
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+        if offset or size is not None:
+            end = len(self._mm) if size is None else offset + size
+            if end > len(self._mm):
+                self.close()
+                raise ValueError(f"Truncated ECDC file: {self.path.name}")
+            self._data = memoryview(self._mm)[offset:end]
+        else:
+            self._data = self._mm
+
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> EcdcReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._buf = None
+        self._data = None
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Zero-copy frames still reference the mapping; it is
+                # released together with the last of them.
+                pass
+            self._mm = None
+
+    @property
+    def starts(self) -> np.ndarray | None:
+        """First sample of every frame at model rate, if the file is indexed."""
+        return self.frames["start"] if self.has_index else None
+
+    def _load_legacy(self) -> None:
+        logger.info("Loading legacy torch.save format: %s", self.path.name)
+        save_data = torch.load(self.path, map_location="cpu", weights_only=False)
+        self.model_sr = save_data.get("model_sr", 48000)
+        self.bandwidth = save_data.get("bandwidth", 6.0)
+        self._legacy_frames = save_data["frames"]
+        self.n_frames = len(self._legacy_frames)
+
+        self.frames = np.zeros(self.n_frames, dtype=FRAME_TABLE_DTYPE)
+        for row, (codes, scale) in zip(self.frames, self._legacy_frames):
+            row["n_codebooks"], row["n_steps"] = codes.shape[-2:]
+            row["has_scale"] = scale is not None
+            row["flags"] = FRAME_HAS_SCALE if scale is not None else 0
+            row["scale"] = scale.item() if scale is not None else 0.0
+
+    def _parse(self) -> None:
+        mm = self._data
+        self._buf = np.frombuffer(mm, dtype=np.uint8)
+        self.version = mm[4]
+        if self.version == 3:
+            self._parse_v3()
+            return
+
+        if self.version == 1:
+            _, _, self.model_sr, self.bandwidth, self.n_frames = _HEADER_V1.unpack_from(mm)
+            data_offset = _HEADER_V1.size
+            self.bits = 16
+        elif self.version == 2:
+            _, _, self.model_sr, self.bandwidth, self.n_frames, self.bits = (
+                _HEADER_V2.unpack_from(mm)
+            )
+            data_offset = _HEADER_V2.size
+        else:
+            raise ValueError(f"Unsupported ECDC version: {self.version}")
+
+        index = self._read_index()
+        if index is not None:
+            offsets, starts = index
+            self.has_index = True
+        else:
+            offsets, starts = self._walk_frames(data_offset), None
+
+        self.frames = self._parse_frame_table(offsets)
+        if starts is not None:
+            self.frames["start"] = starts
+
+    def _parse_v3(self) -> None:
+        mm = self._data
+        if len(mm) < _HEADER_V3.size:
+            raise ValueError(f"Truncated ECDC file: {self.path.name}")
+        (_, _, self.model_sr, self.bandwidth, self.bits, flags,
+         n_frames, index_offset) = _HEADER_V3.unpack_from(mm)
+        if flags & (0xFF ^ _KNOWN_HEADER_FLAGS):
+            raise ValueError(f"Unsupported ECDC header flags in {self.path.name}")
+
+        data_offset = _HEADER_V3.size
+        if flags & HEADER_LAYERS:
+            data_offset = self._parse_layer_table(data_offset)
+        self._rans_wide = bool(flags & HEADER_RANS_WIDE)
+        if flags & HEADER_RANS_TABLES:
+            try:
+                self.rans_tables, size = rans.RansTables.from_buffer(mm, data_offset)
+            except (struct.error, zlib.error, ValueError) as e:
+                raise ValueError(f"Corrupt rANS tables in {self.path.name}: {e}") from None
+            data_offset += size
+
+        if index_offset and index_offset + n_frames * _INDEX_DTYPE.itemsize > len(mm):
+            if self.strict:
+                raise ValueError(f"Truncated ECDC file: {self.path.name}")
+            logger.warning("Broken ECDC index, scanning frames: %s", self.path.name)
+            index_offset = 0
+
+        if index_offset:
+            index = np.frombuffer(mm, dtype=_INDEX_DTYPE, count=n_frames, offset=index_offset)
+            offsets = index["offset"].astype(np.int64)
+            starts = index["start"].astype(np.int64)
+            del index
+            self.has_index = True
+        else:
+            logger.warning("Unfinished ECDC file, scanning frames: %s", self.path.name)
+            offsets, starts = self._walk_frames_v3(data_offset), None
+
+        self.n_frames = len(offsets)
+        self.frames = self._parse_frame_table_v3(offsets)
+        if starts is not None:
+            self.frames["start"] = starts
+        if self.layers:
+            self._locate_layers()
+
+    def _parse_layer_table(self, offset: int) -> int:
+        """Read the layer table at ``offset``; returns the offset behind it."""
+        mm = self._data
+        try:
+            (n_layers,) = _LAYER_COUNT.unpack_from(mm, offset)
+            offset += _LAYER_COUNT.size
+            entries = [
+                _LAYER_ENTRY.unpack_from(mm, offset + k * _LAYER_ENTRY.size)
+                for k in range(n_layers)
+            ]
+        except struct.error:
+            raise ValueError(f"Truncated ECDC file: {self.path.name}") from None
+        if not entries:
+            raise ValueError(f"Empty ECDC layer table in {self.path.name}")
+        self.layers = [n for n, _ in entries]
+        self.layer_ends = [end for _, end in entries]
+        return offset + n_layers * _LAYER_ENTRY.size
+
+    def _locate_layers(self) -> None:
+        """Find each frame's chunk in the layers to read; adjust codebooks and bandwidth."""
+        frames = self.frames
+        bad = frames["n_codebooks"] != self.layers[0]
+        if bad.any():
+            self._damage("Frame does not match the ECDC layer table")
+            frames["damaged"] |= bad
+
+        wanted = len(self.layers)
+        if self._max_layers is not None:
+            wanted = max(1, min(self._max_layers, wanted))
+        n_layers = 1
+        for k in range(1, wanted):
+            start, end = self.layer_ends[k - 1], self.layer_ends[k]
+            if not end:
+                break  # unfinished file: layers are only appended on close
+            sizes = (self.layers[k] * frames["n_steps"] * self.bits + 7) // 8 + _CRC.size
+            if end > len(self._buf) or end - start != sizes.sum():
+                self._damage(f"Truncated ECDC layer {k}")
+                break
+            self._layer_chunks.append(start + np.cumsum(sizes) - sizes)
+            n_layers += 1
+
+        self.n_layers = n_layers
+        n_codebooks = sum(self.layers[:n_layers])
+        frames["n_codebooks"] = n_codebooks
+        self.bandwidth *= n_codebooks / sum(self.layers)
+
+    def _walk_frames_v3(self, offset: int) -> np.ndarray:
+        """Collect the complete frames of a file whose index was never written."""
+        mm = self._data
+        offsets = []
+        while offset + _FRAME_V3.size <= len(mm):
+            flags, *_, payload_size = _FRAME_V3.unpack_from(mm, offset)
+            end = offset + _FRAME_V3.size + payload_size
+            if flags & FRAME_CRC:
+                end += _CRC.size
+            if end > len(mm):
+                break
+            offsets.append(offset)
+            offset = end
+        return np.asarray(offsets, dtype=np.int64)
+
+    def _parse_frame_table_v3(self, offsets: np.ndarray) -> np.ndarray:
+        """Decode all fixed-size v3 frame headers with one structured gather."""
+        buf = self._buf
+        table = np.zeros(len(offsets), dtype=FRAME_TABLE_DTYPE)
+        if not len(offsets):
+            return table
+
+        damaged = (offsets < 0) | (offsets + _FRAME_V3.size > len(buf))
+        if damaged.any():
+            self._damage("Truncated ECDC file")
+            offsets = np.where(damaged, 0, offsets)
+
+        raw = buf[offsets[:, None] + np.arange(_FRAME_V3.size)]
+        headers = raw.view(_FRAME_V3_DTYPE).reshape(-1)
+        flags = headers["flags"]
+        bad = (flags & (0xFF ^ _KNOWN_FRAME_FLAGS)).astype(bool)
+        if bad.any():
+            self._damage("Unsupported ECDC frame flags")
+            damaged |= bad
+        if self.rans_tables is None:
+            bad = (flags & FRAME_RANS).astype(bool)
+            if bad.any():
+                self._damage("rANS frames without frequency tables")
+                damaged |= bad
+
+        table["offset"] = offsets
+        table["payload"] = offsets + _FRAME_V3.size
+        table["payload_size"] = headers["payload_size"]
+        table["n_codebooks"] = headers["n_codebooks"]
+        table["n_steps"] = headers["n_steps"]
+        table["flags"] = flags
+        table["has_scale"] = (flags & FRAME_HAS_SCALE).astype(bool)
+        table["scale"] = headers["scale"]
+
+        frame_end = table["payload"] + table["payload_size"] + np.where(
+            flags & FRAME_CRC, _CRC.size, 0
+        )
+        bad = frame_end > len(buf)
+        if bad.any():
+            self._damage("Truncated ECDC file")
+            damaged |= bad
+        table["damaged"] = damaged
+        return table
+
+    def _damage(self, message: str) -> None:
+        """Raise for structural damage, or only log it in non-strict mode."""
+        if self.strict:
+            raise ValueError(f"{message}: {self.path.name}")
+        logger.warning("%s: %s", message, self.path.name)
+
+    def _read_index(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """Load the v2 seek index from the trailer, if the file has one."""
+        size = len(self._data)
+        if size < _TRAILER.size:
+            return None
+        index_offset, magic = _TRAILER.unpack_from(self._data, size - _TRAILER.size)
+        index_size = self.n_frames * _INDEX_DTYPE.itemsize
+        if magic != _INDEX_MAGIC or index_offset + index_size + _TRAILER.size != size:
+            return None
+
+        index = np.frombuffer(self._data, dtype=_INDEX_DTYPE, count=self.n_frames, offset=index_offset)
+        return index["offset"].astype(np.int64), index["start"].astype(np.int64)
+
+    def _walk_frames(self, offset: int) -> np.ndarray:
+        """Locate v1/v2 frames by stepping over their headers (files without index)."""
+        mm = self._data
+        offsets = np.empty(self.n_frames, dtype=np.int64)
+        for i in range(self.n_frames):
+            offsets[i] = offset
+            try:
+                offset += 1 + 4 * mm[offset]
+                n_codebooks, n_steps = _FRAME_V1.unpack_from(mm, offset)
+            except (IndexError, struct.error):
+                raise ValueError(f"Truncated ECDC file: {self.path.name}") from None
+            offset += _FRAME_V1.size + self._payload_size(n_codebooks * n_steps)
+        return offsets
+
+    def _payload_size(self, count):
+        """Payload bytes for ``count`` codes (scalar or array)."""
+        if self.version == 1:
+            return count * 2
+        return (count * self.bits + 7) // 8
+
+    def _parse_frame_table(self, offsets: np.ndarray) -> np.ndarray:
+        """Decode all v1/v2 frame headers at once with vectorized gathers."""
+        buf = self._buf
+        table = np.zeros(len(offsets), dtype=FRAME_TABLE_DTYPE)
+        if not len(offsets):
+            return table
+        if offsets.max() + 1 + 4 + _FRAME_V1.size > len(buf):
+            raise ValueError(f"Truncated ECDC file: {self.path.name}")
+
+        has_scale = buf[offsets].astype(bool)
+        pos = offsets + 1 + 4 * has_scale
+        table["offset"] = offsets
+        table["has_scale"] = has_scale
+        table["flags"] = np.where(has_scale, FRAME_HAS_SCALE, 0)
+        table["scale"] = np.where(has_scale, _gather(buf, offsets + 1, "<f4"), 0.0)
+        table["n_codebooks"] = _gather(buf, pos, "<u2")
+        table["n_steps"] = _gather(buf, pos + 2, "<u4")
+        table["payload"] = pos + _FRAME_V1.size
+        table["payload_size"] = self._payload_size(table["n_codebooks"] * table["n_steps"])
+
+        if (table["payload"] + table["payload_size"]).max() > len(buf):
+            raise ValueError(f"Truncated ECDC file: {self.path.name}")
+        return table
+
+    def frame_steps(self, index: int) -> int:
+        """Number of code steps in frame ``index``."""
+        return int(self.frames["n_steps"][index])
+
+    def read_scale(self, index: int) -> torch.Tensor | None:
+        """Normalization scale of frame ``index`` as a (1, 1) tensor, if any."""
+        row = self.frames[index]
+        return torch.tensor([[float(row["scale"])]]) if row["has_scale"] else None
+
+    def read_payload(self, index: int) -> np.ndarray:
+        """Raw payload bytes of frame ``index`` (a view into the mapping)."""
+        row = self.frames[index]
+        payload = int(row["payload"])
+        return self._buf[payload:payload + int(row["payload_size"])]
+
+    def verify_frame(self, index: int) -> bool:
+        """Check structure and, if the frame carries one, the CRC32 of frame ``index``.
+
+        Frames failing the check are flagged in ``frames["damaged"]``.
+        """
+        row = self.frames[index]
+        if row["damaged"]:
+            return False
+        ok = True
+        if row["flags"] & FRAME_CRC:
+            payload_end = int(row["payload"]) + int(row["payload_size"])
+            crc = zlib.crc32(self._buf[int(row["offset"]):payload_end])
+            ok = crc == _CRC.unpack_from(self._data, payload_end)[0]
+        for k, chunks in enumerate(self._layer_chunks, 1):
+            if not ok:
+                break
+            start = int(chunks[index])
+            end = start + _packed_size(self.layers[k] * int(row["n_steps"]), self.bits)
+            ok = zlib.crc32(self._buf[start:end]) == _CRC.unpack_from(self._data, end)[0]
+        if not ok:
+            self.frames["damaged"][index] = True
+        return ok
+
+    def verify(self) -> np.ndarray:
+        """Indices of all frames that fail :meth:`verify_frame`."""
+        ok = np.fromiter(
+            (self.verify_frame(i) for i in range(self.n_frames)), dtype=bool, count=self.n_frames
+        )
+        return np.flatnonzero(~ok)
+
+    def read_frame(self, index: int) -> tuple[torch.Tensor, torch.Tensor | None]:
+        """Return ``(codes, scale)`` for one frame, codes shaped (1, K, T)."""
+        if self._legacy_frames is not None:
+            return self._legacy_frames[index]
+
+        row = self.frames[index]
+        if row["damaged"]:
+            raise ValueError(f"Frame {index} of {self.path.name} is damaged")
+        if row["flags"] & FRAME_LM:
+            raise ValueError(f"Frame {index} is LM-coded and needs the language model")
+
+        n_codebooks, n_steps = int(row["n_codebooks"]), int(row["n_steps"])
+        count = self._base_codebooks(row) * n_steps
+        payload = int(row["payload"])
+
+        if self.version == 1:
+            codes_np = np.frombuffer(self._data, dtype="<i2", count=count, offset=payload)
+            if payload % 2:
+                codes_np = codes_np.copy()  # keep torch away from unaligned memory
+        elif row["flags"] & FRAME_RANS:
+            codes_np = self._read_rans(index)
+        else:
+            codes_np = unpack_codes(self.read_payload(index), count, self.bits)
+            codes_np = codes_np.view(np.int16)
+
+        if self._layer_chunks:
+            codes_np = np.concatenate([codes_np.reshape(-1, n_steps)] + [
+                self._read_layer(k, int(chunks[index]), n_steps)
+                for k, chunks in enumerate(self._layer_chunks, 1)
+            ])
+        codes = torch.from_numpy(codes_np.reshape(1, n_codebooks, n_steps))
+        return codes, self.read_scale(index)
+
+    def _base_codebooks(self, row) -> int:
+        """Codebooks in the frame payload itself (layer 0 of progressive files)."""
+        return self.layers[0] if self.layers else int(row["n_codebooks"])
+
+    def _read_layer(self, layer: int, start: int, n_steps: int) -> np.ndarray:
+        count = self.layers[layer] * n_steps
+        data = self._buf[start:start + _packed_size(count, self.bits)]
+        return unpack_codes(data, count, self.bits).view(np.int16).reshape(-1, n_steps)
+
+    def _read_rans(self, index: int) -> np.ndarray:
+        """Codes of rANS frame ``index``, decoding its following run in one batch.
+
+        Sequential readers hit the cached batch for the next frames; a seek
+        decodes just the run starting at the requested frame.
+        """
+        if self._rans_cache is not None:
+            first, codes = self._rans_cache
+            if first <= index < first + len(codes):
+                return codes[index - first].copy()
+
+        frames = self.frames
+        row = frames[index]
+        stop = index + 1
+        while (
+            stop < self.n_frames
+            and stop - index < _RANS_BATCH_FRAMES
+            and frames["flags"][stop] & FRAME_RANS
+            and not frames["damaged"][stop]
+            and frames["n_codebooks"][stop] == row["n_codebooks"]
+            and frames["n_steps"][stop] == row["n_steps"]
+        ):
+            stop += 1
+        payloads = [self.read_payload(i) for i in range(index, stop)]
+        shape = self._base_codebooks(row), int(row["n_steps"])
+        lanes = rans.lanes_for(shape[0] * shape[1]) if self._rans_wide else rans.LANES
+        try:
+            codes = rans.decode_frames(payloads, *shape, self.rans_tables, lanes)
+        except ValueError:
+            if stop == index + 1:
+                raise
+            # A broken payload further down the run must not take this frame with it.
+            codes = rans.decode_frames(payloads[:1], *shape, self.rans_tables, lanes)
+        self._rans_cache = (index, codes)
+        return codes[0].copy()
+
+
+def _gather(buf: np.ndarray, positions: np.ndarray, dtype: str) -> np.ndarray:
+    """Read one little-endian scalar of ``dtype`` at each byte position."""
+    dt = np.dtype(dtype)
+    raw = buf[positions[:, None] + np.arange(dt.itemsize)]
+    return raw.view(dt).reshape(-1)
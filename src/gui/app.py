@@ -6,14 +6,29 @@ import sys
 
 from PySide6.QtWidgets import QApplication
 
+from .. import registry
+from ..model_manager import get_manager
+from .state import get_state
 from .window import MainWindow
 
 
+def _start_model_manager() -> None:
+    """Apply the configured limits and preload the default backend's model."""
+    config = get_state().config
+    get_manager().configure(
+        budget_mb=config.model_budget_mb,
+        idle_timeout=config.model_idle_minutes * 60,
+    )
+    if config.default_backend in registry.names():
+        registry.get(config.default_backend).preload()
+
+
 def run_gui() -> int:
     """Launch the GUI and return exit code."""
     app = QApplication(sys.argv)
     app.setApplicationName("CGC Audio Compress")
 
+    _start_model_manager()
     window = MainWindow()
     window.show()
 
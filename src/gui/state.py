@@ -20,6 +20,9 @@ class AppConfig:
     output_dir: str = ""
     use_lm: bool = False
     last_audio_dir: str = ""
+    batch_workers: int = 1
+    model_budget_mb: int = 2048
+    model_idle_minutes: int = 10
 
     def save(self) -> None:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 from PySide6.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QFileDialog,
     QGroupBox,
@@ -14,6 +16,7 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QProgressBar,
     QPushButton,
+    QSpinBox,
     QTableWidget,
     QTableWidgetItem,
     QVBoxLayout,
@@ -21,18 +24,29 @@ from PySide6.QtWidgets import (
 )
 
 from ... import registry
+from ...archive import ARCHIVE_SUFFIX
 from ...models import ParamType
 from ..state import get_state
-from ..workers import BatchCompressWorker
+from ..workers import BatchCompressWorker, ProbeWorker
 
 AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a", ".aac"}
 
 
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
 class BatchTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._worker: BatchCompressWorker | None = None
+        self._probe_worker: ProbeWorker | None = None
         self._audio_paths: list[Path] = []
+        self._durations: dict[int, float] = {}  # index -> seconds, filled by probing
+        self._probe_errors = 0
+        self._weights: list[int] = []  # progress units per file
         self._results: list = []
         self._setup_ui()
 
@@ -88,6 +102,30 @@ class BatchTab(QWidget):
         bw_row.addWidget(self._bw_combo, 1)
         params_layout.addLayout(bw_row)
 
+        self._lm_check = QCheckBox("Language Model Compression (langsam)")
+        self._lm_check.setChecked(state.config.use_lm)
+        params_layout.addWidget(self._lm_check)
+
+        self._int8_check = QCheckBox("Int8-quantisierter Encoder (schneller auf CPU)")
+        params_layout.addWidget(self._int8_check)
+
+        self._cache_check = QCheckBox("Ergebnis-Cache fuer identische Audiodaten verwenden")
+        self._cache_check.setToolTip(
+            "Dateien mit gleichem Inhalt werden nicht erneut kodiert, sondern aus dem Cache kopiert"
+        )
+        params_layout.addWidget(self._cache_check)
+
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(QLabel("Parallele Prozesse:"))
+        self._workers_spin = QSpinBox()
+        self._workers_spin.setRange(1, os.cpu_count() or 1)
+        self._workers_spin.setValue(state.config.batch_workers)
+        self._workers_spin.setToolTip(
+            "Jeder Prozess laedt ein eigenes Modell und teilt sich die CPU-Kerne"
+        )
+        workers_row.addWidget(self._workers_spin, 1)
+        params_layout.addLayout(workers_row)
+
         layout.addWidget(params_group)
 
         # --- Output ---
@@ -102,6 +140,11 @@ class BatchTab(QWidget):
         out_layout.addWidget(out_browse)
         layout.addWidget(out_group)
 
+        self._archive_check = QCheckBox(
+            f"In ein Archiv ({ARCHIVE_SUFFIX}) statt einzelner Dateien schreiben"
+        )
+        layout.addWidget(self._archive_check)
+
         # --- Start / Cancel ---
         action_row = QHBoxLayout()
         self._start_btn = QPushButton("Batch starten")
@@ -123,8 +166,10 @@ class BatchTab(QWidget):
         layout.addWidget(self._status_label)
 
         # --- Results table ---
-        self._table = QTableWidget(0, 5)
-        self._table.setHorizontalHeaderLabels(["Datei", "Original", "Komprimiert", "Ratio", "Status"])
+        self._table = QTableWidget(0, 6)
+        self._table.setHorizontalHeaderLabels(
+            ["Datei", "Dauer", "Original", "Komprimiert", "Ratio", "Status"]
+        )
         self._table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self._table.setVisible(False)
         layout.addWidget(self._table)
@@ -186,11 +231,60 @@ class BatchTab(QWidget):
         self._update_file_count()
 
     def _update_file_count(self):
+        self._start_probe()
+        self._show_file_count()
+        self._start_btn.setEnabled(len(self._audio_paths) > 0)
+
+    def _show_file_count(self, probing: str = ""):
         n = len(self._audio_paths)
-        self._file_count_label.setText(
-            f"{n} Datei(en) ausgewaehlt" if n > 0 else "Keine Dateien ausgewaehlt"
+        if n == 0:
+            self._file_count_label.setText("Keine Dateien ausgewaehlt")
+            return
+        text = f"{n} Datei(en) ausgewaehlt"
+        if self._durations:
+            total = sum(self._durations.values())
+            text += f"  |  Gesamtdauer: {_format_duration(total)} ({total:.0f} s Audio)"
+        if self._probe_errors:
+            text += f"  |  {self._probe_errors} nicht lesbar"
+        if probing:
+            text += f"  |  {probing}"
+        self._file_count_label.setText(text)
+
+    def _start_probe(self):
+        """Probe durations in the background; results come from the probe cache if possible."""
+        if self._probe_worker is not None:
+            self._probe_worker.cancel()
+            self._probe_worker = None
+        self._durations = {}
+        self._probe_errors = 0
+        if not self._audio_paths:
+            return
+        worker = ProbeWorker(self._audio_paths, self)
+        worker.probed.connect(lambda batch, w=worker: self._on_probed(w, batch))
+        worker.progress.connect(
+            lambda done, total, w=worker: self._on_probe_progress(w, done, total)
         )
-        self._start_btn.setEnabled(n > 0)
+        worker.all_done.connect(lambda w=worker: self._on_probe_done(w))
+        self._probe_worker = worker
+        worker.start()
+
+    def _on_probed(self, worker: ProbeWorker, batch: list):
+        if worker is not self._probe_worker:
+            return  # superseded by a new selection
+        for i, info in batch:
+            if isinstance(info, str):
+                self._probe_errors += 1
+            else:
+                self._durations[i] = info.duration
+
+    def _on_probe_progress(self, worker: ProbeWorker, done: int, total: int):
+        if worker is self._probe_worker:
+            self._show_file_count(f"analysiere {done}/{total}...")
+
+    def _on_probe_done(self, worker: ProbeWorker):
+        if worker is self._probe_worker:
+            self._probe_worker = None
+            self._show_file_count()
 
     def _browse_output(self):
         path = QFileDialog.getExistingDirectory(self, "Ausgabeverzeichnis waehlen")
@@ -209,7 +303,12 @@ class BatchTab(QWidget):
         output_dir.mkdir(parents=True, exist_ok=True)
 
         codec = registry.get(self._backend_combo.currentText())
-        params = {"bandwidth": self._bw_combo.currentText()}
+        params = {
+            "bandwidth": self._bw_combo.currentText(),
+            "use_lm": self._lm_check.isChecked(),
+            "int8": self._int8_check.isChecked(),
+            "result_cache": self._cache_check.isChecked(),
+        }
 
         self._results = []
         self._table.setRowCount(len(self._audio_paths))
@@ -217,17 +316,40 @@ class BatchTab(QWidget):
         self._summary_group.setVisible(False)
         for i, p in enumerate(self._audio_paths):
             self._table.setItem(i, 0, QTableWidgetItem(p.name))
-            for col in range(1, 5):
+            for col in range(1, 6):
                 self._table.setItem(i, col, QTableWidgetItem(""))
-            self._table.setItem(i, 4, QTableWidgetItem("Wartend"))
+            if i in self._durations:
+                self._table.setItem(i, 1, QTableWidgetItem(_format_duration(self._durations[i])))
+            self._table.setItem(i, 5, QTableWidgetItem("Wartend"))
+
+        # Progress counts seconds of audio once every duration is known.
+        n = len(self._audio_paths)
+        if len(self._durations) == n:
+            self._weights = [max(1, round(self._durations[i])) for i in range(n)]
+        else:
+            self._weights = [1] * n
 
         self._start_btn.setEnabled(False)
         self._cancel_btn.setEnabled(True)
         self._progress.setVisible(True)
-        self._progress.setMaximum(len(self._audio_paths))
+        self._progress.setMaximum(sum(self._weights))
         self._progress.setValue(0)
 
-        self._worker = BatchCompressWorker(codec, self._audio_paths, output_dir, params, self)
+        archive_path = None
+        if self._archive_check.isChecked():
+            archive_name = self._audio_paths[0].parent.name or "batch"
+            archive_path = output_dir / f"{archive_name}{ARCHIVE_SUFFIX}"
+
+        workers = self._workers_spin.value()
+        state = get_state()
+        if state.config.batch_workers != workers:
+            state.config.batch_workers = workers
+            state.config.save()
+
+        self._worker = BatchCompressWorker(
+            codec, self._audio_paths, output_dir, params, self,
+            archive_path=archive_path, workers=workers,
+        )
         self._worker.file_started.connect(self._on_file_started)
         self._worker.file_finished.connect(self._on_file_finished)
         self._worker.file_error.connect(self._on_file_error)
@@ -240,26 +362,36 @@ class BatchTab(QWidget):
             self._status_label.setText("Abbruch angefordert...")
 
     def _on_file_started(self, idx: int, filename: str):
-        self._table.setItem(idx, 4, QTableWidgetItem("Komprimiere..."))
+        self._table.setItem(idx, 5, QTableWidgetItem("Komprimiere..."))
         self._status_label.setText(f"[{idx + 1}/{len(self._audio_paths)}] {filename}")
 
     def _on_file_finished(self, idx: int, result):
         self._results.append(result)
-        self._table.setItem(idx, 1, QTableWidgetItem(f"{result.original_size / 1024:.1f} KB"))
-        self._table.setItem(idx, 2, QTableWidgetItem(f"{result.compressed_size / 1024:.1f} KB"))
-        self._table.setItem(idx, 3, QTableWidgetItem(f"{result.ratio:.1f}x"))
-        self._table.setItem(idx, 4, QTableWidgetItem("Fertig"))
-        self._progress.setValue(self._progress.value() + 1)
+        self._table.setItem(idx, 2, QTableWidgetItem(f"{result.original_size / 1024:.1f} KB"))
+        self._table.setItem(idx, 3, QTableWidgetItem(f"{result.compressed_size / 1024:.1f} KB"))
+        self._table.setItem(idx, 4, QTableWidgetItem(f"{result.ratio:.1f}x"))
+        if result.resumed:
+            status = "Unveraendert (uebersprungen)"
+        elif result.cache_hit:
+            status = "Fertig (Cache)"
+        else:
+            status = "Fertig"
+        self._table.setItem(idx, 5, QTableWidgetItem(status))
+        self._progress.setValue(self._progress.value() + self._weights[idx])
 
     def _on_file_error(self, idx: int, msg: str):
-        self._table.setItem(idx, 4, QTableWidgetItem(f"Fehler: {msg}"))
-        self._progress.setValue(self._progress.value() + 1)
+        self._table.setItem(idx, 5, QTableWidgetItem(f"Fehler: {msg}"))
+        self._progress.setValue(self._progress.value() + self._weights[idx])
 
     def _on_all_done(self):
         self._start_btn.setEnabled(True)
         self._cancel_btn.setEnabled(False)
         self._progress.setVisible(False)
-        self._status_label.setText("Batch abgeschlossen!")
+        archive_path = self._worker.archive_path if self._worker else None
+        if archive_path is not None:
+            self._status_label.setText(f"Batch abgeschlossen! Archiv: {archive_path}")
+        else:
+            self._status_label.setText("Batch abgeschlossen!")
 
         if self._results:
             total_orig = sum(r.original_size for r in self._results)
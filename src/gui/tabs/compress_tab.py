@@ -19,10 +19,9 @@ from PySide6.QtWidgets import (
 )
 
 from ... import registry
-from ...audio_io import get_audio_info
 from ...models import ParamType
 from ..state import get_state
-from ..workers import CompressWorker
+from ..workers import CompressWorker, ProbeWorker
 
 AUDIO_FILTER = "Audio (*.wav *.mp3 *.flac *.ogg *.m4a *.aac);;Alle Dateien (*)"
 
@@ -31,6 +30,7 @@ class CompressTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._worker: CompressWorker | None = None
+        self._probe_worker: ProbeWorker | None = None
         self._audio_path: Path | None = None
         self._param_widgets: dict[str, QWidget] = {}
         self._setup_ui()
@@ -137,8 +137,23 @@ class CompressTab(QWidget):
         self._show_info()
 
     def _show_info(self):
-        try:
-            info = get_audio_info(self._audio_path)
+        # ffprobe can take seconds on network shares; keep it off the UI thread.
+        if self._probe_worker is not None:
+            self._probe_worker.cancel()
+        self._info_label.setText("Analysiere...")
+        self._info_group.setVisible(True)
+        worker = ProbeWorker([self._audio_path], self)
+        worker.probed.connect(lambda batch, w=worker: self._on_probed(w, batch))
+        self._probe_worker = worker
+        worker.start()
+
+    def _on_probed(self, worker: ProbeWorker, batch: list):
+        if worker is not self._probe_worker:
+            return  # another file was selected meanwhile
+        for _, info in batch:
+            if isinstance(info, str):
+                self._info_label.setText(f"Fehler: {info}")
+                continue
             mins = int(info.duration // 60)
             secs = info.duration % 60
             self._info_label.setText(
@@ -148,10 +163,6 @@ class CompressTab(QWidget):
                 f"Sample-Rate: {info.sample_rate} Hz  |  "
                 f"Bitrate: {info.bitrate_kbps:.0f} kbps"
             )
-            self._info_group.setVisible(True)
-        except Exception as exc:
-            self._info_label.setText(f"Fehler: {exc}")
-            self._info_group.setVisible(True)
 
     def _browse_output(self):
         path = QFileDialog.getExistingDirectory(self, "Ausgabeverzeichnis waehlen")
@@ -197,6 +208,8 @@ class CompressTab(QWidget):
                 from PySide6.QtWidgets import QCheckBox
                 w = QCheckBox()
                 w.setChecked(bool(spec.default))
+                if spec.name == "use_lm":
+                    w.setChecked(get_state().config.use_lm)
                 row.addWidget(w, 1)
                 self._param_widgets[spec.name] = w
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 from pathlib import Path
 
 from PySide6.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QFileDialog,
     QGroupBox,
@@ -73,6 +74,9 @@ class DecompressTab(QWidget):
         out_layout.addWidget(out_browse)
         layout.addWidget(out_group)
 
+        self._recover_check = QCheckBox("Beschaedigte Frames ueberspringen (durch Stille ersetzen)")
+        layout.addWidget(self._recover_check)
+
         # --- Decompress ---
         self._decompress_btn = QPushButton("Dekomprimieren")
         self._decompress_btn.clicked.connect(self._start_decompress)
@@ -132,7 +136,9 @@ class DecompressTab(QWidget):
         self._result_group.setVisible(False)
         self._status_label.setText("Dekomprimiere...")
 
-        self._worker = DecompressWorker(codec, self._compressed_path, output, self)
+        self._worker = DecompressWorker(
+            codec, self._compressed_path, output, self, recover=self._recover_check.isChecked()
+        )
         self._worker.progress.connect(self._on_progress)
         self._worker.finished_signal.connect(self._on_finished)
         self._worker.error.connect(self._on_error)
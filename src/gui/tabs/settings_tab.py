@@ -11,11 +11,13 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
 from ... import registry
+from ...model_manager import get_manager
 from ..state import get_state
 
 
@@ -70,6 +72,24 @@ class SettingsTab(QWidget):
         output_layout.addWidget(browse_btn)
         layout.addWidget(output_group)
 
+        # --- Models ---
+        models_group = QGroupBox("Modelle")
+        models_layout = QVBoxLayout(models_group)
+        budget_row = QHBoxLayout()
+        budget_row.addWidget(QLabel("Speicherbudget (MB):"))
+        self._budget_spin = QSpinBox()
+        self._budget_spin.setRange(256, 65536)
+        self._budget_spin.setSingleStep(256)
+        budget_row.addWidget(self._budget_spin, 1)
+        models_layout.addLayout(budget_row)
+        idle_row = QHBoxLayout()
+        idle_row.addWidget(QLabel("Ungenutzte Modelle entladen nach (Minuten):"))
+        self._idle_spin = QSpinBox()
+        self._idle_spin.setRange(1, 1440)
+        idle_row.addWidget(self._idle_spin, 1)
+        models_layout.addLayout(idle_row)
+        layout.addWidget(models_group)
+
         # --- Save ---
         self._save_btn = QPushButton("Speichern")
         self._save_btn.clicked.connect(self._save)
@@ -114,6 +134,8 @@ class SettingsTab(QWidget):
 
         self._lm_check.setChecked(cfg.use_lm)
         self._output_edit.setText(cfg.output_dir)
+        self._budget_spin.setValue(cfg.model_budget_mb)
+        self._idle_spin.setValue(cfg.model_idle_minutes)
 
     def _save(self):
         state = get_state()
@@ -121,5 +143,11 @@ class SettingsTab(QWidget):
         state.config.default_bandwidth = self._bw_combo.currentText()
         state.config.use_lm = self._lm_check.isChecked()
         state.config.output_dir = self._output_edit.text().strip()
+        state.config.model_budget_mb = self._budget_spin.value()
+        state.config.model_idle_minutes = self._idle_spin.value()
         state.config.save()
+        get_manager().configure(
+            budget_mb=state.config.model_budget_mb,
+            idle_timeout=state.config.model_idle_minutes * 60,
+        )
         self._status_label.setText("Einstellungen gespeichert!")
@@ -2,15 +2,25 @@
 
 from __future__ import annotations
 
+import dataclasses
 import logging
+import tempfile
+import time
 from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
+from ..archive import ArchiveWriter
 from ..backends.base import BaseAudioCodec
+from ..batch_manifest import BatchManifest
+from ..parallel import ParallelCompressor
+from ..probe_cache import get_probe_cache
 
 logger = logging.getLogger(__name__)
 
+# Probe results are handed to the UI at most this often.
+_PROBE_EMIT_S = 0.25
+
 
 class CompressWorker(QThread):
     """Runs compression in a background thread."""
@@ -63,11 +73,13 @@ class DecompressWorker(QThread):
         compressed_path: Path,
         output_path: Path,
         parent=None,
+        recover: bool = False,
     ):
         super().__init__(parent)
         self._codec = codec
         self._compressed_path = compressed_path
         self._output_path = output_path
+        self._recover = recover
 
     def run(self):
         try:
@@ -75,6 +87,7 @@ class DecompressWorker(QThread):
                 self._compressed_path,
                 self._output_path,
                 progress_cb=self._on_progress,
+                recover=self._recover,
             )
             self.finished_signal.emit(result)
         except Exception as exc:
@@ -86,7 +99,19 @@ class DecompressWorker(QThread):
 
 
 class BatchCompressWorker(QThread):
-    """Compresses a list of audio files sequentially."""
+    """Compresses a list of audio files through the codec's batch path.
+
+    With ``workers`` > 1 the files are spread over that many worker
+    processes, each with its own model. With ``archive_path`` set, every
+    result becomes a track of a new ECDA archive at that path, named after
+    the source file, instead of staying a single file. An archive left by an
+    earlier run is replaced.
+
+    Without an archive, finished files are recorded in a
+    :class:`~src.batch_manifest.BatchManifest` in the output directory. A
+    rerun reports the inputs that are still up to date as finished results
+    with ``resumed`` set and only compresses new or changed ones.
+    """
 
     file_started = Signal(int, str)  # (index, filename)
     file_progress = Signal(int, str, int, int)  # (index, msg, current, total)
@@ -101,33 +126,154 @@ class BatchCompressWorker(QThread):
         output_dir: Path,
         params: dict,
         parent=None,
+        archive_path: Path | None = None,
+        workers: int = 1,
     ):
         super().__init__(parent)
         self._codec = codec
         self._paths = audio_paths
         self._output_dir = output_dir
         self._params = params
+        self._archive_path = archive_path
+        self._engine = ParallelCompressor(codec, workers) if workers > 1 else None
         self._cancelled = False
+        self._reported: set[int] = set()
 
     def run(self):
-        for i, path in enumerate(self._paths):
-            if self._cancelled:
-                break
-            self.file_started.emit(i, path.name)
+        self._reported = set()
+        try:
+            self._run()
+        except Exception as exc:
+            # Whatever ends the batch early, the files without a result fail
+            # and the tab still gets all_done.
+            logger.exception("Batch compression failed")
+            for i in range(len(self._paths)):
+                if i not in self._reported:
+                    self.file_error.emit(i, str(exc))
+        self.all_done.emit()
+
+    def _run(self) -> None:
+        if self._archive_path is None:
+            try:
+                manifest = BatchManifest(self._output_dir, self._codec.name, self._params)
+            except Exception:
+                logger.exception("Cannot open the batch manifest in %s", self._output_dir)
+                manifest = None
             try:
-                output = self._output_dir / path.stem
+                self._compress_all(self._output_dir, None, manifest)
+            finally:
+                if manifest is not None:
+                    manifest.close()
+            return
 
-                def progress_cb(msg, current, total, idx=i):
-                    self.file_progress.emit(idx, msg, current, total)
+        try:
+            # A rerun of the batch would collide with its own earlier tracks.
+            archive = ArchiveWriter(self._archive_path, append=False)
+        except Exception as exc:
+            logger.exception("Cannot open archive %s", self._archive_path)
+            for i in range(len(self._paths)):
+                self.file_error.emit(i, str(exc))
+            return
+
+        with archive, tempfile.TemporaryDirectory(dir=self._archive_path.parent) as tmp:
+            self._compress_all(Path(tmp), archive)
 
-                result = self._codec.compress(
-                    path, output, self._params, progress_cb=progress_cb
-                )
+    def _compress_all(
+        self,
+        output_dir: Path,
+        archive: ArchiveWriter | None,
+        manifest: BatchManifest | None = None,
+    ) -> None:
+        todo = list(range(len(self._paths)))
+        if manifest is not None:
+            done = manifest.up_to_date(self._paths)
+            for i, result in sorted(done.items()):
+                self._reported.add(i)
                 self.file_finished.emit(i, result)
-            except Exception as exc:
-                logger.exception("Batch compress failed for %s", path.name)
-                self.file_error.emit(i, str(exc))
+            if done:
+                logger.info("%d of %d files are up to date", len(done), len(todo))
+                todo = [i for i in todo if i not in done]
+        jobs = [(self._paths[i], output_dir / self._paths[i].stem) for i in todo]
+        runner = self._engine or self._codec
+        results = runner.compress_batch(
+            jobs, self._params,
+            started_cb=lambda k: self.file_started.emit(todo[k], self._paths[todo[k]].name),
+        )
+        try:
+            for k, result in results:
+                i = todo[k]
+                path = self._paths[i]
+                self._reported.add(i)
+                if isinstance(result, Exception):
+                    logger.error("Batch compress failed for %s: %s", path.name, result)
+                    self.file_error.emit(i, str(result))
+                elif archive is not None:
+                    try:
+                        archive.add_file(path.name, result.compressed_path, result.duration)
+                        result.compressed_path.unlink()
+                        result = dataclasses.replace(result, compressed_path=self._archive_path)
+                        self.file_finished.emit(i, result)
+                    except Exception as exc:
+                        logger.exception("Adding %s to archive failed", path.name)
+                        self.file_error.emit(i, str(exc))
+                else:
+                    if manifest is not None:
+                        manifest.record(result)
+                    self.file_finished.emit(i, result)
+                if self._cancelled:
+                    break
+        finally:
+            results.close()
+
+    @property
+    def archive_path(self) -> Path | None:
+        return self._archive_path
+
+    def cancel(self):
+        self._cancelled = True
+        if self._engine is not None:
+            self._engine.cancel()
+
+
+class ProbeWorker(QThread):
+    """Probes audio files through the on-disk probe cache in the background.
+
+    Results are emitted in batches of ``(index, AudioInfo | error message)``
+    so tens of thousands of files do not flood the event loop.
+    """
 
+    probed = Signal(object)  # list of (index, AudioInfo | str)
+    progress = Signal(int, int)  # (done, total)
+    all_done = Signal()
+
+    def __init__(self, audio_paths: list[Path], parent=None):
+        super().__init__(parent)
+        self._paths = list(audio_paths)
+        self._cancelled = False
+
+    def run(self):
+        batch = []
+        done = 0
+        last_emit = time.monotonic()
+        results = get_probe_cache().probe_many(self._paths, cancelled=lambda: self._cancelled)
+        try:
+            for i, info in results:
+                if self._cancelled:
+                    break
+                batch.append((i, str(info) if isinstance(info, Exception) else info))
+                done += 1
+                if time.monotonic() - last_emit >= _PROBE_EMIT_S:
+                    self.probed.emit(batch)
+                    self.progress.emit(done, len(self._paths))
+                    batch = []
+                    last_emit = time.monotonic()
+        except Exception:
+            logger.exception("Probing audio files failed")
+        finally:
+            results.close()
+        if batch and not self._cancelled:
+            self.probed.emit(batch)
+            self.progress.emit(done, len(self._paths))
         self.all_done.emit()
 
     def cancel(self):
@@ -0,0 +1,207 @@
+"""Process-wide cache of loaded model weights.
+
+Backends fetch their networks through :func:`get_manager` instead of keeping
+them in attributes, so one loaded model is shared by every tab and worker
+thread of the process. Models nobody is using are evicted least recently
+used first once the memory budget is exceeded, or after sitting idle for
+``idle_timeout`` seconds. A model being used inside :meth:`ModelManager.hold`
+is never evicted.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MB = 2048
+DEFAULT_IDLE_TIMEOUT_S = 600.0
+_REAP_INTERVAL_S = 30.0
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size: int
+    last_used: float
+
+
+def _model_size(model: Any) -> int:
+    """Bytes held by the parameters and buffers of a torch module (0 otherwise)."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelManager:
+    """LRU cache of loaded models with a memory budget and idle eviction."""
+
+    def __init__(
+        self,
+        budget_mb: int = DEFAULT_BUDGET_MB,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT_S,
+    ):
+        self.budget = budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: dict[Hashable, threading.Lock] = {}
+        self._holds: dict[Hashable, int] = {}
+        self._reaper: threading.Thread | None = None
+
+    def configure(self, budget_mb: int | None = None, idle_timeout: float | None = None) -> None:
+        with self._lock:
+            if budget_mb is not None:
+                self.budget = budget_mb * 1024 * 1024
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            self._evict()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """The model for ``key``, calling ``loader()`` once if it is not loaded.
+
+        Concurrent callers for the same key wait for a single load.
+        """
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                return entry.model
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._touch(key)
+                if entry is not None:
+                    return entry.model
+            t0 = time.perf_counter()
+            model = loader()
+            size = _model_size(model)
+            logger.info(
+                "Loaded model %s (%.0f MB) in %.1fs",
+                key, size / 1e6, time.perf_counter() - t0,
+            )
+            with self._lock:
+                self._entries[key] = _Entry(model, size, time.monotonic())
+                self._loading.pop(key, None)
+                self._evict()
+                self._start_reaper()
+            return model
+
+    @contextmanager
+    def hold(self, *keys: Hashable) -> Iterator[None]:
+        """Protect the models under ``keys`` from eviction while the block runs.
+
+        Keys may be held before their model is loaded; the hold applies as
+        soon as it is.
+        """
+        with self._lock:
+            for key in keys:
+                self._holds[key] = self._holds.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._holds[key] -= 1
+                    if not self._holds[key]:
+                        del self._holds[key]
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.last_used = time.monotonic()
+                self._evict()
+
+    def preload(self, key: Hashable, loader: Callable[[], Any]) -> threading.Thread:
+        """Load ``key`` on a background thread; load errors are only logged."""
+
+        def run():
+            try:
+                self.get(key, loader)
+            except Exception:
+                logger.warning("Preloading model %s failed", key, exc_info=True)
+
+        thread = threading.Thread(target=run, name=f"preload-{key}", daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def memory_used(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def evict(self, key: Hashable) -> bool:
+        """Drop ``key`` unless it is held; returns whether it was dropped."""
+        with self._lock:
+            if key not in self._entries or self._held(key):
+                return False
+            del self._entries[key]
+            logger.info("Evicted model %s", key)
+            return True
+
+    def evict_idle(self) -> None:
+        with self._lock:
+            self._evict()
+
+    def _touch(self, key: Hashable) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(key)
+        return entry
+
+    def _held(self, key: Hashable) -> bool:
+        return key in self._holds
+
+    def _evict(self) -> None:
+        """Drop idle models, then least recently used ones until within budget.
+
+        The most recently used model always stays, even if it alone exceeds
+        the budget.
+        """
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if not self._held(key) and now - entry.last_used > self.idle_timeout:
+                del self._entries[key]
+                logger.info("Evicted idle model %s", key)
+        used = sum(e.size for e in self._entries.values())
+        for key in list(self._entries)[:-1]:
+            if used <= self.budget:
+                break
+            if self._held(key):
+                continue
+            used -= self._entries.pop(key).size
+            logger.info("Evicted model %s (memory budget)", key)
+
+    def _start_reaper(self) -> None:
+        if self._reaper is not None:
+            return
+
+        def reap():
+            while True:
+                time.sleep(_REAP_INTERVAL_S)
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+
+_manager: ModelManager | None = None
+
+
+def get_manager() -> ModelManager:
+    """Singleton model manager of this process."""
+    global _manager
+    if _manager is None:
+        _manager = ModelManager()
+    return _manager
@@ -48,6 +48,9 @@ class CompressResult:
     encode_time: float
     backend_name: str
     params: dict = field(default_factory=dict)
+    tiers: dict[float, Path] = field(default_factory=dict)  # extra bitrates, same pass
+    cache_hit: bool | None = None  # None: result cache not used
+    resumed: bool = False  # taken from the batch manifest, nothing was written
 
 
 @dataclass
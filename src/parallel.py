@@ -0,0 +1,206 @@
+"""Parallel batch compression in worker processes.
+
+One process with one torch thread pool leaves most cores of a large machine
+idle. :class:`ParallelCompressor` starts N worker processes, each importing
+the backends, loading its own model and limiting torch to its share of the
+cores. Jobs are handed out in small chunks through a queue, so fast workers
+simply take more of them, and every worker runs the chunk through the
+codec's ``compress_batch``.
+
+Results stream back to the caller as they finish. Cancellation sets a shared
+event the workers check between files; workers still busy after a short
+grace period are terminated and their partial outputs removed.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from . import backends, registry  # noqa: F401  (backends first, they register the codecs)
+from .backends.base import BaseAudioCodec
+from .models import CompressResult
+
+logger = logging.getLogger(__name__)
+
+# Jobs per queue item. Small chunks balance the load; more than one lets a
+# worker batch short clips across files.
+_CHUNK_JOBS = 4
+# Seconds busy workers get to notice a cancellation before they are killed.
+_CANCEL_GRACE_S = 2.0
+_POLL_S = 0.2
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def default_workers() -> int:
+    """Worker count that leaves each worker at least two torch threads."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def _worker_main(codec_name, params, threads, tasks, events, cancel) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already fixed once torch ran parallel work
+
+    codec = registry.get(codec_name)
+    try:
+        while not cancel.is_set():
+            chunk = tasks.get()
+            if chunk is None:
+                break
+
+            def started_cb(k, chunk=chunk):
+                if cancel.is_set():
+                    raise _Cancelled
+                events.put(("started", chunk[k][0], None))
+
+            reported = set()
+            try:
+                for k, result in codec.compress_batch(
+                    [(audio_path, output_path) for _, audio_path, output_path in chunk],
+                    params,
+                    started_cb=started_cb,
+                ):
+                    reported.add(k)
+                    if isinstance(result, Exception):
+                        events.put(("error", chunk[k][0], str(result)))
+                    else:
+                        events.put(("finished", chunk[k][0], result))
+            except _Cancelled:
+                break
+            except Exception as exc:
+                logger.exception("Worker %d failed on a chunk", os.getpid())
+                for k, (i, _, _) in enumerate(chunk):
+                    if k not in reported:
+                        events.put(("error", i, str(exc)))
+    finally:
+        events.put(("exit", os.getpid(), None))
+
+
+class ParallelCompressor:
+    """Runs ``compress_batch`` of a registered codec in worker processes."""
+
+    def __init__(
+        self,
+        codec: BaseAudioCodec,
+        workers: int | None = None,
+        threads_per_worker: int | None = None,
+    ):
+        self._codec = codec
+        self._workers = max(1, workers or default_workers())
+        self._threads = max(
+            1, threads_per_worker or (os.cpu_count() or 1) // self._workers
+        )
+        self._ctx = mp.get_context("spawn")  # no forked torch or Qt state
+        self._cancel = self._ctx.Event()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def cancel(self) -> None:
+        """Ask every worker to stop after its current file."""
+        self._cancel.set()
+
+    def compress_batch(
+        self,
+        jobs: list[tuple[Path, Path]],
+        params: dict,
+        started_cb: Callable[[int], None] | None = None,
+    ) -> Iterator[tuple[int, CompressResult | Exception]]:
+        """Same contract as :meth:`BaseAudioCodec.compress_batch`, run in parallel.
+
+        Jobs that were never started because of a cancellation yield nothing.
+        """
+        if not jobs:
+            return
+        self._cancel.clear()
+        tasks = self._ctx.Queue()
+        events = self._ctx.Queue()
+        indexed = [(i, Path(a), Path(o)) for i, (a, o) in enumerate(jobs)]
+        for pos in range(0, len(indexed), _CHUNK_JOBS):
+            tasks.put(indexed[pos:pos + _CHUNK_JOBS])
+        n_workers = min(self._workers, -(-len(jobs) // _CHUNK_JOBS))
+        for _ in range(n_workers):
+            tasks.put(None)
+
+        procs = [
+            self._ctx.Process(
+                target=_worker_main,
+                args=(self._codec.name, params, self._threads, tasks, events, self._cancel),
+                daemon=True,
+            )
+            for _ in range(n_workers)
+        ]
+        for p in procs:
+            p.start()
+        logger.info(
+            "Parallel batch: %d jobs, %d workers x %d threads",
+            len(jobs), n_workers, self._threads,
+        )
+
+        running = set()  # started, no result yet
+        reported = set()
+        alive = n_workers
+        cancelled_at = None
+        try:
+            while alive:
+                try:
+                    kind, i, payload = events.get(timeout=_POLL_S)
+                except queue.Empty:
+                    if self._cancel.is_set():
+                        cancelled_at = cancelled_at or time.monotonic()
+                        if time.monotonic() - cancelled_at > _CANCEL_GRACE_S:
+                            break
+                    if not any(p.is_alive() for p in procs):
+                        break  # a worker died without saying goodbye
+                    continue
+                if kind == "exit":
+                    alive -= 1
+                elif kind == "started":
+                    running.add(i)
+                    if started_cb:
+                        started_cb(i)
+                else:
+                    running.discard(i)
+                    reported.add(i)
+                    yield i, (RuntimeError(payload) if kind == "error" else payload)
+
+            if not self._cancel.is_set():
+                for i in range(len(jobs)):
+                    if i not in reported:
+                        yield i, RuntimeError("Worker process exited unexpectedly")
+        finally:
+            self._cancel.set()
+            deadline = (cancelled_at or time.monotonic()) + _CANCEL_GRACE_S
+            for p in procs:
+                p.join(max(0.0, deadline - time.monotonic()))
+                if p.is_alive():
+                    p.terminate()
+                    p.join()
+            for i in running:
+                self._remove_outputs(jobs[i][1], params)
+            tasks.cancel_join_thread()
+            tasks.close()
+            events.close()
+
+    def _remove_outputs(self, output_path: Path, params: dict) -> None:
+        """Delete the partial main output and tier files of an interrupted job."""
+        try:
+            paths = self._codec.output_paths(output_path, params)
+        except ValueError:
+            return  # invalid params: the job failed before writing anything
+        for path in paths:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,202 @@
+"""On-disk cache of audio probe results.
+
+:func:`~src.audio_io.get_audio_info` starts an ffprobe process per call.
+:class:`ProbeCache` keeps its results in SQLite, keyed by path and
+invalidated by a change of size or mtime, so selecting the same folder again
+costs one ``stat`` per file. :meth:`ProbeCache.probe_many` looks up a whole
+list at once and probes the misses on a thread pool (ffprobe runs outside
+the GIL). Set ``CGC_PROBE_CACHE`` to move the database.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .audio_io import get_audio_info
+from .models import AudioInfo
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path(
+    os.environ.get(
+        "CGC_PROBE_CACHE", Path.home() / ".cache" / "cgc_audio_compress" / "probe.sqlite3"
+    )
+)
+
+_PROBE_THREADS = 8
+# Rows per SQLite statement (stays below its host parameter limit) and
+# probe results per write transaction.
+_LOOKUP_CHUNK = 500
+_WRITE_BATCH = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    channels INTEGER NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    bitrate_kbps REAL NOT NULL,
+    format_name TEXT NOT NULL
+)
+"""
+
+
+class ProbeCache:
+    """SQLite-backed ``path -> AudioInfo`` cache, safe to share between threads."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            logger.warning(
+                "Cannot open probe cache %s, keeping it in memory", self.path, exc_info=True
+            )
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._db.execute(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def lookup(self, paths: list[Path]) -> dict[Path, AudioInfo]:
+        """Cached infos of ``paths`` whose size and mtime are unchanged."""
+        stats = {}
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            stats[str(path.absolute())] = (path, st.st_size, st.st_mtime_ns)
+
+        found = {}
+        keys = list(stats)
+        with self._lock:
+            for pos in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[pos:pos + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT * FROM probes WHERE path IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, size, mtime_ns, *info in rows:
+                    path, cur_size, cur_mtime = stats[key]
+                    if (size, mtime_ns) == (cur_size, cur_mtime):
+                        found[path] = AudioInfo(*info)
+        return found
+
+    def store(self, entries: list[tuple[Path, AudioInfo]]) -> None:
+        """Remember probe results, stamped with each file's current size and mtime."""
+        rows = []
+        for path, info in entries:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            rows.append((
+                str(path.absolute()), st.st_size, st.st_mtime_ns, info.duration, info.channels,
+                info.sample_rate, info.bitrate_kbps, info.format_name,
+            ))
+        try:
+            with self._lock, self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error:
+            logger.warning("Writing the probe cache failed", exc_info=True)
+
+    def probe(self, path: Path) -> AudioInfo:
+        """Info of one file, probing it only on a cache miss."""
+        path = Path(path)
+        info = self.lookup([path]).get(path)
+        if info is None:
+            info = get_audio_info(path)
+            self.store([(path, info)])
+        return info
+
+    def probe_many(
+        self,
+        paths: list[Path],
+        workers: int = _PROBE_THREADS,
+        progress_cb: Callable[[int, int], None] | None = None,
+        cancelled: Callable[[], bool] | None = None,
+    ) -> Iterator[tuple[int, AudioInfo | Exception]]:
+        """Yield ``(index, info)`` for every path, cache hits first.
+
+        Misses are probed on ``workers`` threads and yielded as they finish;
+        a file that cannot be probed yields its exception. ``progress_cb(done,
+        total)`` follows every result. Once ``cancelled()`` returns True no
+        further probes are started.
+        """
+        paths = [Path(p) for p in paths]
+        total = len(paths)
+        done = 0
+        hits = self.lookup(paths)
+        misses = []
+        for i, path in enumerate(paths):
+            info = hits.get(path)
+            if info is None:
+                misses.append(i)
+                continue
+            done += 1
+            yield i, info
+            if progress_cb:
+                progress_cb(done, total)
+        if not misses:
+            return
+
+        pending: list[tuple[Path, AudioInfo]] = []
+        pool = ThreadPoolExecutor(workers, thread_name_prefix="probe")
+        try:
+            futures = {pool.submit(self._probe_one, paths[i], cancelled): i for i in misses}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    info = future.result()
+                except Exception as exc:
+                    result = exc
+                else:
+                    if info is None:
+                        continue  # cancelled before it started
+                    pending.append((paths[i], info))
+                    result = info
+                done += 1
+                yield i, result
+                if progress_cb:
+                    progress_cb(done, total)
+                if len(pending) >= _WRITE_BATCH:
+                    self.store(pending)
+                    pending = []
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if pending:
+                self.store(pending)
+
+    @staticmethod
+    def _probe_one(path: Path, cancelled: Callable[[], bool] | None) -> AudioInfo | None:
+        if cancelled is not None and cancelled():
+            return None
+        return get_audio_info(path)
+
+
+_cache: ProbeCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_probe_cache() -> ProbeCache:
+    """Singleton probe cache of this process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProbeCache()
+        return _cache
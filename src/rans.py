@@ -0,0 +1,211 @@
+"""Interleaved static-table rANS coder for EnCodec codes, vectorized with NumPy.
+
+Every frame is coded independently with ``lanes`` interleaved rANS states
+(32-bit state, 16-bit renormalization words). Symbol ``j`` of a frame goes
+to lane ``j % lanes`` and uses the frequency table of its codebook. Frames
+of equal shape are processed together, so each Python-level step advances
+``n_frames * lanes`` states at once.
+
+Short frames use ``LANES`` lanes. :func:`lanes_for` gives long frames, such
+as the single whole-file frame of the unsegmented 24 kHz model, one lane
+per ``_SYMBOLS_PER_LANE`` symbols, so every frame takes about that many
+Python-level steps whatever its length. The states cost 4 bytes per lane.
+
+Frame payload: <final states: lanes * u32><renormalization words: u16[]>
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+
+import numpy as np
+
+LANES = 4
+_SYMBOLS_PER_LANE = 1024
+SCALE_BITS = 14
+_RANS_L = 1 << 16  # lower bound of the normalized state interval
+_TABLE_HEADER = struct.Struct("<BHHI")  # scale_bits, n_codebooks, n_symbols, zlib size
+
+
+class RansTables:
+    """Per-codebook frequency tables plus derived cumulative and lookup tables."""
+
+    def __init__(self, freq: np.ndarray, scale_bits: int = SCALE_BITS):
+        self.freq = np.ascontiguousarray(freq, dtype=np.uint32)
+        self.scale_bits = scale_bits
+        total = 1 << scale_bits
+        if (self.freq.sum(axis=1) != total).any() or (self.freq == 0).any():
+            raise ValueError("Frequency tables must be positive and sum to 2**scale_bits")
+        self.cum = np.zeros_like(self.freq)
+        self.cum[:, 1:] = np.cumsum(self.freq, axis=1)[:, :-1]
+        n_codebooks, n_symbols = self.freq.shape
+        self.lut = np.stack([
+            np.repeat(np.arange(n_symbols, dtype=np.uint16), self.freq[k])
+            for k in range(n_codebooks)
+        ])
+
+    @property
+    def n_codebooks(self) -> int:
+        return self.freq.shape[0]
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, scale_bits: int = SCALE_BITS) -> RansTables:
+        """Normalize symbol counts (n_codebooks, n_symbols) to 2**scale_bits.
+
+        Every symbol keeps a frequency of at least 1 so codes unseen while
+        counting stay encodable.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        n_codebooks, n_symbols = counts.shape
+        total = 1 << scale_bits
+        spare = total - n_symbols
+        if spare < 0:
+            raise ValueError(f"{n_symbols} symbols do not fit into {scale_bits} scale bits")
+
+        freq = np.empty_like(counts)
+        for k in range(n_codebooks):
+            c = counts[k]
+            n = int(c.sum())
+            if n == 0:
+                freq[k] = total // n_symbols
+                freq[k, : total - freq[k].sum()] += 1
+                continue
+            scaled = c * spare
+            f = 1 + scaled // n
+            # Hand out the rounding remainder to the largest fractional parts.
+            remainder = total - int(f.sum())
+            order = np.argsort(-(scaled % n), kind="stable")
+            f[order[:remainder]] += 1
+            freq[k] = f
+        return cls(freq, scale_bits)
+
+    def cost_bits(self, counts: np.ndarray) -> float:
+        """Ideal coded size in bits of symbols with the given counts."""
+        k = counts.shape[0]
+        probs = self.freq[:k] / float(1 << self.scale_bits)
+        return float(-(counts * np.log2(probs)).sum())
+
+    def to_bytes(self) -> bytes:
+        n_codebooks, n_symbols = self.freq.shape
+        body = zlib.compress(self.freq.astype("<u2").tobytes(), 9)
+        return _TABLE_HEADER.pack(self.scale_bits, n_codebooks, n_symbols, len(body)) + body
+
+    @classmethod
+    def from_buffer(cls, data, offset: int = 0) -> tuple[RansTables, int]:
+        """Parse a table block; returns the tables and the block size in bytes."""
+        scale_bits, n_codebooks, n_symbols, size = _TABLE_HEADER.unpack_from(data, offset)
+        start = offset + _TABLE_HEADER.size
+        raw = zlib.decompress(bytes(data[start:start + size]))
+        freq = np.frombuffer(raw, dtype="<u2").reshape(n_codebooks, n_symbols)
+        return cls(freq, scale_bits), _TABLE_HEADER.size + size
+
+
+def lanes_for(n_symbols: int) -> int:
+    """Lane count of a frame holding ``n_symbols`` codes."""
+    return max(LANES, n_symbols // _SYMBOLS_PER_LANE)
+
+
+def _codebook_map(n_codebooks: int, n_steps: int) -> np.ndarray:
+    """Codebook of every symbol of a (K, T) frame flattened row-major."""
+    return np.repeat(np.arange(n_codebooks), n_steps)
+
+
+def encode_frames(codes: np.ndarray, tables: RansTables, lanes: int = LANES) -> list[bytes]:
+    """rANS-code a batch of equal-shape frames (F, K, T); one payload per frame."""
+    n_frames, n_codebooks, n_steps = codes.shape
+    symbols = codes.reshape(n_frames, -1).astype(np.int64)
+    cbs = _codebook_map(n_codebooks, n_steps)
+    n = symbols.shape[1]
+    freq = tables.freq.astype(np.uint64)
+    cum = tables.cum.astype(np.uint64)
+    scale_bits = tables.scale_bits
+    bound = np.uint64((_RANS_L >> scale_bits) << 16)
+
+    x = np.full((n_frames, lanes), _RANS_L, dtype=np.uint64)
+    emitted_frames = []
+    emitted_words = []
+    # rANS works back to front; the decoder then reads the words in reverse.
+    for j0 in range(((n - 1) // lanes) * lanes if n else -1, -1, -lanes):
+        m = min(lanes, n - j0)
+        s = symbols[:, j0:j0 + m]
+        k = cbs[j0:j0 + m]
+        f = freq[k, s]
+        c = cum[k, s]
+        xs = x[:, :m]
+
+        emit = xs >= bound * f
+        if emit.any():
+            frame_ids = np.nonzero(emit)[0]
+            emitted_frames.append(frame_ids)
+            emitted_words.append((xs[emit] & 0xFFFF).astype(np.uint16))
+            xs = np.where(emit, xs >> np.uint64(16), xs)
+
+        x[:, :m] = ((xs // f) << np.uint64(scale_bits)) + (xs % f) + c
+
+    payloads = []
+    if emitted_words:
+        frame_ids = np.concatenate(emitted_frames)
+        words = np.concatenate(emitted_words)
+        order = np.argsort(frame_ids, kind="stable")
+        per_frame = np.split(words[order], np.cumsum(np.bincount(frame_ids, minlength=n_frames))[:-1])
+    else:
+        per_frame = [np.zeros(0, dtype=np.uint16)] * n_frames
+
+    states = x.astype("<u4")
+    for i in range(n_frames):
+        payloads.append(states[i].tobytes() + per_frame[i][::-1].astype("<u2").tobytes())
+    return payloads
+
+
+def decode_frames(
+    payloads: list, n_codebooks: int, n_steps: int, tables: RansTables, lanes: int = LANES
+) -> np.ndarray:
+    """Inverse of :func:`encode_frames` — returns codes shaped (F, K, T) as int16."""
+    n_frames = len(payloads)
+    cbs = _codebook_map(n_codebooks, n_steps)
+    n = n_codebooks * n_steps
+    freq = tables.freq.astype(np.uint64)
+    cum = tables.cum.astype(np.uint64)
+    lut = tables.lut
+    scale_bits = tables.scale_bits
+    mask = np.uint64((1 << scale_bits) - 1)
+
+    x = np.empty((n_frames, lanes), dtype=np.uint64)
+    streams = []
+    for i, payload in enumerate(payloads):
+        raw = np.frombuffer(payload, dtype=np.uint8)
+        if len(raw) < lanes * 4 or len(raw) % 2:
+            raise ValueError("Corrupt rANS payload")
+        x[i] = raw[:lanes * 4].view("<u4")
+        streams.append(raw[lanes * 4:].view("<u2"))
+    lengths = np.array([len(w) for w in streams], dtype=np.int64)
+    base = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    words = np.concatenate(streams).astype(np.uint64) if n_frames else np.zeros(0, np.uint64)
+    pos = np.zeros(n_frames, dtype=np.int64)
+
+    out = np.empty((n_frames, n), dtype=np.int16)
+    for j0 in range(0, n, lanes):
+        m = min(lanes, n - j0)
+        k = cbs[j0:j0 + m]
+        xs = x[:, :m]
+
+        slot = xs & mask
+        s = lut[k, slot.astype(np.int64)]
+        out[:, j0:j0 + m] = s
+        xs = freq[k, s] * (xs >> np.uint64(scale_bits)) + slot - cum[k, s]
+
+        need = xs < _RANS_L
+        if need.any():
+            # Lanes of a frame read their words in descending lane order.
+            rank = np.cumsum(need[:, ::-1], axis=1)[:, ::-1] - 1
+            idx = base[:, None] + pos[:, None] + rank
+            if (pos + need.sum(axis=1) > lengths).any():
+                raise ValueError("rANS payload ended prematurely")
+            refill = (xs << np.uint64(16)) | words[np.where(need, idx, 0)]
+            xs = np.where(need, refill, xs)
+            pos += need.sum(axis=1)
+
+        x[:, :m] = xs
+
+    return out.reshape(n_frames, n_codebooks, n_steps)
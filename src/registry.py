@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from .backends.base import BaseAudioCodec
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # backends import the registry to register themselves
+    from .backends.base import BaseAudioCodec
 
 _codecs: dict[str, BaseAudioCodec] = {}
 
@@ -0,0 +1,119 @@
+"""Cached sinc resampling, whole-signal or block by block.
+
+``torchaudio.functional.resample`` rebuilds its sinc kernel on every call and
+works on padded full-size copies of the input. :func:`get_resampler` keeps
+one kernel per ``(orig_sr, target_sr, method)`` for the life of the process,
+so a batch of 44.1 kHz files builds it once (once per worker process in
+parallel batches). :class:`StreamingResampler` applies it to a signal that
+arrives in blocks, carrying only the kernel's context between them, and
+:func:`resample` uses it to fill a preallocated output block by block.
+Both give the same samples as resampling the whole signal in one call.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+
+import torch
+import torch.nn.functional as F
+import torchaudio
+
+DEFAULT_METHOD = "sinc_interp_hann"
+# Input samples per block in resample(); bounds the size of its temporaries.
+_BLOCK_SAMPLES = 1 << 20
+
+
+@functools.lru_cache(maxsize=16)
+def get_resampler(
+    orig_sr: int, target_sr: int, method: str = DEFAULT_METHOD
+) -> torchaudio.transforms.Resample:
+    """Shared CPU resampler with a precomputed kernel."""
+    return torchaudio.transforms.Resample(orig_sr, target_sr, resampling_method=method).eval()
+
+
+class StreamingResampler:
+    """Resamples a signal fed as (..., samples) blocks of any size.
+
+    Concatenating the outputs of :meth:`process` and the final
+    :meth:`flush` equals resampling the whole signal at once, including the
+    zero-padded edges at both ends.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int, method: str = DEFAULT_METHOD):
+        self._passthrough = orig_sr == target_sr
+        resampler = get_resampler(orig_sr, target_sr, method)
+        gcd = math.gcd(orig_sr, target_sr)
+        self._orig = orig_sr // gcd
+        self._new = target_sr // gcd
+        self._kernel = getattr(resampler, "kernel", None)
+        self._width = getattr(resampler, "width", 0)
+        self._tail: torch.Tensor | None = None  # input from the next kernel position on
+        self._n_in = 0
+        self._n_out = 0
+
+    def process(self, block: torch.Tensor) -> torch.Tensor:
+        """Resampled output that ``block`` completes; may be empty."""
+        if self._passthrough:
+            return block
+        self._n_in += block.shape[-1]
+        if self._tail is None:
+            x = F.pad(block, (self._width, 0))
+        else:
+            x = torch.cat([self._tail, block], dim=-1)
+        return self._run(x)
+
+    def flush(self) -> torch.Tensor:
+        """Output for the rest of the signal; the stream ends here."""
+        if self._passthrough or self._tail is None:
+            return torch.zeros(0)
+        out = self._run(F.pad(self._tail, (0, self._width + self._orig)))
+        self._tail = None
+        total = -(-self._new * self._n_in // self._orig)
+        return out[..., :max(0, total - (self._n_out - out.shape[-1]))]
+
+    def _run(self, x: torch.Tensor) -> torch.Tensor:
+        """Apply the kernel at every position that lies completely inside ``x``."""
+        size = self._kernel.shape[-1]
+        n_positions = (x.shape[-1] - size) // self._orig + 1 if x.shape[-1] >= size else 0
+        used = n_positions * self._orig
+        self._tail = x[..., used:]
+        if not n_positions:
+            return x.new_zeros(*x.shape[:-1], 0)
+
+        lead = x.shape[:-1]
+        x = x[..., :used - self._orig + size].reshape(-1, 1, used - self._orig + size)
+        kernel = self._kernel.to(device=x.device, dtype=x.dtype)
+        out = F.conv1d(x, kernel, stride=self._orig)
+        out = out.transpose(1, 2).reshape(*lead, n_positions * self._new)
+        self._n_out += out.shape[-1]
+        return out
+
+
+def resample(
+    waveform: torch.Tensor,
+    orig_sr: int,
+    target_sr: int,
+    method: str = DEFAULT_METHOD,
+) -> torch.Tensor:
+    """Drop-in for ``torchaudio.functional.resample`` with a cached kernel.
+
+    Long inputs are resampled block by block into one preallocated output,
+    so besides input and output only a single block's temporaries exist.
+    """
+    if orig_sr == target_sr:
+        return waveform
+    gcd = math.gcd(orig_sr, target_sr)
+    length = waveform.shape[-1]
+    n_out = -(-(target_sr // gcd) * length // (orig_sr // gcd))
+    out = waveform.new_empty(*waveform.shape[:-1], n_out)
+
+    stream = StreamingResampler(orig_sr, target_sr, method)
+    pos = 0
+    for start in range(0, length, _BLOCK_SAMPLES):
+        piece = stream.process(waveform[..., start:start + _BLOCK_SAMPLES])
+        out[..., pos:pos + piece.shape[-1]] = piece
+        pos += piece.shape[-1]
+    piece = stream.flush()
+    out[..., pos:pos + piece.shape[-1]] = piece
+    return out
@@ -0,0 +1,208 @@
+"""Content-addressed cache of compression results.
+
+The same recording often arrives many times under different names. The
+cache key is a BLAKE2 hash of the source file's bytes combined with the
+backend, every compression parameter and the ECDC format version, so a
+repeated file is answered with the stored ``.ecdc`` output(s) instead of a
+new encode. Hits are materialized as a reflink where the filesystem
+supports it, else as a hard link, else as a copy.
+
+Entries live in ``CACHE_DIR/<key[:2]>/<key>/`` with a ``meta.json`` whose
+mtime marks the last use. Once the cache exceeds its budget, least recently
+used entries are removed. Set ``CGC_RESULT_CACHE`` to move the cache.
+"""
+
+from __future__ import annotations
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from .ecdc import FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(
+    os.environ.get(
+        "CGC_RESULT_CACHE", Path.home() / ".cache" / "cgc_audio_compress" / "results"
+    )
+)
+DEFAULT_BUDGET_MB = 4096
+
+# Bump when the entry layout changes; old entries are then never hit again.
+_CACHE_VERSION = 1
+_HASH_CHUNK = 1 << 20
+# Eviction trims to this share of the budget, so it does not rerun on every store.
+_EVICT_TO = 0.9
+_FICLONE = 0x40049409  # Linux ioctl: share the extents of another file
+
+
+def file_digest(path: Path) -> str:
+    """BLAKE2b-128 of a file's bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        while chunk := fh.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(src: Path, dst: Path) -> str:
+    """Make ``dst`` a reflink, hard link or copy of ``src``; returns which one."""
+    dst.unlink(missing_ok=True)
+    try:
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            fcntl.ioctl(fout.fileno(), _FICLONE, fin.fileno())
+        return "reflink"
+    except OSError:
+        dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+class ResultCache:
+    """Maps (source bytes, backend, params, format) to stored ECDC outputs."""
+
+    def __init__(self, root: Path = CACHE_DIR, budget_mb: int = DEFAULT_BUDGET_MB):
+        self.root = Path(root)
+        self.budget = budget_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._used: int | None = None  # bytes, estimated since the last scan
+
+    def configure(self, budget_mb: int) -> None:
+        with self._lock:
+            self.budget = budget_mb * 1024 * 1024
+        self._evict()
+
+    def key(self, audio_path: Path, backend: str, params: dict) -> str:
+        ident = json.dumps(
+            {
+                "source": file_digest(audio_path),
+                "backend": backend,
+                "params": params,
+                "format": FORMAT_VERSION,
+                "cache": _CACHE_VERSION,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(ident.encode(), digest_size=20).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def fetch(self, key: str, plan: list[tuple[float, Path]]) -> float | None:
+        """Place the cached outputs at the ``(bandwidth, path)`` pairs of ``plan``.
+
+        Returns the audio duration on a hit and None on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+            files = [(entry / f"{bw:g}.ecdc", path) for bw, path in plan]
+            for src, _ in files:
+                if src.stat().st_size != meta["sizes"][src.name]:
+                    raise ValueError(f"{src} changed after it was cached")
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError):
+            logger.warning("Dropping broken result cache entry %s", key, exc_info=True)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        try:
+            for src, dst in files:
+                method = link_or_copy(src, dst)
+        except OSError:
+            for _, dst in files:
+                dst.unlink(missing_ok=True)
+            logger.warning("Result cache entry %s vanished while in use", key, exc_info=True)
+            return None
+        try:
+            os.utime(entry / "meta.json")
+        except OSError:
+            pass  # evicted meanwhile; the placed outputs stay valid
+        logger.info("Result cache hit for %s (%s)", plan[0][1].name, method)
+        return float(meta["duration"])
+
+    def store(self, key: str, plan: list[tuple[float, Path]], duration: float) -> None:
+        """Add the freshly written outputs of ``plan``; failures are only logged."""
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=entry.parent))
+        except OSError:
+            logger.warning("Cannot write to result cache %s", self.root, exc_info=True)
+            return
+        try:
+            sizes = {}
+            for bw, path in plan:
+                name = f"{bw:g}.ecdc"
+                link_or_copy(path, tmp / name)
+                sizes[name] = (tmp / name).stat().st_size
+            (tmp / "meta.json").write_text(json.dumps({"duration": duration, "sizes": sizes}))
+            os.rename(tmp, entry)  # atomic; fails if another process stored it first
+        except OSError as exc:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if exc.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                logger.warning("Storing result cache entry %s failed", key, exc_info=True)
+            return
+
+        with self._lock:
+            if self._used is not None:
+                self._used += sum(sizes.values())
+            over = self._used is None or self._used > self.budget
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Scan all entries; drop the least recently used ones while over budget."""
+        entries = []
+        for meta_path in self.root.glob("*/*/meta.json"):
+            try:
+                size = sum(json.loads(meta_path.read_text())["sizes"].values())
+                entries.append((meta_path.stat().st_mtime, size, meta_path.parent))
+            except (OSError, KeyError, ValueError):
+                continue
+        used = sum(size for _, size, _ in entries)
+        with self._lock:
+            budget = self.budget
+        if used > budget:
+            entries.sort()
+            target = budget * _EVICT_TO
+            removed = 0
+            for _, size, entry in entries:
+                if used <= target:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                used -= size
+                removed += 1
+            logger.info("Evicted %d result cache entries", removed)
+        with self._lock:
+            self._used = used
+
+
+_cache: ResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Singleton result cache of this process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -0,0 +1,176 @@
+"""Bitrate downgrade of ECDC files without the model.
+
+EnCodec's residual VQ is nested: the codes of a lower bandwidth are the
+first codebooks of a higher one. A downgrade therefore only reads every
+frame, keeps its leading codebooks and writes a new file; nothing is
+decoded, so there is no generation loss and no model is loaded. The result
+equals a direct encode at the lower bandwidth.
+
+Progressive sources stay progressive, and only the layers holding the
+kept codebooks are read. LM-coded frames can only be unpacked by the
+language model and are rejected.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import re
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from .ecdc import DEFAULT_CODEBOOK_BITS, FRAME_LM, EcdcReader, EcdcWriter
+
+logger = logging.getLogger(__name__)
+
+# Frame stride of segmented models, for old files without a seek index.
+_SEGMENT_STRIDE = {48000: 47520}
+_TIER_STEM = re.compile(r"(.+)_(\d+(?:\.\d+)?)kbps")
+
+
+@dataclass
+class TranscodeResult:
+    source: Path
+    output: Path | None = None
+    n_frames: int = 0
+    source_size: int = 0
+    output_size: int = 0
+    skipped: bool = False  # already at or below the target bandwidth
+    error: str | None = None
+
+
+def tier_path(path: Path, bandwidth: float) -> Path:
+    """``<stem>_<bw>kbps.ecdc`` next to ``path``, as written by multi-bitrate encodes."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}_{bandwidth:g}kbps{path.suffix}")
+
+
+def _is_tier(path: Path, paths: set[Path]) -> bool:
+    """Whether ``path`` is the :func:`tier_path` copy of another file in ``paths``."""
+    match = _TIER_STEM.fullmatch(path.stem)
+    if match is None:
+        return False
+    base = path.with_name(match[1] + path.suffix)
+    return base in paths and tier_path(base, float(match[2])) == path
+
+
+def _kept_codebooks(reader: EcdcReader, bandwidth: float) -> int:
+    n_codebooks = int(reader.frames["n_codebooks"].max())
+    per_codebook = reader.bandwidth / n_codebooks
+    keep = round(bandwidth / per_codebook)
+    if keep < 1 or abs(keep * per_codebook - bandwidth) > 1e-3:
+        choices = ", ".join(f"{k * per_codebook:g}" for k in range(1, n_codebooks + 1))
+        raise ValueError(
+            f"{bandwidth:g} kbps is not a codebook prefix of {reader.path.name} "
+            f"(possible: {choices})"
+        )
+    return keep
+
+
+def _kept_layers(layers: list[int], keep: int) -> list[int]:
+    """Layer split of the first ``keep`` codebooks; the last layer may be cut short."""
+    kept = []
+    for n in layers:
+        if keep <= 0:
+            break
+        kept.append(min(n, keep))
+        keep -= n
+    return kept
+
+
+def downgrade_file(src: Path, dst: Path, bandwidth: float) -> TranscodeResult:
+    """Write ``src`` at the lower ``bandwidth`` to ``dst``."""
+    src, dst = Path(src), Path(dst)
+    result = TranscodeResult(src, source_size=src.stat().st_size)
+    with EcdcReader(src) as reader:
+        if bandwidth >= reader.bandwidth:
+            result.skipped = True
+            return result
+        if reader.frames["flags"].size and (reader.frames["flags"] & FRAME_LM).any():
+            raise ValueError(f"{src.name} is LM-coded; downgrading it needs the language model")
+        keep = _kept_codebooks(reader, bandwidth)
+        layers = _kept_layers(reader.layers, keep)
+
+    with EcdcReader(src, layers=len(layers) or None) as reader:
+        starts = reader.starts
+        if starts is None:
+            stride = _SEGMENT_STRIDE.get(reader.model_sr, 0)
+            starts = [i * stride for i in range(reader.n_frames)]
+        entropy = "rans" if reader.rans_tables is not None else "none"
+        # v1 stored every code as int16; EnCodec codes need 10 bits.
+        bits = DEFAULT_CODEBOOK_BITS if reader.version == 1 else reader.bits
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with EcdcWriter(
+                dst, reader.model_sr, bandwidth, bits,
+                entropy=entropy, expected_frames=reader.n_frames, layers=layers,
+            ) as writer:
+                for i in range(reader.n_frames):
+                    codes, scale = reader.read_frame(i)
+                    writer.write_frame(codes[:, :keep], scale, int(starts[i]))
+        except BaseException:
+            dst.unlink(missing_ok=True)
+            raise
+        result.n_frames = reader.n_frames
+
+    result.output = dst
+    result.output_size = dst.stat().st_size
+    return result
+
+
+def _downgrade_job(job: tuple[Path, Path], bandwidth: float) -> TranscodeResult:
+    src, dst = job
+    try:
+        return downgrade_file(src, dst, bandwidth)
+    except Exception as exc:
+        logger.warning("Downgrade of %s failed: %s", src.name, exc)
+        return TranscodeResult(src, error=str(exc))
+
+
+def downgrade_directory(
+    root: Path,
+    bandwidth: float,
+    output_dir: Path | None = None,
+    workers: int | None = None,
+    progress_cb: Callable[[str, int, int], None] | None = None,
+) -> Iterator[TranscodeResult]:
+    """Downgrade every ``.ecdc`` file below ``root`` in parallel.
+
+    With ``output_dir`` the tree is mirrored there under the same names;
+    otherwise each copy lands next to its source as :func:`tier_path`.
+    Results arrive in file order; ``progress_cb(filename, done, total)`` is
+    called after every file.
+    """
+    root = Path(root)
+    paths = sorted(p for p in root.rglob("*.ecdc") if p.is_file())
+    if output_dir is None:
+        # Never pick up the copies of an earlier run as sources.
+        found = set(paths)
+        paths = [p for p in paths if not _is_tier(p, found)]
+        jobs = [(p, tier_path(p, bandwidth)) for p in paths]
+    else:
+        jobs = [(p, Path(output_dir) / p.relative_to(root)) for p in paths]
+
+    run = partial(_downgrade_job, bandwidth=bandwidth)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        for n, job in enumerate(jobs, 1):
+            yield run(job)
+            if progress_cb:
+                progress_cb(job[0].name, n, len(jobs))
+        return
+
+    # Spawned, not forked: the caller may hold torch, OpenMP or Qt threads.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        for n, ((src, _), result) in enumerate(
+            zip(jobs, pool.map(run, jobs, chunksize=chunksize)), 1
+        ):
+            yield result
+            if progress_cb:
+                progress_cb(src.name, n, len(jobs))
@@ -0,0 +1,120 @@
+"""Shared fixtures.
+
+The pretrained EnCodec and language model weights are a download. The
+tests put checkpoints with random weights where ``torch.hub`` looks for
+them instead: codes and file formats do not depend on the weights, and
+spawned worker processes inherit ``TORCH_HOME`` and load the same models.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from src.audio_io import WavWriter
+
+_CHECKPOINTS = {
+    "encodec_model_24khz": ("encodec_24khz-d7cc33bc.th", "encodec_lm_24khz-1608e3c0.th"),
+    "encodec_model_48khz": ("encodec_48khz-7e698e3e.th", "encodec_lm_48khz-7add9fc3.th"),
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def encodec_checkpoints(tmp_path_factory):
+    from encodec import EncodecModel
+    from encodec.model import LMModel
+
+    torch_home = tmp_path_factory.mktemp("torch_home")
+    checkpoints = torch_home / "hub" / "checkpoints"
+    checkpoints.mkdir(parents=True)
+    torch.manual_seed(0)
+    for factory, (name, lm_name) in _CHECKPOINTS.items():
+        model = getattr(EncodecModel, factory)(pretrained=False)
+        torch.save(model.state_dict(), checkpoints / name)
+        lm = LMModel(
+            model.quantizer.n_q, model.quantizer.bins, num_layers=5, dim=200,
+            past_context=int(3.5 * model.frame_rate),
+        )
+        torch.save(lm.state_dict(), checkpoints / lm_name)
+    old = os.environ.get("TORCH_HOME")
+    os.environ["TORCH_HOME"] = str(torch_home)
+    yield torch_home
+    if old is None:
+        del os.environ["TORCH_HOME"]
+    else:
+        os.environ["TORCH_HOME"] = old
+
+
+def write_wav(path, seconds: float, sample_rate: int = 48000, channels: int = 2, seed: int = 0):
+    """Noise test signal as a float WAV file."""
+    gen = torch.Generator().manual_seed(seed)
+    with WavWriter(path, sample_rate, channels) as writer:
+        writer.write(torch.randn(channels, int(seconds * sample_rate), generator=gen) * 0.1)
+    return path
+
+
+def read_wav(path):
+    """``(samples, sample_rate)`` of a float WAV or RF64 file; samples are (channels, n)."""
+    data = Path(path).read_bytes()
+    pos, data_size, channels, sample_rate = 12, None, 0, 0
+    while pos + 8 <= len(data):
+        chunk, size = struct.unpack_from("<4sI", data, pos)
+        if chunk == b"ds64":
+            (data_size,) = struct.unpack_from("<Q", data, pos + 16)
+        elif chunk == b"fmt ":
+            channels, sample_rate = struct.unpack_from("<HI", data, pos + 10)
+        elif chunk == b"data":
+            count = (size if data_size is None else data_size) // 4
+            samples = np.frombuffer(data, "<f4", count, pos + 8)
+            return samples.reshape(-1, channels).T, sample_rate
+        pos += 8 + size + (size & 1)
+    raise ValueError(f"No data chunk in {path}")
+
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="decoding audio files needs ffmpeg and ffprobe",
+)
+
+
+@pytest.fixture
+def audio_file(tmp_path, monkeypatch):
+    """Factory for source files that ``load_audio`` reads without ffmpeg.
+
+    Each file holds a saved ``(waveform, sample_rate)`` and torchaudio's
+    loader is pointed at ``torch.load``, so sources work in this process
+    only (not in spawned workers).
+    """
+    import src.audio_io as audio_io
+
+    monkeypatch.setattr(audio_io.torchaudio, "load", lambda path: torch.load(path))
+
+    def make(name: str, seconds: float, sample_rate: int = 48000, channels: int = 2, seed=0):
+        gen = torch.Generator().manual_seed(seed)
+        waveform = torch.randn(channels, int(seconds * sample_rate), generator=gen) * 0.1
+        path = tmp_path / name
+        torch.save((waveform, sample_rate), path)
+        return path
+
+    return make
+
+
+def write_ecdc(path, n_frames=4, n_codebooks=8, n_steps=150, seed=0, **writer_kwargs):
+    """ECDC file of random 48 kHz frames without running a model; returns the codes."""
+    from src.ecdc import EcdcWriter
+
+    gen = torch.Generator().manual_seed(seed)
+    frames = [
+        torch.randint(0, 1024, (1, n_codebooks, n_steps), generator=gen) for _ in range(n_frames)
+    ]
+    bandwidth = n_codebooks * 1.5  # 48 kHz model: 150 frames/s x 10 bits per codebook
+    with EcdcWriter(path, 48000, bandwidth, expected_frames=n_frames, **writer_kwargs) as writer:
+        for i, codes in enumerate(frames):
+            writer.write_frame(codes, torch.tensor([[0.5]]), i * 47520)
+    return frames
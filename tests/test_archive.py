@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import pytest
+import torch
+
+from src.archive import ArchiveReader, ArchiveWriter, extract_track, list_tracks
+
+from conftest import write_ecdc
+
+
+@pytest.fixture
+def tracks(tmp_path):
+    """Three standalone ECDC files and their codes, by track name."""
+    made = {}
+    for i, name in enumerate(["intro.ecdc", "talk.ecdc", "outro.ecdc"]):
+        path = tmp_path / f"src{i}.ecdc"
+        made[name] = (path, write_ecdc(path, n_frames=2 + i, seed=i))
+    return made
+
+
+def _add(writer, tracks, names):
+    for name in names:
+        path, codes = tracks[name]
+        writer.add_file(name, path, duration=len(codes) * 0.99)
+
+
+def test_directory_locates_every_track(tmp_path, tracks):
+    archive = tmp_path / "a.ecda"
+    with ArchiveWriter(archive) as writer:
+        _add(writer, tracks, tracks)
+
+    entries = list_tracks(archive)
+    assert [e.name for e in entries] == list(tracks)
+    assert all(e.model_sr == 48000 for e in entries)
+    with ArchiveReader(archive) as reader:
+        assert "talk.ecdc" in reader and "missing.ecdc" not in reader
+        assert reader.total_duration == pytest.approx(sum(e.duration for e in entries))
+        for name, (path, codes) in tracks.items():
+            assert bytes(reader.read_bytes(name)) == path.read_bytes()
+            with reader.open_track(name) as track:
+                assert track.n_frames == len(codes)
+                assert all(torch.equal(track.read_frame(i)[0], c) for i, c in enumerate(codes))
+        with pytest.raises(KeyError):
+            reader.entry("missing.ecdc")
+
+    out = extract_track(archive, "outro.ecdc", tmp_path / "x" / "outro.ecdc")
+    assert out.read_bytes() == tracks["outro.ecdc"][0].read_bytes()
+
+
+def test_append_keeps_old_tracks_and_rejects_duplicates(tmp_path, tracks):
+    archive = tmp_path / "a.ecda"
+    with ArchiveWriter(archive) as writer:
+        _add(writer, tracks, ["intro.ecdc"])
+    with ArchiveWriter(archive) as writer:
+        assert len(writer) == 1
+        _add(writer, tracks, ["talk.ecdc"])
+        with pytest.raises(ValueError, match="already in archive"):
+            _add(writer, tracks, ["intro.ecdc"])
+    assert [e.name for e in list_tracks(archive)] == ["intro.ecdc", "talk.ecdc"]
+
+    with ArchiveWriter(archive, append=False) as writer:
+        _add(writer, tracks, ["intro.ecdc"])
+    assert [e.name for e in list_tracks(archive)] == ["intro.ecdc"]
+
+
+def test_empty_and_foreign_files(tmp_path):
+    with ArchiveWriter(tmp_path / "empty.ecda"):
+        pass
+    assert list_tracks(tmp_path / "empty.ecda") == []
+    (tmp_path / "junk.ecda").write_bytes(b"RIFF" + bytes(40))
+    with pytest.raises(ValueError, match="Not an ECDA archive"):
+        list_tracks(tmp_path / "junk.ecda")
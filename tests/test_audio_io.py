@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from src import audio_io
+from src.models import AudioInfo
+
+from conftest import read_wav
+
+
+def _fake_ffmpeg(monkeypatch, pcm, probed_s):
+    """Serve ``pcm`` (samples, channels) like ``_iter_ffmpeg_pcm``, through one reused buffer."""
+    info = AudioInfo(probed_s, pcm.shape[1], 48000, 0.0, "mp3")
+
+    def iter_pcm(path, info, block_samples, sample_rate, channels):
+        buf = np.empty((block_samples, channels), np.float32)
+        for start in range(0, len(pcm), block_samples):
+            block = pcm[start:start + block_samples]
+            buf[:len(block)] = block
+            yield buf[:len(block)]
+
+    monkeypatch.setattr(audio_io, "_get_info_ffprobe", lambda path: info)
+    monkeypatch.setattr(audio_io, "_iter_ffmpeg_pcm", iter_pcm)
+
+
+@pytest.mark.parametrize("probed_s, decoded", [(600.0, 4800), (0.1, 48000)])
+def test_ffmpeg_loader_returns_exactly_the_decoded_samples(monkeypatch, probed_s, decoded):
+    pcm = np.random.default_rng(0).standard_normal((decoded, 2)).astype(np.float32)
+    _fake_ffmpeg(monkeypatch, pcm, probed_s)
+    monkeypatch.setattr(audio_io, "_FFMPEG_BLOCK_SAMPLES", 1000)
+    audio, sr = audio_io._load_audio_ffmpeg(Path("x.mp3"))
+    assert sr == 48000
+    np.testing.assert_array_equal(audio.numpy(), pcm.T)
+    # An overestimated duration must not keep the oversized buffer alive.
+    assert audio.untyped_storage().nbytes() < 2 * pcm.nbytes
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_streamed_ffmpeg_blocks_match_the_whole_file(tmp_path, monkeypatch, channels):
+    source = tmp_path / "x.mp3"
+    source.write_bytes(b"ID3")
+    pcm = np.random.default_rng(1).standard_normal((10000, channels)).astype(np.float32)
+    _fake_ffmpeg(monkeypatch, pcm, 10000 / 48000)
+    whole, _ = audio_io._load_audio_ffmpeg(source)
+    # Hold on to every block, as a chunked encode does across segments.
+    blocks = list(audio_io.iter_audio_blocks(source, 3200))
+    assert [b.shape[-1] for b in blocks] == [3200, 3200, 3200, 400]
+    assert all(b.is_contiguous() for b in blocks)
+    torch.testing.assert_close(torch.cat(blocks, dim=-1), whole, rtol=0, atol=0)
+
+
+@pytest.mark.parametrize("limit", [audio_io.WavWriter._LIMIT, 4000])
+def test_wav_writer_switches_to_rf64_past_the_limit(tmp_path, monkeypatch, limit):
+    monkeypatch.setattr(audio_io.WavWriter, "_LIMIT", limit)
+    waveform = torch.randn(2, 3000)
+    path = tmp_path / "out.wav"
+    with audio_io.WavWriter(path, 48000, 2) as writer:
+        for block in waveform.split(700, dim=1):
+            writer.write(block)
+
+    data = path.read_bytes()
+    data_size = 3000 * 2 * 4
+    if limit > data_size:
+        assert data[:4] == b"RIFF" and data[12:16] == b"JUNK"
+        assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    else:
+        assert data[:4] == b"RF64" and data[12:16] == b"ds64"
+        riff_size, ds64_data, n_samples = struct.unpack_from("<QQQ", data, 20)
+        assert (riff_size, ds64_data, n_samples) == (len(data) - 8, data_size, 3000)
+    samples, sample_rate = read_wav(path)
+    assert sample_rate == 48000
+    np.testing.assert_array_equal(samples, waveform.numpy())
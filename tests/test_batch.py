@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pytest
+import torch
+
+from src.backends import encodec_backend
+from src.backends.encodec_backend import EnCodecBackend
+from src.ecdc import EcdcReader
+from src.models import CompressResult
+
+
+def _codes(path):
+    with EcdcReader(path) as reader:
+        return [reader.read_frame(i)[0] for i in range(reader.n_frames)]
+
+
+@pytest.mark.parametrize("model_sr", [24000, 48000])
+def test_batch_codes_equal_single_compress(tmp_path, audio_file, model_sr):
+    backend = EnCodecBackend(model_sr)
+    params = {"bandwidth": "6.0"}
+    sources = [audio_file(f"in{i}.pt", s, seed=i) for i, s in enumerate([0.5, 2.3, 1.0, 0.3])]
+    jobs = [(src, tmp_path / f"batch{i}") for i, src in enumerate(sources)]
+
+    results = dict(backend.compress_batch(jobs, params))
+    assert sorted(results) == list(range(len(jobs)))
+    for i, src in enumerate(sources):
+        single = backend.compress(src, tmp_path / f"single{i}", params)
+        batched = results[i]
+        assert isinstance(batched, CompressResult), batched
+        assert batched.duration == pytest.approx(single.duration)
+        a, b = _codes(batched.compressed_path), _codes(single.compressed_path)
+        assert len(a) == len(b)
+        assert all(torch.equal(x, y) for x, y in zip(a, b))
+
+
+def test_batches_hold_equal_lengths_only(monkeypatch):
+    backend = EnCodecBackend(24000)
+    monkeypatch.setattr(encodec_backend, "_BATCH_MAX_S", 10.0)
+    sr = 24000
+    lengths = [30 * sr, 4 * sr, 3 * sr, 3 * sr, 3 * sr, sr // 2, sr // 2, sr // 2 - 1]
+    segments = [(n, k) for k, n in enumerate(lengths)]
+    batches = [[n for n, _ in b] for b in backend._segment_batches(segments)]
+    assert sorted(n for b in batches for n in b) == sorted(lengths)
+    for batch in batches:
+        assert len(set(batch)) == 1
+        assert len(batch) == 1 or len(batch) * batch[0] <= 10 * sr
+    assert [3 * sr] * 3 in batches
+    assert [sr // 2] * 2 in batches
+
+
+@pytest.mark.parametrize("model_sr", [24000, 48000])
+def test_batched_segments_are_never_padded(tmp_path, audio_file, monkeypatch, model_sr):
+    backend = EnCodecBackend(model_sr)
+    sources = [audio_file(f"in{i}.pt", s, seed=i) for i, s in enumerate([0.5, 1.3, 0.5])]
+    seen = []
+    encode = backend._encode_frame
+
+    def recording(x, model=None):
+        seen.append(x.shape[-1])
+        return encode(x, model)
+
+    monkeypatch.setattr(backend, "_encode_frame", recording)
+    jobs = [(src, tmp_path / f"out{i}") for i, src in enumerate(sources)]
+    results = dict(backend.compress_batch(jobs, {"bandwidth": "6.0"}))
+    assert all(isinstance(r, CompressResult) for r in results.values())
+    if model_sr == 24000:
+        assert sorted(seen) == [12000, 31200]  # the two 0.5 s files share a batch
+    else:
+        # Full 1 s segments share a batch; every ragged tail keeps its own length.
+        assert sorted(seen) == [62400 - 47520, 24000, 48000]
+
+
+def test_encoder_failure_is_reported_per_job(tmp_path, audio_file, monkeypatch):
+    backend = EnCodecBackend(24000)
+    jobs = [(audio_file(f"in{i}.pt", 0.5, seed=i), tmp_path / f"out{i}") for i in range(3)]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("encoder exploded")
+
+    monkeypatch.setattr(backend, "_encode_frame", fail)
+    results = dict(backend.compress_batch(jobs, {"bandwidth": "6.0"}))
+    assert sorted(results) == [0, 1, 2]
+    assert all("encoder exploded" in str(r) for r in results.values())
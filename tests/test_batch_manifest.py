@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from src.backends.encodec_backend import EnCodecBackend
+from src.batch_manifest import BatchManifest
+
+PARAMS = {"bandwidth": "6.0", "tiers": "3"}
+
+
+@pytest.fixture
+def finished(tmp_path, audio_file):
+    """Two inputs compressed into ``out/`` and recorded in its manifest."""
+    out = tmp_path / "out"
+    out.mkdir()
+    backend = EnCodecBackend(24000)
+    sources = [audio_file(f"{i}.pt", 1.0, 24000, 1, seed=i) for i in range(2)]
+    jobs = [(src, out / src.stem) for src in sources]
+    results = dict(backend.compress_batch(jobs, PARAMS))
+    with BatchManifest(out, backend.name, PARAMS) as manifest:
+        for i in range(2):
+            manifest.record(results[i])
+    return out, backend.name, sources, results
+
+
+def _resumed(out, backend, sources, params=PARAMS):
+    with BatchManifest(out, backend, params) as manifest:
+        return manifest.up_to_date(sources)
+
+
+def test_recorded_inputs_resume(finished):
+    out, backend, sources, results = finished
+    done = _resumed(out, backend, sources)
+    assert sorted(done) == [0, 1]
+    for i, result in done.items():
+        assert result.resumed is True
+        assert result.source_path == sources[i]
+        assert result.compressed_path == results[i].compressed_path
+        assert result.tiers == results[i].tiers
+        assert result.compressed_size == results[i].compressed_size
+
+
+def test_other_params_or_backend_run_again(finished):
+    out, backend, sources, _ = finished
+    assert _resumed(out, backend, sources, {"bandwidth": "12.0", "tiers": "3"}) == {}
+    assert _resumed(out, "other", sources) == {}
+
+
+def test_changed_input_runs_again(finished):
+    out, backend, sources, _ = finished
+    data = bytearray(sources[0].read_bytes())
+    data[-1] ^= 0xFF
+    st = sources[0].stat()
+    sources[0].write_bytes(bytes(data))
+    os.utime(sources[0], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert sorted(_resumed(out, backend, sources)) == [1]
+
+
+def test_touched_input_with_same_content_stays_done(finished):
+    out, backend, sources, _ = finished
+    st = sources[0].stat()
+    os.utime(sources[0], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert sorted(_resumed(out, backend, sources)) == [0, 1]
+    # The new mtime was stored, so the next check needs no hash.
+    assert sorted(_resumed(out, backend, sources)) == [0, 1]
+
+
+def test_missing_or_changed_output_runs_again(finished):
+    out, backend, sources, results = finished
+    results[0].tiers[3.0].unlink()
+    with results[1].compressed_path.open("ab") as f:
+        f.write(b"\0")
+    assert _resumed(out, backend, sources) == {}
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import wave
+
+import numpy as np
+import pytest
+import torch
+
+from src import audio_io
+from src.backends import encodec_backend
+from src.backends.encodec_backend import EnCodecBackend
+from src.ecdc import EcdcReader
+
+
+@pytest.fixture
+def pcm_wav(tmp_path, monkeypatch):
+    """Factory for 16-bit PCM WAV files; torchaudio's loader reads them without ffmpeg."""
+
+    def load(path):
+        with wave.open(str(path), "rb") as wav:
+            blocks = list(audio_io._iter_wav_blocks(wav, 1 << 16))
+            return torch.cat(blocks, dim=1), wav.getframerate()
+
+    monkeypatch.setattr(audio_io.torchaudio, "load", load)
+
+    def make(name, seconds, sample_rate, channels, seed=0):
+        rng = np.random.default_rng(seed)
+        samples = (rng.standard_normal((int(seconds * sample_rate), channels)) * 3000)
+        path = tmp_path / name
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples.astype("<i2").tobytes())
+        return path
+
+    return make
+
+
+def _frames(path):
+    with EcdcReader(path) as reader:
+        return reader.starts.tolist(), [reader.read_frame(i)[0] for i in range(reader.n_frames)]
+
+
+@pytest.mark.parametrize("source_sr, channels", [(48000, 2), (44100, 1)])
+def test_chunked_codes_equal_whole_file(tmp_path, pcm_wav, monkeypatch, source_sr, channels):
+    monkeypatch.setattr(encodec_backend, "_CHUNK_BLOCK_S", 0.3)  # blocks cross segments
+    backend = EnCodecBackend(48000)
+    source = pcm_wav("a.wav", 3.2, source_sr, channels)
+    whole = backend.compress(source, tmp_path / "whole", {"bandwidth": "6.0"})
+    chunked = backend.compress(source, tmp_path / "chunked", {"bandwidth": "6.0", "chunked": True})
+    assert chunked.duration == pytest.approx(whole.duration)
+
+    starts_a, codes_a = _frames(whole.compressed_path)
+    starts_b, codes_b = _frames(chunked.compressed_path)
+    assert starts_a == starts_b
+    assert all(torch.equal(a, b) for a, b in zip(codes_a, codes_b))
+
+
+def test_unsegmented_model_is_cut_on_the_code_grid(tmp_path, pcm_wav, monkeypatch):
+    monkeypatch.setattr(encodec_backend, "_CHUNK_BLOCK_S", 0.3)
+    monkeypatch.setattr(encodec_backend, "_CHUNK_SEGMENT_S", 1.0)
+    backend = EnCodecBackend(24000)
+    source = pcm_wav("a.wav", 2.5, 24000, 1)
+    result = backend.compress(source, tmp_path / "a", {"bandwidth": "6.0", "chunked": True})
+    assert result.duration == pytest.approx(2.5)
+
+    starts, codes = _frames(result.compressed_path)
+    hop = 24000 // 75
+    stride = 24000 - encodec_backend._CHUNK_OVERLAP_HOPS * hop
+    assert starts == list(range(0, 60000, stride))
+    assert all(c.shape[-1] == 75 for c in codes[:-1])
+
+    decoded = backend.decompress(result.compressed_path, tmp_path / "a")
+    assert decoded.duration == pytest.approx(2.5, abs=1 / 75)
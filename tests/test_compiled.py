@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import torch
+
+from src import compile_cache
+from src.backends.encodec_backend import EnCodecBackend
+from src.compile_cache import BucketedTrace
+from src.ecdc import EcdcReader
+
+
+@pytest.fixture(autouse=True)
+def trace_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(compile_cache, "CACHE_DIR", tmp_path / "traces")
+    return tmp_path / "traces"
+
+
+def _codes(path):
+    with EcdcReader(path) as reader:
+        return [reader.read_frame(i)[0] for i in range(reader.n_frames)]
+
+
+def _wav_samples(path):
+    data = path.read_bytes()
+    pos = data.index(b"data", 12)
+    size = int.from_bytes(data[pos + 4:pos + 8], "little")
+    return np.frombuffer(data, np.float32, size // 4, pos + 8)
+
+
+@pytest.mark.parametrize("model_sr, seconds", [(24000, 1.3), (48000, 2.5)])
+def test_compiled_matches_eager(tmp_path, audio_file, trace_cache, model_sr, seconds):
+    backend = EnCodecBackend(model_sr)
+    source = audio_file("a.pt", seconds, model_sr)
+    eager = backend.compress(source, tmp_path / "eager", {"bandwidth": "6.0"})
+    compiled = backend.compress(
+        source, tmp_path / "compiled", {"bandwidth": "6.0", "compiled": True}
+    )
+    a, b = _codes(eager.compressed_path), _codes(compiled.compressed_path)
+    assert len(a) == len(b)
+    assert all(torch.equal(x, y) for x, y in zip(a, b))
+
+    want = backend.decompress(eager.compressed_path, tmp_path / "eager")
+    got = backend.decompress(eager.compressed_path, tmp_path / "compiled", compiled=True)
+    assert any(trace_cache.glob("*-decoder-*.pt"))
+    np.testing.assert_allclose(
+        _wav_samples(got.output_path), _wav_samples(want.output_path), atol=1e-5
+    )
+
+
+def test_traces_of_other_weights_are_not_reused(trace_cache):
+    x = torch.randn(1, 1, 64)
+    outputs = []
+    for seed in (0, 1):
+        torch.manual_seed(seed)
+        conv = torch.nn.Conv1d(1, 1, 3, padding=1)
+        trace = BucketedTrace(conv, "conv", [64], lambda n: n, pad=False)
+        with torch.no_grad():
+            outputs.append((trace(x), conv(x)))
+    assert len(list(trace_cache.glob("conv-*.pt"))) == 2
+    for got, want in outputs:
+        torch.testing.assert_close(got, want)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.backends.encodec_backend import EnCodecBackend
+from src.ecdc import EcdcReader
+
+from conftest import read_wav
+
+
+@pytest.fixture
+def damaged_file(tmp_path, audio_file):
+    """48 kHz file of several frames whose third frame fails its CRC."""
+    backend = EnCodecBackend(48000)
+    result = backend.compress(audio_file("a.pt", 4.0), tmp_path / "a", {"bandwidth": "6.0"})
+    path = result.compressed_path
+    with EcdcReader(path) as reader:
+        assert reader.n_frames >= 4
+        offset = int(reader.frames["payload"][2]) + 1
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+    return backend, path
+
+
+def test_frames_are_verified_while_decoding(tmp_path, damaged_file, monkeypatch):
+    backend, path = damaged_file
+
+    def no_upfront_scan(self):
+        raise AssertionError("decompress must not verify every frame before decoding")
+
+    monkeypatch.setattr(EcdcReader, "verify", no_upfront_scan)
+    with pytest.raises(ValueError, match="Frame 2"):
+        backend.decompress(path, tmp_path / "strict")
+    assert not (tmp_path / "strict.wav").exists()
+
+    result = backend.decompress(path, tmp_path / "recovered", recover=True)
+    assert result.output_path.exists()
+    assert result.duration == pytest.approx(4.0, abs=0.01)
+
+
+@pytest.mark.parametrize("start_s, end_s", [(0.0, 0.4), (1.3, 2.7), (3.5, 10.0)])
+def test_range_matches_full_decode(tmp_path, audio_file, start_s, end_s):
+    backend = EnCodecBackend(48000)
+    result = backend.compress(audio_file("a.pt", 4.0), tmp_path / "a", {"bandwidth": "6.0"})
+    with EcdcReader(result.compressed_path) as reader:
+        assert reader.starts.tolist() == [i * 47520 for i in range(reader.n_frames)]
+
+    full, sr = read_wav(backend.decompress(result.compressed_path, tmp_path / "a").output_path)
+    excerpt, excerpt_sr = backend.decompress_range(result.compressed_path, start_s, end_s)
+    assert excerpt_sr == sr
+    want = full[:, round(start_s * sr):round(end_s * sr)]
+    np.testing.assert_allclose(excerpt.numpy(), want, atol=1e-5)
+
+
+def test_empty_range_is_rejected(tmp_path, damaged_file):
+    backend, path = damaged_file
+    with pytest.raises(ValueError, match="Empty range"):
+        backend.decompress_range(path, 2.0, 2.0)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import torch
+
+from src import ecdc
+from src.ecdc import EcdcReader, EcdcWriter
+
+
+def _frames(n_frames, n_codebooks=8, n_steps=150, last_steps=None, seed=0, skewed=False):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_frames):
+        steps = last_steps if last_steps and i == n_frames - 1 else n_steps
+        if skewed:
+            codes = np.minimum(rng.geometric(0.02, (n_codebooks, steps)) - 1, 1023)
+        else:
+            codes = rng.integers(0, 1024, (n_codebooks, steps))
+        frames.append(codes)
+    return frames
+
+
+def _write(path, frames, **kwargs):
+    scales = [0.1 + i / 100 for i in range(len(frames))]
+    starts = [i * 47520 for i in range(len(frames))]
+    with EcdcWriter(path, 48000, 12.0, expected_frames=len(frames), **kwargs) as writer:
+        for codes, scale, start in zip(frames, scales, starts):
+            writer.write_frame(torch.from_numpy(codes[None]), torch.tensor([[scale]]), start)
+    return scales, starts
+
+
+def _check(path, frames, scales, starts, **reader_kwargs):
+    with EcdcReader(path, **reader_kwargs) as reader:
+        assert reader.version == 3
+        assert reader.model_sr == 48000
+        assert reader.n_frames == len(frames)
+        np.testing.assert_array_equal(reader.starts, starts)
+        assert not reader.verify().size
+        for i, want in enumerate(frames):
+            codes, scale = reader.read_frame(i)
+            assert codes.shape == (1, *want.shape)
+            np.testing.assert_array_equal(codes[0].numpy(), want)
+            assert scale.item() == pytest.approx(scales[i])
+        return reader.frames["flags"].copy(), reader.rans_tables
+
+
+def test_plain_round_trip(tmp_path):
+    frames = _frames(5, last_steps=37)
+    scales, starts = _write(tmp_path / "a.ecdc", frames)
+    flags, tables = _check(tmp_path / "a.ecdc", frames, scales, starts)
+    assert tables is None
+    assert not (flags & ecdc.FRAME_RANS).any()
+
+
+def test_rans_round_trip(tmp_path):
+    # More frames than the training window, so tables are built and pay off;
+    # the short last frame forces a flush at a shape change.
+    frames = _frames(ecdc._RANS_TRAIN_FRAMES + 20, last_steps=37, skewed=True)
+    scales, starts = _write(tmp_path / "r.ecdc", frames, entropy="rans")
+    flags, tables = _check(tmp_path / "r.ecdc", frames, scales, starts)
+    assert tables is not None
+    assert (flags & ecdc.FRAME_RANS).all()
+
+    plain = tmp_path / "p.ecdc"
+    _write(plain, frames)
+    assert (tmp_path / "r.ecdc").stat().st_size < plain.stat().st_size
+
+
+def test_rans_falls_back_for_incompressible_frames(tmp_path):
+    frames = _frames(ecdc._RANS_TRAIN_FRAMES + 4)
+    scales, starts = _write(tmp_path / "u.ecdc", frames, entropy="rans")
+    _check(tmp_path / "u.ecdc", frames, scales, starts)
+
+
+def test_progressive_round_trip(tmp_path):
+    frames = _frames(ecdc._RANS_TRAIN_FRAMES + 4, skewed=True)
+    scales, starts = _write(tmp_path / "l.ecdc", frames, entropy="rans", layers=(2, 2, 4))
+    _check(tmp_path / "l.ecdc", frames, scales, starts)
+    with EcdcReader(tmp_path / "l.ecdc", layers=2) as reader:
+        assert reader.bandwidth == pytest.approx(6.0)
+        for i, want in enumerate(frames):
+            np.testing.assert_array_equal(reader.read_frame(i)[0][0].numpy(), want[:4])
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import pytest
+
+from src.backends.encodec_backend import EnCodecBackend
+
+
+def test_int8_and_compiled_are_rejected(tmp_path, audio_file):
+    backend = EnCodecBackend(24000)
+    source = audio_file("a.pt", 0.5, 24000, 1)
+    with pytest.raises(ValueError, match="Int8"):
+        backend.compress(source, tmp_path / "out", {"int8": True, "compiled": True})
+
+
+def test_benchmark_reports_both_modes(audio_file):
+    report = EnCodecBackend(24000).benchmark_int8(audio_file("a.pt", 2.0, 24000, 1))
+    for mode in ("float", "int8"):
+        assert report[f"{mode}_encode_s"] > 0
+        assert report[f"{mode}_spectral_convergence"] >= 0
+    assert report["speedup"] > 0
+    assert 0.0 <= report["code_agreement"] <= 1.0
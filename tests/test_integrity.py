@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from src.ecdc import EcdcReader
+from src.integrity import scan_directory
+
+from conftest import write_ecdc
+
+
+def test_parallel_scan_finds_damaged_frames(tmp_path):
+    for i in range(3):
+        write_ecdc(tmp_path / f"f{i}.ecdc", seed=i)
+    bad = tmp_path / "f1.ecdc"
+    with EcdcReader(bad) as reader:
+        offset = int(reader.frames["payload"][2])
+    data = bytearray(bad.read_bytes())
+    data[offset] ^= 0xFF
+    bad.write_bytes(bytes(data))
+
+    results = list(scan_directory(tmp_path, workers=2))
+    assert [r.path.name for r in results] == ["f0.ecdc", "f1.ecdc", "f2.ecdc"]
+    assert [r.damaged_frames for r in results] == [[], [2], []]
+    assert all(r.n_frames == 4 and r.error is None for r in results)
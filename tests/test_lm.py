@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import torch
+
+from src import ecdc
+from src.backends.encodec_backend import EnCodecBackend
+from src.ecdc import EcdcReader
+
+from conftest import read_wav
+
+
+@pytest.mark.parametrize("model_sr, seconds", [(24000, 1.0), (48000, 2.5)])
+def test_lm_coded_frames_decode_to_the_plain_codes(tmp_path, audio_file, model_sr, seconds):
+    backend = EnCodecBackend(model_sr)
+    source = audio_file("a.pt", seconds)
+    plain = backend.compress(source, tmp_path / "plain", {"bandwidth": "6.0"})
+    coded = backend.compress(source, tmp_path / "lm", {"bandwidth": "6.0", "use_lm": True})
+
+    with EcdcReader(coded.compressed_path) as reader:
+        assert (reader.frames["flags"] & ecdc.FRAME_LM).all()
+        with pytest.raises(ValueError, match="language model"):
+            reader.read_frame(0)
+
+    want, _ = read_wav(backend.decompress(plain.compressed_path, tmp_path / "plain").output_path)
+    got, _ = read_wav(backend.decompress(coded.compressed_path, tmp_path / "lm").output_path)
+    np.testing.assert_array_equal(got, want)
+
+
+def test_lm_payloads_round_trip():
+    backend = EnCodecBackend(48000)
+    backend._load_model()
+    backend._load_lm()
+    gen = torch.Generator().manual_seed(0)
+    for shape in [(17, 4, 30), (3, 4, 12), (1, 16, 5)]:
+        codes = torch.randint(0, 1024, shape, generator=gen)
+        payloads = backend._lm_encode(codes)
+        assert len(payloads) == shape[0]
+        assert torch.equal(backend._lm_decode(payloads, *shape[1:]), codes)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+import torch
+
+from src.backends.encodec_backend import EnCodecBackend
+from src.model_manager import ModelManager
+
+
+def _loader(calls, size=1 << 20, delay=0.0):
+    def load():
+        calls.append(1)
+        time.sleep(delay)
+        return torch.nn.Linear(size // 4, 1, bias=False)  # ``size`` bytes of weights
+    return load
+
+
+def test_concurrent_gets_share_one_load():
+    manager = ModelManager()
+    calls, models = [], []
+    threads = [
+        threading.Thread(target=lambda: models.append(manager.get("m", _loader(calls, delay=0.1))))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(m is models[0] for m in models)
+
+
+def test_budget_evicts_least_recently_used_unless_held():
+    manager = ModelManager(budget_mb=2)
+    calls = []
+    manager.get("a", _loader(calls))
+    manager.get("b", _loader(calls))
+    manager.get("a", _loader(calls))  # "b" is now the least recently used
+    manager.get("c", _loader(calls))
+    assert manager.is_loaded("a") and manager.is_loaded("c")
+    assert not manager.is_loaded("b")
+
+    with manager.hold("a"):
+        manager.get("d", _loader(calls))
+        assert manager.is_loaded("a") and not manager.is_loaded("c")
+        assert not manager.evict("a")
+    assert manager.evict("a")
+
+
+def test_idle_models_are_evicted():
+    manager = ModelManager(idle_timeout=0.05)
+    manager.get("a", _loader([]))
+    with manager.hold("a"):
+        time.sleep(0.1)
+        manager.evict_idle()
+        assert manager.is_loaded("a")
+    time.sleep(0.1)
+    manager.evict_idle()
+    assert not manager.is_loaded("a")
+    assert manager.memory_used() == 0
+
+
+def test_preload_loads_in_background_and_swallows_errors():
+    manager = ModelManager()
+    manager.preload("a", _loader([])).join()
+    assert manager.is_loaded("a")
+
+    def broken():
+        raise OSError("no weights")
+
+    manager.preload("b", broken).join()
+    assert not manager.is_loaded("b")
+
+
+def test_jobs_at_other_bandwidths_do_not_change_each_other():
+    backend = EnCodecBackend(48000)
+    backend._load_model()
+    low = backend._encoder_model({"bandwidth": "6.0"})
+    high = backend._encoder_model({"bandwidth": "24.0"})
+    x = torch.randn(1, 2, 48000) * 0.1
+    with torch.no_grad():
+        codes_low, _ = backend._encode_frame(x, low)
+        codes_high, _ = backend._encode_frame(x, high)
+    assert codes_low.shape[1] == 4 and codes_high.shape[1] == 16
+    assert torch.equal(codes_high[:, :4], codes_low)
+    with pytest.raises(ValueError):
+        backend._encoder_model({"bandwidth": "7.0"})
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from src import registry
+from src.models import CompressResult
+from src.parallel import ParallelCompressor
+
+from conftest import requires_ffmpeg, write_wav
+
+_CODEC = "EnCodec 24kHz"
+
+
+def _run(jobs, params=None):
+    engine = ParallelCompressor(registry.get(_CODEC), 2, threads_per_worker=1)
+    return dict(engine.compress_batch(jobs, params or {"bandwidth": "6.0"}))
+
+
+def test_spawned_workers_report_errors_per_job(tmp_path):
+    # Workers must start and import the backends, so every job reports its
+    # own error rather than "exited unexpectedly".
+    jobs = [(tmp_path / f"missing{i}.wav", tmp_path / f"out{i}") for i in range(2)]
+    results = _run(jobs)
+    assert sorted(results) == [0, 1]
+    for result in results.values():
+        assert isinstance(result, Exception)
+        assert "exited unexpectedly" not in str(result)
+
+
+@requires_ffmpeg
+def test_spawned_workers_compress(tmp_path):
+    jobs = [
+        (write_wav(tmp_path / f"in{i}.wav", 1.0 + i, 24000, 1, seed=i), tmp_path / f"out{i}")
+        for i in range(2)
+    ]
+    results = _run(jobs)
+    assert sorted(results) == [0, 1]
+    for i, result in results.items():
+        assert isinstance(result, CompressResult), result
+        assert result.compressed_path.stat().st_size > 0
+        assert abs(result.duration - (1.0 + i)) < 0.05
+
+
+def test_interrupted_jobs_lose_their_tier_files(tmp_path):
+    engine = ParallelCompressor(registry.get("EnCodec 48kHz"), 2)
+    params = {"bandwidth": "6.0", "tiers": "3,12"}
+    outputs = [tmp_path / name for name in ("a.ecdc", "a_3kbps.ecdc", "a_12kbps.ecdc")]
+    for path in outputs:
+        path.write_bytes(b"partial")
+    (tmp_path / "b.ecdc").write_bytes(b"other job")
+    engine._remove_outputs(tmp_path / "a", params)
+    assert not any(path.exists() for path in outputs)
+    assert (tmp_path / "b.ecdc").exists()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from src import probe_cache
+from src.models import AudioInfo
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Replace ffprobe; records every probed path."""
+    calls = []
+
+    def fake_info(path):
+        calls.append(path.name)
+        if path.suffix == ".bad":
+            raise RuntimeError(f"cannot probe {path.name}")
+        return AudioInfo(path.stat().st_size / 100, 2, 48000, 128.0, "mp3")
+
+    monkeypatch.setattr(probe_cache, "get_audio_info", fake_info)
+    return calls
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"{i}.mp3"
+        path.write_bytes(b"x" * (100 * (i + 1)))
+        paths.append(path)
+    return paths
+
+
+def test_second_pass_is_served_from_disk(tmp_path, files, probes):
+    cache = probe_cache.ProbeCache(tmp_path / "probe.sqlite3")
+    first = dict(cache.probe_many(files, workers=2))
+    assert sorted(probes) == sorted(p.name for p in files)
+    assert [first[i].duration for i in range(5)] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    cache.close()
+
+    probes.clear()
+    reopened = probe_cache.ProbeCache(tmp_path / "probe.sqlite3")
+    progress = []
+    second = dict(reopened.probe_many(files, progress_cb=lambda d, t: progress.append((d, t))))
+    assert probes == []
+    assert second == first
+    assert progress[-1] == (5, 5)
+    reopened.close()
+
+
+def test_changed_size_or_mtime_probes_again(tmp_path, files, probes):
+    cache = probe_cache.ProbeCache(tmp_path / "probe.sqlite3")
+    list(cache.probe_many(files))
+    probes.clear()
+
+    files[0].write_bytes(b"x" * 1000)
+    st = files[1].stat()
+    os.utime(files[1], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    results = dict(cache.probe_many(files))
+    assert sorted(probes) == ["0.mp3", "1.mp3"]
+    assert results[0].duration == 10.0
+    assert cache.probe(files[1]).duration == 2.0
+    assert sorted(probes) == ["0.mp3", "1.mp3"]
+    cache.close()
+
+
+def test_failures_are_yielded_and_not_cached(tmp_path, files, probes):
+    bad = tmp_path / "broken.bad"
+    bad.write_bytes(b"?")
+    cache = probe_cache.ProbeCache(tmp_path / "probe.sqlite3")
+    results = dict(cache.probe_many([files[0], bad]))
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[0], AudioInfo)
+
+    probes.clear()
+    results = dict(cache.probe_many([files[0], bad]))
+    assert probes == ["broken.bad"]
+    assert isinstance(results[1], RuntimeError)
+    cache.close()
+
+
+def test_cancelled_probes_are_skipped(tmp_path, files, probes):
+    cache = probe_cache.ProbeCache(tmp_path / "probe.sqlite3")
+    assert list(cache.probe_many(files, cancelled=lambda: True)) == []
+    assert probes == []
+    cache.close()
+
+
+def test_unwritable_location_falls_back_to_memory(tmp_path, files, probes):
+    blocker = tmp_path / "file"
+    blocker.write_bytes(b"")
+    cache = probe_cache.ProbeCache(blocker / "sub" / "probe.sqlite3")
+    assert cache.probe(files[0]).duration == 1.0
+    assert cache.probe(files[0]).duration == 1.0
+    assert probes == ["0.mp3"]
+    cache.close()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import torch
+
+from src import ecdc, rans
+from src.ecdc import EcdcReader, EcdcWriter
+
+
+def _skewed_codes(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.minimum(rng.geometric(0.01, shape) - 1, 1023)
+
+
+def _tables(codes):
+    counts = np.stack([
+        np.bincount(codes[:, k].reshape(-1), minlength=1024) for k in range(codes.shape[1])
+    ])
+    return rans.RansTables.from_counts(counts)
+
+
+@pytest.mark.parametrize("shape", [(3, 8, 150), (1, 8, 30000), (2, 4, 1)])
+def test_round_trip(shape):
+    codes = _skewed_codes(shape)
+    tables = _tables(codes)
+    lanes = rans.lanes_for(shape[1] * shape[2])
+    payloads = rans.encode_frames(codes, tables, lanes)
+    decoded = rans.decode_frames(payloads, shape[1], shape[2], tables, lanes)
+    np.testing.assert_array_equal(decoded, codes)
+    assert len(payloads[0]) < shape[1] * shape[2] * 10 / 8 + lanes * 4
+
+
+def test_long_frames_get_more_lanes():
+    assert rans.lanes_for(8 * 150) == rans.LANES
+    assert rans.lanes_for(8 * 75 * 600) > 100
+
+
+def _write(path, frames):
+    with EcdcWriter(path, 24000, 6.0, entropy="rans", expected_frames=len(frames)) as writer:
+        for i, codes in enumerate(frames):
+            writer.write_frame(torch.from_numpy(codes[None]), None, i * codes.shape[-1] * 320)
+
+
+def _read(path):
+    with EcdcReader(path) as reader:
+        assert reader.rans_tables is not None
+        assert reader.frames["flags"][0] & ecdc.FRAME_RANS
+        return [reader.read_frame(i)[0][0].numpy() for i in range(reader.n_frames)]
+
+
+def test_whole_file_frame_through_container(tmp_path):
+    frames = [_skewed_codes((8, 20000), seed=i) for i in range(2)]
+    _write(tmp_path / "wide.ecdc", frames)
+    for got, want in zip(_read(tmp_path / "wide.ecdc"), frames):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_files_without_wide_flag_keep_four_lanes(tmp_path, monkeypatch):
+    frames = [_skewed_codes((8, 20000), seed=i) for i in range(2)]
+    with monkeypatch.context() as m:
+        m.setattr(ecdc, "HEADER_RANS_WIDE", 0)
+        m.setattr(rans, "lanes_for", lambda n: rans.LANES)
+        _write(tmp_path / "old.ecdc", frames)
+    for got, want in zip(_read(tmp_path / "old.ecdc"), frames):
+        np.testing.assert_array_equal(got, want)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+import torch
+import torchaudio
+
+from src import resample as resample_mod
+from src.resample import StreamingResampler, get_resampler, resample
+
+
+@pytest.mark.parametrize("rates", [(44100, 48000), (48000, 24000), (22050, 24000)])
+@pytest.mark.parametrize("block", [1, 997, 100_000])
+def test_streaming_matches_whole_signal(rates, block):
+    orig_sr, target_sr = rates
+    x = torch.randn(2, orig_sr // 3 + 17, generator=torch.Generator().manual_seed(0))
+    expected = torchaudio.functional.resample(x, orig_sr, target_sr)
+
+    stream = StreamingResampler(orig_sr, target_sr)
+    pieces = [stream.process(x[..., i:i + block]) for i in range(0, x.shape[-1], block)]
+    pieces.append(stream.flush())
+    got = torch.cat([p.reshape(2, -1) for p in pieces], dim=-1)
+
+    assert got.shape == expected.shape
+    torch.testing.assert_close(got, expected, atol=1e-4, rtol=0)
+
+
+def test_blockwise_resample_matches_torchaudio(monkeypatch):
+    monkeypatch.setattr(resample_mod, "_BLOCK_SAMPLES", 4096)
+    x = torch.randn(1, 30_001, generator=torch.Generator().manual_seed(1))
+    torch.testing.assert_close(
+        resample(x, 44100, 48000), torchaudio.functional.resample(x, 44100, 48000),
+        atol=1e-4, rtol=0,
+    )
+
+
+def test_kernel_is_built_once_per_rate_pair():
+    get_resampler.cache_clear()
+    StreamingResampler(44100, 48000)
+    resample(torch.zeros(1, 100), 44100, 48000)
+    resample(torch.zeros(2, 5000), 44100, 48000)
+    info = get_resampler.cache_info()
+    assert (info.misses, info.hits, info.currsize) == (1, 2, 1)
+    resample(torch.zeros(1, 100), 48000, 44100)
+    assert get_resampler.cache_info().currsize == 2
+
+
+def test_same_rate_passes_through():
+    x = torch.randn(1, 10)
+    assert resample(x, 24000, 24000) is x
+    stream = StreamingResampler(24000, 24000)
+    assert stream.process(x) is x
+    assert stream.flush().numel() == 0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+from src import result_cache
+from src.backends.encodec_backend import EnCodecBackend
+from src.model_manager import get_manager
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = result_cache.ResultCache(tmp_path / "cache")
+    monkeypatch.setattr(result_cache, "_cache", cache)
+    return cache
+
+
+def test_hit_places_outputs_without_loading_models(tmp_path, audio_file, cache, monkeypatch):
+    backend = EnCodecBackend(24000)
+    params = {"bandwidth": "6.0", "tiers": "3.0", "result_cache": True}
+    source = audio_file("a.pt", 1.0, 24000, 1)
+    miss = backend.compress(source, tmp_path / "first", params)
+    assert miss.cache_hit is False
+
+    for key in backend._model_keys:
+        get_manager().evict(key)
+
+    def no_model(*args, **kwargs):
+        raise AssertionError("a cache hit must not load a model")
+
+    monkeypatch.setattr(backend, "_build_model", no_model)
+    hit = backend.compress(source, tmp_path / "second", params)
+    assert hit.cache_hit is True
+    assert hit.compressed_path.read_bytes() == miss.compressed_path.read_bytes()
+    assert hit.tiers[3.0].read_bytes() == miss.tiers[3.0].read_bytes()
+
+    jobs = [(source, tmp_path / "batch0"), (source, tmp_path / "batch1")]
+    results = dict(backend.compress_batch(jobs, params))
+    assert [results[i].cache_hit for i in range(2)] == [True, True]
+
+
+def test_rewriting_an_output_keeps_the_cached_entry(tmp_path, audio_file, cache):
+    backend = EnCodecBackend(24000)
+    params = {"bandwidth": "6.0", "result_cache": True}
+    a = audio_file("a.pt", 1.0, 24000, 1, seed=1)
+    b = audio_file("b.pt", 1.0, 24000, 1, seed=2)
+    first = backend.compress(a, tmp_path / "out", params)
+    stored = first.compressed_path.read_bytes()
+    backend.compress(b, tmp_path / "out", params)  # same output path, other audio
+
+    again = backend.compress(a, tmp_path / "again", params)
+    assert again.cache_hit is True
+    assert again.compressed_path.read_bytes() == stored
+
+
+def test_eviction_keeps_the_budget(tmp_path, audio_file, cache):
+    backend = EnCodecBackend(24000)
+    params = {"bandwidth": "6.0", "result_cache": True}
+    for i in range(3):
+        backend.compress(audio_file(f"{i}.pt", 1.0, 24000, 1, seed=i), tmp_path / f"o{i}", params)
+    assert len(list(cache.root.glob("*/*/meta.json"))) == 3
+    cache.configure(0)
+    assert not list(cache.root.glob("*/*/meta.json"))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+import torch
+
+from src.backends.encodec_backend import EnCodecBackend
+from src.ecdc import EcdcReader
+from src.transcode import tier_path
+
+
+def _codes(path):
+    with EcdcReader(path) as reader:
+        return reader.bandwidth, [reader.read_frame(i)[0] for i in range(reader.n_frames)]
+
+
+@pytest.mark.parametrize("model_sr", [24000, 48000])
+def test_tiers_equal_separate_encodes(tmp_path, audio_file, model_sr):
+    backend = EnCodecBackend(model_sr)
+    source = audio_file("a.pt", 2.5)
+    result = backend.compress(source, tmp_path / "a", {"bandwidth": "6.0", "tiers": "3,12"})
+    assert result.tiers == {3.0: tier_path(result.compressed_path, 3.0),
+                            12.0: tier_path(result.compressed_path, 12.0)}
+
+    for bw, path in [(6.0, result.compressed_path), *result.tiers.items()]:
+        single = backend.compress(source, tmp_path / f"single{bw:g}", {"bandwidth": str(bw)})
+        got_bw, got = _codes(path)
+        want_bw, want = _codes(single.compressed_path)
+        assert got_bw == want_bw == bw
+        assert all(torch.equal(a, b) for a, b in zip(got, want))
+
+
+def test_batch_writes_tiers(tmp_path, audio_file):
+    backend = EnCodecBackend(48000)
+    jobs = [(audio_file(f"in{i}.pt", 1.2, seed=i), tmp_path / f"out{i}") for i in range(2)]
+    results = dict(backend.compress_batch(jobs, {"bandwidth": "6.0", "tiers": "all"}))
+    for result in results.values():
+        assert sorted(result.tiers) == [3.0, 12.0, 24.0]
+        assert all(path.exists() for path in result.tiers.values())
+
+
+def test_unsupported_tier_is_rejected(tmp_path, audio_file):
+    with pytest.raises(ValueError, match="does not support 7 kbps"):
+        EnCodecBackend(48000).compress(
+            audio_file("a.pt", 0.5), tmp_path / "a", {"bandwidth": "6.0", "tiers": "7"}
+        )
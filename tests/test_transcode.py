@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+import torch
+
+from src.ecdc import DEFAULT_CODEBOOK_BITS, EcdcReader
+from src.transcode import downgrade_directory, downgrade_file, tier_path
+
+from conftest import write_ecdc
+
+
+def test_parallel_downgrade_keeps_codebook_prefix(tmp_path):
+    sources = {}
+    for i in range(3):
+        path = tmp_path / f"f{i}.ecdc"
+        sources[path] = write_ecdc(path, seed=i)  # 8 codebooks, 12 kbps
+
+    results = list(downgrade_directory(tmp_path, 6.0, workers=2))
+    assert [r.source.name for r in results] == ["f0.ecdc", "f1.ecdc", "f2.ecdc"]
+    for result in results:
+        assert result.error is None
+        assert result.output == tier_path(result.source, 6.0)
+        with EcdcReader(result.output) as reader:
+            assert reader.bandwidth == 6.0
+            for i, codes in enumerate(sources[result.source]):
+                assert torch.equal(reader.read_frame(i)[0], codes[:, :4])
+
+
+def test_only_generated_tiers_are_skipped(tmp_path):
+    write_ecdc(tmp_path / "talk.ecdc")
+    write_ecdc(tmp_path / "talk_3kbps.ecdc")  # tier copy of an earlier run
+    write_ecdc(tmp_path / "podcast_128kbps.ecdc")  # a source named after its bitrate
+
+    results = list(downgrade_directory(tmp_path, 3.0, workers=1))
+    assert [r.source.name for r in results] == ["podcast_128kbps.ecdc", "talk.ecdc"]
+
+
+def test_v1_source_is_downgraded_to_packed_codes(tmp_path):
+    codes = np.random.default_rng(0).integers(0, 1024, (3, 8, 150))
+    src = tmp_path / "old.ecdc"
+    with open(src, "wb") as fh:
+        fh.write(struct.pack("<4sBIfH", b"ECDC", 1, 48000, 12.0, len(codes)))
+        for frame in codes:
+            fh.write(b"\x01" + struct.pack("<f", 0.5) + struct.pack("<HI", *frame.shape))
+            fh.write(frame.astype("<i2").tobytes())
+
+    result = downgrade_file(src, tmp_path / "new.ecdc", 6.0)
+    with EcdcReader(result.output) as reader:
+        assert reader.bits == DEFAULT_CODEBOOK_BITS
+        assert reader.starts.tolist() == [0, 47520, 95040]
+        for i, frame in enumerate(codes):
+            np.testing.assert_array_equal(reader.read_frame(i)[0][0].numpy(), frame[:4])
+    assert result.output_size < 3 * 4 * 150 * 2